@@ -0,0 +1,70 @@
+"""
+attribute_access
+
+Micro-benchmark for the per-access overhead of members containing Attribute
+objects on DataMessage instances, compared to the same access on a plain
+python object.
+
+usage:
+    python benchmarks/attribute_access.py
+    python benchmarks/attribute_access.py --janus dist/janus-1.1.6-py3-none-any.whl
+
+--janus imports janus from another source tree, wheel or source distribution instead of this
+repository, e.g. an older release from dist/ to get the numbers before a change.
+"""
+
+import os
+import timeit
+
+from common import argument_parser
+from janus.janus import Attribute, DataMessage
+
+parser = argument_parser("per-access overhead of DataMessage members")
+parser.add_argument('--number', type=int, default=200000, help="accesses per measurement")
+parser.add_argument('--repeat', type=int, default=5, help="measurements per operation, the best one is reported")
+args = parser.parse_args()
+
+class PlainObject(object):
+    type_name = "plain"
+
+    def __init__(self):
+        self.id = "1"
+        self.title = "title"
+
+    def to_dict(self):
+        return {}
+
+class BenchMessage(DataMessage):
+    type_name = "bench"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    title = Attribute(value_type=str, name='title', mapping='title')
+
+def measure(stmt, namespace):
+    best = min(timeit.repeat(stmt, globals=namespace, number=args.number, repeat=args.repeat))
+    return best / args.number * 1e9 #ns per access
+
+plain = PlainObject()
+msg = BenchMessage()
+msg.id = "1"
+msg.title = "title"
+
+operations = [
+    ("read attribute", "o.title"),
+    ("write attribute", "o.title = 'title'"),
+    ("read id", "o.id"),
+    ("write id", "o.id = '1'"),
+    ("read class member", "o.type_name"),
+    ("method lookup", "o.to_dict"),
+]
+
+print("janus: " + os.path.abspath(args.janus))
+print("%-20s %12s %12s %10s" % ("operation", "plain [ns]", "message [ns]", "overhead"))
+for name, stmt in operations:
+    plain_ns = measure(stmt, {'o': plain})
+    try:
+        msg_ns = measure(stmt, {'o': msg})
+    except Exception as e: #older releases fail on some operations, e.g. assigning id twice
+        print("%-20s %12.1f %12s %10s" % (name, plain_ns, "failed", "-"))
+        continue
+
+    print("%-20s %12.1f %12.1f %9.1fx" % (name, plain_ns, msg_ns, msg_ns / plain_ns))
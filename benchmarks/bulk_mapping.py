@@ -0,0 +1,36 @@
+"""
+bulk_mapping
+
+Benchmark for mapping large lists of python objects to resource dicts, comparing
+DataMessage.from_object (one message object per python object) with the
+column-wise DataMessage.from_objects.
+
+usage:
+    python benchmarks/bulk_mapping.py
+    python benchmarks/bulk_mapping.py --rows 10000
+"""
+
+import timeit
+
+from common import argument_parser, make_rows, RowMessage
+from janus.janus import DataMessage
+
+parser = argument_parser("per-object vs. bulk mapping of lists")
+parser.add_argument('--rows', type=int, default=10000, help="objects per list")
+parser.add_argument('--repeat', type=int, default=5, help="measurements per mode, the best one is reported")
+args = parser.parse_args()
+
+rows = make_rows(args.rows, owners=50)
+
+def per_object():
+    return [msg.to_dict() for msg in DataMessage.from_object(rows, RowMessage)]
+
+def bulk():
+    return DataMessage.from_objects(rows, RowMessage)
+
+if per_object() != bulk():
+    raise Exception("from_objects returned other dicts than from_object.")
+
+print("%-12s %10s" % ("mode", "best [s]"))
+for name, f in (("from_object", per_object), ("from_objects", bulk)):
+    print("%-12s %10.4f" % (name, min(timeit.repeat(f, number=1, repeat=args.repeat))))
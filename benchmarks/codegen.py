@@ -0,0 +1,102 @@
+"""
+codegen
+
+Benchmark for map_object and to_dict of message classes compiled with DataMessage.compile
+(see janus.codegen) vs. interpreted ones, for a message class with every configuration of Attributes.
+That both produce the same results is tested in tests/test_codegen.py.
+
+usage:
+    python benchmarks/codegen.py
+    python benchmarks/codegen.py --number 20000
+"""
+
+import timeit
+
+from common import argument_parser
+from janus.janus import Attribute, DataMessage
+
+parser = argument_parser("compiled vs. interpreted map_object and to_dict")
+parser.add_argument('--number', type=int, default=10000, help="messages per measurement")
+parser.add_argument('--repeat', type=int, default=5, help="measurements per mode, the best one is reported")
+args = parser.parse_args()
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+def load_tags(keys):
+    return {key: Obj(id=key, label="tag " + str(key)) for key in keys}
+
+def define(compiled):
+    #the same message classes, with the same names, for each mode.
+    class TagMessage(DataMessage):
+        type_name = "tag"
+        id = Attribute(value_type=str, name='id', mapping='id')
+        label = Attribute(value_type=str, name='label', mapping='label')
+
+    class AddressMessage(DataMessage):
+        type_name = "address"
+        id = Attribute(value_type=int, name='id', mapping='id')
+        city = Attribute(value_type=str, name='city', mapping='city', required=True)
+        tags = Attribute(value_type=TagMessage, name='tags', mapping='tags', key_mapping='tag_ids')
+
+    class PersonMessage(DataMessage):
+        type_name = "person"
+        ident = Attribute(value_type=str, name='id', mapping='key') #id Attribute in another member
+        name = Attribute(value_type=str, name='name', mapping='name', required=True)
+        nick = Attribute(value_type=str, name='nick', mapping='get_nick') #callable
+        city = Attribute(value_type=str, name='city', mapping='profile.city') #dotted
+        odd = Attribute(value_type=str, name='odd', mapping='profile.odd-name') #no valid python name
+        age = Attribute(value_type=int, name='age', mapping='age')
+        score = Attribute(value_type=float, name='score', mapping='score')
+        active = Attribute(value_type=bool, name='active', mapping='active')
+        blob = Attribute(value_type=bytes, name='blob', mapping='blob')
+        aliases = Attribute(value_type=list, name='aliases', mapping='aliases')
+        labels = Attribute(value_type=list, name='labels', mapping='labels', item_type=str)
+        extra = Attribute(value_type=dict, name='extra', mapping='extra')
+        counts = Attribute(value_type=dict, name='counts', mapping='counts', item_type=int)
+        password = Attribute(value_type=str, name='password', mapping='password', write_only=True)
+        computed = Attribute(value_type=str, name='computed') #no mapping
+        friend = Attribute(value_type=TagMessage, name='friend', mapping='friend', key_mapping='friend.id')
+        tags = Attribute(value_type=TagMessage, name='tags', mapping='tags', key_mapping='tag_ids', loader=load_tags)
+        owner = Attribute(value_type=TagMessage, name='owner', mapping='owner', key_mapping='owner.id', required=True)
+        address = Attribute(value_type=AddressMessage, name='address', mapping='address', key_mapping='address.id', nested=True, nested_type=Obj)
+        homes = Attribute(value_type=AddressMessage, name='homes', mapping='homes', key_mapping='home_ids', nested=True, nested_type=Obj, required=True)
+
+    if compiled:
+        DataMessage.compile(TagMessage)
+        AddressMessage.compile()
+        DataMessage.compile(PersonMessage)
+
+    return PersonMessage
+
+def person(**changes):
+    tags = [Obj(id="t1", label="one"), Obj(id="t2", label="two")]
+    address = Obj(id=7, city="Graz", tags=tags, tag_ids=["t1", "t2"])
+    profile = Obj(city="Vienna")
+    setattr(profile, 'odd-name', "odd")
+    values = dict(
+        key="p1", name="Ada", get_nick=lambda: "ada", profile=profile, age=36, score=1.5, active=True, blob=b"x",
+        aliases=["a", 1], labels=["x", None], extra={'a': [1]}, counts={'a': 1, 'b': None}, password="secret",
+        friend=tags[0], tags=tags, tag_ids=["t1", "t2"], owner=tags[1], address=address, homes=[address], home_ids=[7],
+    )
+    values.update(changes)
+    return Obj(**values)
+
+interpreted = define(False)
+compiled = define(True)
+
+obj = person()
+
+def measure(msg_class):
+    def f():
+        msg = msg_class()
+        msg.map_object(obj)
+        return msg.to_dict()
+    return min(timeit.repeat(f, number=args.number, repeat=args.repeat)) / args.number * 1e6 #us per message
+
+print("%-12s %16s" % ("mode", "per message [us]"))
+base = measure(interpreted)
+print("%-12s %16.1f" % ("interpreted", base))
+us = measure(compiled)
+print("%-12s %16.1f %6.2fx" % ("compiled", us, base / us))
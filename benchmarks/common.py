@@ -0,0 +1,91 @@
+"""
+common
+
+Setup shared by the benchmark scripts. Importing this makes janus importable from the path given
+with --janus on the command line (a source tree, a wheel or a source distribution, defaults to this
+source tree), so every script can be run against older releases, e.g. from dist/:
+
+    from common import argument_parser, make_rows, RowMessage
+
+    parser = argument_parser("description of the benchmark")
+    parser.add_argument(...)
+    args = parser.parse_args()
+
+It also contains the Row and Owner objects and their message classes most scripts measure.
+Only the API every release since 1.1.0 has is used for them.
+"""
+
+import argparse
+import os
+import sys
+import tarfile
+import tempfile
+
+default_janus = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def argument_parser(description):
+    """
+    returns an argument parser with the --janus argument.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--janus', default=default_janus, help="source tree, wheel or source distribution to import janus from")
+    return parser
+
+def janus_path(path):
+    """
+    returns the directory to add to sys.path to import janus from path.
+    """
+    if path.endswith(".tar.gz"):
+        target = tempfile.mkdtemp(prefix="janus-bench-")
+        with tarfile.open(path) as sdist:
+            sdist.extractall(target)
+        return os.path.join(target, os.listdir(target)[0])
+
+    return path #wheels can be imported directly
+
+_bootstrap = argparse.ArgumentParser(add_help=False)
+_bootstrap.add_argument('--janus', default=default_janus)
+
+path = janus_path(os.path.abspath(_bootstrap.parse_known_args()[0].janus))
+sys.path.insert(0, path)
+sys.path.append(os.path.join(path, "janus")) #some releases import their own modules without the package name
+
+from janus.janus import Attribute, DataMessage
+
+class Owner(object):
+    def __init__(self, i):
+        self.id = "owner%d" % i
+        self.name = "owner %d" % i
+
+class Row(object):
+    def __init__(self, i, owner):
+        self.id = "row%d" % i
+        self.name = "name %d" % i
+        self.count = i
+        self.price = i * 0.5
+        self.active = bool(i % 2)
+        self.tags = ["tag%d" % (i % 7), "tag%d" % (i % 11)]
+        self.owner = owner
+        self.owner_id = owner.id
+
+def make_rows(count, owners=None):
+    """
+    returns count rows, related to the given number of owners, or to an owner each if owners is None.
+    """
+    shared = [Owner(i) for i in range(owners)] if owners != None else None
+    return [Row(i, shared[i % owners] if shared != None else Owner(i)) for i in range(count)]
+
+class OwnerMessage(DataMessage):
+    type_name = "owner"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+
+class RowMessage(DataMessage):
+    type_name = "row"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name', required=True)
+    count = Attribute(value_type=int, name='count', mapping='count')
+    price = Attribute(value_type=float, name='price', mapping='price')
+    active = Attribute(value_type=bool, name='active', mapping='active')
+    tags = Attribute(value_type=list, name='tags', mapping='tags')
+    owner = Attribute(value_type=OwnerMessage, name='owner', mapping='owner', key_mapping='owner_id')
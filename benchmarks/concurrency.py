@@ -0,0 +1,73 @@
+"""
+concurrency
+
+Stress benchmark for one jsonapi decorated function serving concurrent threads.
+Every request simulates some I/O (e.g. a database query) before returning its
+JanusResponse, so throughput should scale with the number of threads.
+Each request returns its own meta and include flag and every response is checked
+for state leaked from other requests.
+
+usage:
+    python benchmarks/concurrency.py
+    python benchmarks/concurrency.py --threads 1 2 4 8 16 --requests 2000 --io-ms 2
+"""
+
+import threading
+import time
+
+from common import argument_parser, make_rows, RowMessage
+from janus.janus import JanusResponse
+from janus.decorators import jsonapi
+
+parser = argument_parser("throughput of a decorated function with concurrent threads")
+parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16], help="thread counts to measure")
+parser.add_argument('--requests', type=int, default=1000, help="requests per measurement")
+parser.add_argument('--io-ms', type=float, default=2.0, help="simulated I/O per request in milliseconds")
+parser.add_argument('--rows', type=int, default=20, help="objects per response")
+args = parser.parse_args()
+
+rows = make_rows(args.rows, owners=5)
+
+def parity(request_id):
+    return 'even' if request_id % 2 == 0 else 'odd'
+
+@jsonapi(meta={'service': 'bench'})
+def endpoint(request_id):
+    time.sleep(args.io_ms / 1000.0)
+    return JanusResponse(data=rows, message=RowMessage, meta={parity(request_id): request_id}, include_relationships=(request_id % 2 == 0))
+
+def check(request_id, message):
+    #returns True if the response only contains the state of its own request.
+    if message['meta'] != {'service': 'bench', parity(request_id): request_id}:
+        return False
+
+    return ('included' in message) == (request_id % 2 == 0)
+
+def run(threads):
+    counter = iter(range(args.requests))
+    lock = threading.Lock()
+    errors = [0]
+
+    def worker():
+        while True:
+            with lock:
+                request_id = next(counter, None)
+            if request_id == None:
+                return
+
+            if check(request_id, endpoint(request_id)) == False:
+                with lock:
+                    errors[0] = errors[0] + 1
+
+    workers = [threading.Thread(target=worker) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers: w.start()
+    for w in workers: w.join()
+    return args.requests / (time.perf_counter() - start), errors[0]
+
+print("%-8s %14s %10s %12s" % ("threads", "requests/s", "speedup", "leaked state"))
+base = None
+for threads in args.threads:
+    throughput, errors = run(threads)
+    if base == None: base = throughput
+    print("%-8d %14.1f %9.2fx %12d" % (threads, throughput, throughput / base, errors))
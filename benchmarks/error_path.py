@@ -0,0 +1,51 @@
+"""
+error_path
+
+Measures what a request costs that ends in an error response, compared with a small
+successful response, for a jsonapi decorated function
+    - returning one resource,
+    - raising a BadRequestException (e.g. failed validation),
+    - raising any other exception (rendered as internal server error),
+with tracebacks neither included in errors nor passed to an error_hook.
+
+usage:
+    python benchmarks/error_path.py
+    python benchmarks/error_path.py --number 20000 --render-bytes
+"""
+
+import timeit
+
+from common import argument_parser, make_rows, RowMessage
+from janus.janus import JanusResponse
+from janus.decorators import jsonapi
+from janus.exceptions import BadRequestException
+
+parser = argument_parser("cost of error responses compared with small success responses")
+parser.add_argument('--number', type=int, default=10000, help="requests per measurement")
+parser.add_argument('--repeat', type=int, default=5, help="measurements per mode, the best one is reported")
+parser.add_argument('--render-bytes', action='store_true', help="render json bytes instead of dicts")
+args = parser.parse_args()
+
+row = make_rows(1)[0]
+
+@jsonapi(render_bytes=args.render_bytes)
+def success():
+    return JanusResponse(data=row, message=RowMessage)
+
+@jsonapi(render_bytes=args.render_bytes)
+def bad_request():
+    raise BadRequestException(detail="name is too long.")
+
+@jsonapi(render_bytes=args.render_bytes)
+def internal_error():
+    raise ValueError("something went wrong")
+
+def measure(f):
+    return min(timeit.repeat(f, number=args.number, repeat=args.repeat)) / args.number * 1e6 #us per request
+
+print("%-18s %18s %10s" % ("response", "per request [us]", "ratio"))
+base = measure(success)
+print("%-18s %18.1f %9.2fx" % ("success", base, 1.0))
+for name, f in (("bad request", bad_request), ("internal error", internal_error)):
+    us = measure(f)
+    print("%-18s %18.1f %9.2fx" % (name, us, us / base))
@@ -0,0 +1,56 @@
+"""
+logging_overhead
+
+Measures what the debug logging calls on the mapping hot path cost per resource,
+while debug messages are dropped, by mapping the same list
+    - with all janus_logger methods replaced by a no-op (the floor),
+    - with logging switched off in the decorator (logging=False),
+    - with logging switched on, but the logger's level above DEBUG.
+
+usage:
+    python benchmarks/logging_overhead.py
+    python benchmarks/logging_overhead.py --rows 20000
+"""
+
+import logging
+import timeit
+
+from common import argument_parser, make_rows, RowMessage
+from janus.janus import JanusResponse
+from janus.decorators import jsonapi
+from janus.janus_logging import janus_logger
+
+parser = argument_parser("cost of dropped debug logging per resource")
+parser.add_argument('--rows', type=int, default=5000, help="objects per response")
+parser.add_argument('--repeat', type=int, default=5, help="measurements per mode, the best one is reported")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.WARNING)
+
+rows = make_rows(args.rows) #an owner per row, so every row includes a resource
+
+#included resources are mapped as message objects, which runs map_object and to_dict for every resource.
+@jsonapi(include_relationships=True, logging=False)
+def logging_off():
+    return JanusResponse(data=rows, message=RowMessage)
+
+@jsonapi(include_relationships=True, logging=True)
+def level_warning():
+    return JanusResponse(data=rows, message=RowMessage)
+
+def measure(f):
+    return min(timeit.repeat(f, number=1, repeat=args.repeat)) / (args.rows * 2) * 1e9 #ns per resource
+
+def no_op(*a, **ka):
+    pass
+
+originals = {name: getattr(janus_logger, name) for name in ("debug", "info", "warning", "error", "critical")}
+for name in originals: setattr(janus_logger, name, no_op)
+floor = measure(logging_off)
+for name in originals: setattr(janus_logger, name, originals[name])
+
+print("%-22s %16s %14s" % ("mode", "per resource [ns]", "overhead [ns]"))
+print("%-22s %16.1f %14s" % ("no-op logger", floor, "-"))
+for name, f in (("logging=False", logging_off), ("level above DEBUG", level_warning)):
+    ns = measure(f)
+    print("%-22s %16.1f %14.1f" % (name, ns, ns - floor))
@@ -0,0 +1,116 @@
+"""
+models
+
+Synthetic DataMessage models for the benchmark suite (see suite.py), built from three knobs:
+    width => number of simple attributes of the main message (str, int, float and bool in turn)
+    fanout => number of related objects of the one-to-many relationship "related" of every object
+    depth => number of levels of nested records below the main message (a chain of "child" records,
+             each in a list of one, because older releases fail to parse single nested records)
+
+janus has to be importable before importing this, importing common.py takes care of that.
+"""
+
+from janus.janus import Attribute, DataMessage
+
+class Obj(object):
+    """
+    a plain python object, used as backend object and as nested_type of nested records.
+    """
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+_value_types = [str, int, float, bool]
+
+def _value(value_type, i, j):
+    if value_type == str: return "value %d of %d" % (j, i)
+    if value_type == int: return i * 100 + j
+    if value_type == float: return i + j / 10.0
+    return (i + j) % 2 == 0
+
+def _message_class(name, members):
+    #creates a message class and registers it in this module, so it can be pickled. (some releases map in other processes)
+    msg_class = type(name, (DataMessage,), members)
+    msg_class.__module__ = __name__
+    globals()[name] = msg_class
+    return msg_class
+
+def _attributes(width):
+    #(member name, value type) of the simple attributes of a message of the given width.
+    return [("attr%02d" % j, _value_types[j % len(_value_types)]) for j in range(width)]
+
+class Model(object):
+    """
+    a message class and a factory for matching backend objects.
+    """
+
+    def __init__(self, width, fanout, depth):
+        self.width = width
+        self.fanout = fanout
+        self.depth = depth
+        self.name = "w%d-f%d-d%d" % (width, fanout, depth)
+
+        suffix = "_w%d_f%d_d%d" % (width, fanout, depth)
+
+        self.related_class = _message_class("RelatedMessage" + suffix, {
+            'type_name': "related",
+            'id': Attribute(value_type=str, name='id', mapping='id'),
+            'label': Attribute(value_type=str, name='label', mapping='label'),
+        })
+
+        #nested records, built from the deepest level up.
+        self.nested_classes = []
+        child_class = None
+        for level in range(depth, 0, -1):
+            members = {
+                'type_name': "level%d" % level,
+                'id': Attribute(value_type=str, name='id', mapping='id'),
+            }
+            for member, value_type in _attributes(max(1, width // 2)):
+                members[member] = Attribute(value_type=value_type, name=member, mapping=member)
+            if child_class != None:
+                members['child'] = Attribute(value_type=child_class, name='child', mapping='child', key_mapping='child_ids', nested=True, nested_type=Obj)
+
+            child_class = _message_class("Level%dMessage" % level + suffix, members)
+            self.nested_classes.insert(0, child_class)
+
+        members = {
+            'type_name': "main",
+            'id': Attribute(value_type=str, name='id', mapping='id'),
+            'related': Attribute(value_type=self.related_class, name='related', mapping='related', key_mapping='related_ids'),
+        }
+        for member, value_type in _attributes(width):
+            members[member] = Attribute(value_type=value_type, name=member, mapping=member)
+        if child_class != None:
+            members['child'] = Attribute(value_type=child_class, name='child', mapping='child', key_mapping='child_ids', nested=True, nested_type=Obj)
+
+        self.msg_class = _message_class("MainMessage" + suffix, members)
+
+    def make_object(self, i):
+        """
+        returns the i-th backend object for the message class.
+        """
+        related = [Obj(id="rel%d" % ((i * self.fanout + k) % 1000), label="label %d" % k) for k in range(self.fanout)]
+
+        child = None
+        for level in range(self.depth, 0, -1):
+            values = dict((member, _value(value_type, i, j)) for j, (member, value_type) in enumerate(_attributes(max(1, self.width // 2))))
+            child = [Obj(id="l%d-%d" % (level, i), child=child, child_ids=[c.id for c in child] if child != None else None, **values)]
+
+        values = dict((member, _value(value_type, i, j)) for j, (member, value_type) in enumerate(_attributes(self.width)))
+        return Obj(id="main%d" % i, related=related, related_ids=[r.id for r in related], child=child, child_ids=[c.id for c in child] if child != None else None, **values)
+
+    def make_objects(self, count):
+        return [self.make_object(i) for i in range(count)]
+
+def default_models():
+    """
+    returns the models the suite runs by default, from narrow and flat to wide, fanned out and nested.
+    """
+    return [
+        Model(width=5, fanout=0, depth=0),
+        Model(width=20, fanout=0, depth=0),
+        Model(width=5, fanout=10, depth=0),
+        Model(width=5, fanout=1, depth=2),
+        Model(width=20, fanout=10, depth=3),
+    ]
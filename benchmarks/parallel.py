@@ -0,0 +1,69 @@
+"""
+parallel
+
+Benchmark for rendering a large list of objects (an export) with a jsonapi decorated function
+returning json bytes, in the process of the request and with a ParallelRenderer
+(see janus.parallel) for an increasing number of worker processes. Every parallel response
+is checked to be the same bytes as the one rendered in a single process.
+
+usage:
+    python benchmarks/parallel.py
+    python benchmarks/parallel.py --rows 50000 --workers 1 2 4 8 --chunk-size 2000 --include
+"""
+
+import sys
+import time
+
+from common import argument_parser, make_rows, RowMessage
+from janus.janus import JanusResponse
+from janus.decorators import jsonapi
+from janus.parallel import ParallelRenderer
+
+parser = argument_parser("single process vs. parallel rendering of large lists")
+parser.add_argument('--rows', type=int, default=50000, help="objects per response")
+parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help="worker counts to measure")
+parser.add_argument('--chunk-size', type=int, default=2000, help="objects per chunk")
+parser.add_argument('--include', action='store_true', help="include the related owners (de-duplicated across chunks)")
+parser.add_argument('--repeat', type=int, default=3, help="measurements per mode, the best one is reported")
+args = parser.parse_args()
+
+def measure(endpoint):
+    best = None
+    body = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        body = endpoint()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None else min(best, elapsed)
+    return best, body
+
+def main():
+    rows = make_rows(args.rows, owners=100)
+
+    @jsonapi(render_bytes=True, include_relationships=args.include, meta={'export': True})
+    def single():
+        return JanusResponse(data=rows, message=RowMessage)
+
+    base, expected = measure(single)
+    print("%-12s %10s %8s" % ("mode", "best [s]", "speedup"))
+    print("%-12s %10.3f %7.2fx" % ("single", base, 1.0))
+
+    failures = 0
+    for workers in args.workers:
+        with ParallelRenderer(workers=workers, chunk_size=args.chunk_size) as renderer:
+            @jsonapi(render_bytes=True, include_relationships=args.include, meta={'export': True}, parallel=renderer)
+            def parallel():
+                return JanusResponse(data=rows, message=RowMessage)
+
+            parallel() #start the workers
+            seconds, body = measure(parallel)
+
+        if body != expected:
+            failures = failures + 1
+        print("%-12s %10.3f %7.2fx%s" % ("%d workers" % workers, seconds, base / seconds, "" if body == expected else "  DIFFERENT"))
+
+    if failures > 0:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+streaming
+
+Compares the peak memory (measured with tracemalloc) and time of rendering a large
+collection response to json bytes at once with streaming it in chunks using the
+stream option of the jsonapi decorator.
+
+usage:
+    python benchmarks/streaming.py
+    python benchmarks/streaming.py --rows 100000 --chunk-size 500
+"""
+
+import time
+import tracemalloc
+
+from common import argument_parser, Owner, Row, RowMessage
+from janus.janus import JanusResponse
+from janus.decorators import jsonapi
+
+parser = argument_parser("rendering at once vs. streaming of collection responses")
+parser.add_argument('--rows', type=int, default=50000, help="objects in the response")
+parser.add_argument('--chunk-size', type=int, default=100, help="resources per streamed chunk")
+args = parser.parse_args()
+
+owner = Owner(0)
+
+def rows():
+    return (Row(i, owner) for i in range(args.rows)) #rows are created on demand, like from a database cursor
+
+@jsonapi(render_bytes=True)
+def at_once():
+    return JanusResponse(data=list(rows()), message=RowMessage)
+
+@jsonapi(stream=True, stream_chunk_size=args.chunk_size)
+def streamed():
+    return JanusResponse(data=rows(), message=RowMessage)
+
+def send_at_once():
+    return len(at_once())
+
+def send_streamed():
+    return sum(len(chunk) for chunk in streamed()) #like a server writing every chunk to the socket
+
+print("%-10s %10s %12s %14s" % ("mode", "time [s]", "peak [MiB]", "body [bytes]"))
+for name, f in (("at once", send_at_once), ("streamed", send_streamed)):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = f()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("%-10s %10.3f %12.2f %14d" % (name, elapsed, peak / 1024.0 / 1024.0, size))
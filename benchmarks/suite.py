@@ -0,0 +1,161 @@
+"""
+suite
+
+Benchmark suite for mapping, rendering and parsing messages with the synthetic models
+of models.py. For every model it measures
+    from_object => DataMessage.from_object for a list of objects
+    to_dict => DataMessage.to_dict of all mapped messages
+    get_included => DataMessage.get_included of all mapped messages
+    to_json => JsonApiMessage.to_json of the whole response (data and included)
+    from_message => DataMessage.from_message of every resource as raw json
+    update_object => DataMessage.update_object of every parsed message
+Models with nested records are mapped and rendered with nesting.
+
+Only the API every release since 1.1.0 has is used, so the same scenarios can be
+run against older releases, e.g. from dist/, to compare them (1.0.1 only runs on python 2):
+
+    python benchmarks/suite.py --output current.json
+    python benchmarks/suite.py --janus dist/janus-1.1.6-py3-none-any.whl --output 1.1.6.json
+    python benchmarks/suite.py --compare 1.1.6.json --threshold 1.1
+
+--janus takes a source tree, a wheel or a source distribution (.tar.gz).
+Results are written as json. With --compare every result is compared with the one
+in the given file and the exit code is 1 if any is slower than threshold times or failed.
+Benchmarks failing on a release are recorded with their error.
+"""
+
+import json
+import os
+import platform
+import sys
+import timeit
+
+from common import argument_parser
+from janus.janus import DataMessage, JsonApiMessage
+import janus.janus
+
+from models import default_models
+
+parser = argument_parser("janus benchmark suite")
+parser.add_argument('--rows', type=int, default=200, help="objects per response")
+parser.add_argument('--number', type=int, default=3, help="runs per measurement")
+parser.add_argument('--repeat', type=int, default=5, help="measurements per benchmark, the best one is reported")
+parser.add_argument('--filter', default=None, help="only run benchmarks whose name contains this")
+parser.add_argument('--output', default=None, help="file to write the results to as json (default: stdout)")
+parser.add_argument('--compare', default=None, help="json results of an earlier run to compare with")
+parser.add_argument('--threshold', type=float, default=1.1, help="slowdown factor compared to --compare that fails the run")
+args = parser.parse_args()
+
+def measure(f):
+    best = min(timeit.repeat(f, number=args.number, repeat=args.repeat)) / args.number
+    return best
+
+names = ["from_object", "to_dict", "get_included", "to_json", "from_message", "update_object"]
+
+def benchmarks(model):
+    #returns (name, function) of all benchmarks of a model.
+    do_nesting = model.depth > 0
+    msg_class = model.msg_class
+    objs = model.make_objects(args.rows)
+    targets = model.make_objects(args.rows)
+
+    messages = DataMessage.from_object(objs, msg_class, do_nesting=do_nesting)
+    dicts = [m.to_dict(do_nesting=do_nesting) for m in messages]
+    raw_messages = [json.dumps({'data': d}) for d in dicts]
+    parsed = [DataMessage.from_message(raw, msg_class) for raw in raw_messages]
+
+    def from_object():
+        DataMessage.from_object(objs, msg_class, do_nesting=do_nesting)
+
+    def to_dict():
+        for m in messages: m.to_dict(do_nesting=do_nesting)
+
+    def get_included():
+        for m in messages: m.get_included(do_nesting=do_nesting)
+
+    def to_json():
+        included = []
+        for m in messages: included.extend(m.get_included(do_nesting=do_nesting))
+        JsonApiMessage(data=messages, included=included, do_nesting=do_nesting).to_json()
+
+    def from_message():
+        for raw in raw_messages: DataMessage.from_message(raw, msg_class)
+
+    def update_object():
+        for m, target in zip(parsed, targets): m.update_object(target)
+
+    return [
+        ("from_object", from_object),
+        ("to_dict", to_dict),
+        ("get_included", get_included),
+        ("to_json", to_json),
+        ("from_message", from_message),
+        ("update_object", update_object),
+    ]
+
+results = {}
+for model in default_models():
+    if args.filter != None and all((args.filter in model.name + "/" + name) == False for name in names):
+        continue
+
+    try:
+        model_benchmarks = benchmarks(model)
+    except Exception as e: #some releases fail on some models, record that instead of giving up.
+        model_benchmarks = [(name, e) for name in names]
+
+    for name, f in model_benchmarks:
+        full_name = model.name + "/" + name
+        if args.filter != None and (args.filter in full_name) == False:
+            continue
+
+        try:
+            if isinstance(f, Exception): raise f
+            seconds = measure(f)
+        except Exception as e:
+            results[full_name] = {'error': type(e).__name__ + ": " + str(e)}
+            sys.stderr.write("%-28s %12s\n" % (full_name, "failed: " + results[full_name]['error'][:60]))
+            continue
+
+        results[full_name] = {
+            'seconds': seconds,
+            'us_per_resource': seconds / args.rows * 1e6,
+        }
+        sys.stderr.write("%-28s %12.1f us/resource\n" % (full_name, results[full_name]['us_per_resource']))
+
+report = {
+    'janus': os.path.abspath(args.janus),
+    'janus_module': os.path.abspath(janus.janus.__file__),
+    'python': platform.python_version(),
+    'rows': args.rows,
+    'results': results,
+}
+
+if args.output != None:
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+else:
+    print(json.dumps(report, indent=1))
+
+if args.compare != None:
+    with open(args.compare) as f:
+        baseline = json.load(f)['results']
+
+    failed = False
+    sys.stderr.write("\n%-28s %12s %12s %8s\n" % ("benchmark", "before [us]", "now [us]", "ratio"))
+    for full_name in sorted(results):
+        if (full_name in baseline) == False or ('error' in baseline[full_name]):
+            continue
+
+        if 'error' in results[full_name]: #worked before
+            failed = True
+            sys.stderr.write("%-28s %12.1f %12s %8s SLOWER\n" % (full_name, baseline[full_name]['us_per_resource'], "failed", "-"))
+            continue
+
+        before = baseline[full_name]['us_per_resource']
+        now = results[full_name]['us_per_resource']
+        ratio = now / before
+        slower = ratio > args.threshold
+        failed = failed or slower
+        sys.stderr.write("%-28s %12.1f %12.1f %7.2fx%s\n" % (full_name, before, now, ratio, " SLOWER" if slower else ""))
+
+    sys.exit(1 if failed else 0)
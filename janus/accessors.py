@@ -0,0 +1,152 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+accessors
+
+compiles the mapping paths of Attributes (e.g. "author.get_name") to functions, that walk the path
+in a python object without splitting the path, looping over its elements and calling getattr on every
+mapping. Every element of the path is called if it is callable, because this can only be decided on
+the actual object. The compiled functions are cached by path, so all messages share them.
+See SchemaField in janus.py.
+"""
+
+import keyword
+
+class _Missing(object):
+    def __repr__(self):
+        return "MISSING"
+
+MISSING = _Missing() #returned by strict getters if an element of the path is missing.
+
+_compiled = {} #(kind, path) => compiled function
+
+def _compile(kind, path, lines):
+    #compiles the function "accessor" from lines, with the path elements available as "segments".
+    source = "\n".join(lines)
+    namespace = {'MISSING': MISSING, 'segments': tuple(path.split('.'))}
+    exec(compile(source, "<janus " + kind + " " + path + ">", "exec"), namespace)
+    return namespace['accessor']
+
+def _get(segment, index, v="v", segments="segments"):
+    #expression reading the path element from v. Uses plain attribute access, if the element is a valid name.
+    if segment.isidentifier() and not keyword.iskeyword(segment):
+        return v + "." + segment
+    return "getattr(" + v + ", " + segments + "[" + str(index) + "])"
+
+def _cached(kind, path, build):
+    accessor = _compiled.get((kind, path))
+    if accessor == None:
+        accessor = build(path)
+        _compiled[(kind, path)] = accessor
+    return accessor
+
+def _indent(lines):
+    return ["    " + line for line in lines]
+
+def getter_lines(path, source, target, segments="segments"):
+    """
+    returns the lines of python code assigning the value at path in variable source to variable target,
+    exactly like the function returned by compile_getter does, so the getter can be inlined in generated code.
+    (see janus.codegen) segments => the name of a tuple of the path elements, available to the code.
+    """
+    lines = [target + " = " + source]
+    for index, segment in enumerate(path.split('.')):
+        lines += [
+            "try:",
+            "    " + target + " = " + _get(segment, index, target, segments),
+            "    if callable(" + target + "): " + target + " = " + target + "()",
+            "except AttributeError:",
+            "    " + target + " = None",
+        ]
+    return lines
+
+def strict_getter_lines(path, source, target, segments="segments"):
+    """
+    returns the lines of python code assigning the value at path in variable source to variable target,
+    exactly like the function returned by compile_strict_getter does. (MISSING has to be available to the code)
+    """
+    elements = path.split('.')
+    lines = [target + " = " + source]
+    indent = ""
+    for index, segment in enumerate(elements):
+        lines += [
+            indent + "try:",
+            indent + "    " + target + " = " + _get(segment, index, target, segments),
+            indent + "except AttributeError:",
+            indent + "    " + target + " = MISSING",
+            indent + "else:",
+            indent + "    if callable(" + target + "): " + target + " = " + target + "()",
+        ]
+        indent = indent + "    "
+        if index < len(elements) - 1:
+            lines += [
+                indent + "if " + target + " is None: " + target + " = MISSING",
+                indent + "else:",
+            ]
+            indent = indent + "    "
+    return lines
+
+def _build_getter(path):
+    lines = ["def accessor(obj):"] + _indent(getter_lines(path, "obj", "v")) + ["    return v"]
+    return _compile("getter", path, lines)
+
+def _build_strict_getter(path):
+    lines = ["def accessor(obj):"] + _indent(strict_getter_lines(path, "obj", "v")) + ["    return v"]
+    return _compile("strict getter", path, lines)
+
+def _build_setter(path):
+    segments = path.split('.')
+    lines = ["def accessor(obj, value):", "    v = obj"]
+    for index, segment in enumerate(segments[:-1]):
+        lines += [
+            "    v = " + _get(segment, index),
+            "    if callable(v): v = v()",
+        ]
+    lines.append("    setattr(v, segments[-1], value)")
+    return _compile("setter", path, lines)
+
+def compile_getter(path):
+    """
+    returns a function(obj) returning the value at path in obj, calling every callable element of the path.
+    If an element is missing (AttributeError) the value is None, like in DataMessage.map_object.
+    """
+    return _cached("getter", path, _build_getter)
+
+def compile_strict_getter(path):
+    """
+    returns a function(obj) returning the value at path in obj, calling every callable element of the path.
+    If an element is missing or an element before the last one is None, MISSING is returned.
+    Used for key_mapping and relationship mappings, where missing elements are errors for required Attributes.
+    Use find_missing to get the missing element for error messages.
+    """
+    return _cached("strict getter", path, _build_strict_getter)
+
+def compile_setter(path):
+    """
+    returns a function(obj,value) setting value to the last element of path in obj,
+    walking down the path like the getters do, like in DataMessage.update_object.
+    """
+    return _cached("setter", path, _build_setter)
+
+def find_missing(path, obj):
+    """
+    returns the element of path, that made the strict getter of path return MISSING for obj.
+    This is only used to build error messages, so it does not need to be fast.
+    """
+    value = obj
+    for path_element in path.split('.'):
+        if value == None or hasattr(value, path_element) == False:
+            return path_element
+
+        current_value = getattr(value, path_element)
+        value = current_value() if callable(current_value) else current_value
+
+    return None
@@ -0,0 +1,431 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+cache
+
+contains an in-process cache for rendered responses, that plugs into the cached_get_hook
+and cached_set_hook of the jsonapi decorator:
+
+    cache = ResponseCache(max_entries=1000, max_bytes=64 * 1024 * 1024, ttl=60)
+
+    @jsonapi(cached_get_hook=cache.get_hook, cached_set_hook=cache.set_hook, error_hook=cache.error_hook)
+    def get(...):
+        ...
+
+and an in-process cache for single rendered resources, used for message classes with a version_mapping:
+
+    fragments = FragmentCache(max_entries=100000)
+
+    @jsonapi(fragment_cache=fragments)
+    def get(...):
+        ...
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+
+from janus.janus_logging import janus_logger
+from janus.janus import MessageSchema
+from janus.pagination import Page
+
+def default_key(response_obj, params=None):
+    """
+    returns the cache key of a JanusResponse built from its message class, the ids of its data (and parameters of a page),
+    whether relationships are included, its include paths and sparse fieldsets, its meta, the settings of the decorator
+    rendering it (see JanusResponse.endpoint), so a cache can be shared by decorators with other settings, and the request params (if any).
+    Returns None, so the response is not cached, if the ids can't be read without
+    consuming the data (iterators) or the message class has no id Attribute.
+    """
+    msg_class = response_obj.message
+    schema = msg_class._get_schema()
+    if schema.id_member == None:
+        return None
+
+    get_id = schema.members[schema.id_member].get_value
+
+    data = response_obj.data
+    page = None
+    if isinstance(data, Page): #the page parameters change links and meta, the objects of the page are read only once.
+        page = data.key()
+        data = data.items
+
+    if isinstance(data, Iterator):
+        return None
+    elif isinstance(data, (list, tuple)):
+        ids = tuple(get_id(obj) for obj in data)
+    else:
+        ids = get_id(data)
+
+    meta = None
+    if response_obj.meta != None:
+        meta = repr(sorted(response_obj.meta.items(), key=lambda item: str(item[0])))
+
+    return (msg_class.__module__, msg_class.__qualname__, ids, response_obj.include_relationships, MessageSchema.fieldset_key(response_obj.fields), repr(response_obj.include), page, meta, response_obj.endpoint, params)
+
+def default_size(message):
+    """
+    returns the size of a rendered message in bytes. Messages rendered as dict are measured as compact json.
+    """
+    if isinstance(message, (bytes, bytearray, str)):
+        return len(message)
+
+    return len(json.dumps(message, separators=(',', ':')))
+
+def _requester():
+    #identifies the current request by its thread and, in asyncio applications, its task, because all tasks of an event loop share one thread.
+    try:
+        task = asyncio.current_task()
+    except RuntimeError: #no running event loop
+        task = None
+
+    return (threading.get_ident(), task)
+
+class _Flight(object):
+    #a response currently rendered by one request (the leader), other requests with the same key wait for it.
+    __slots__ = ('leader', 'done')
+
+    def __init__(self):
+        self.leader = _requester()
+        self.done = threading.Event()
+
+class ResponseCache(object):
+    """
+    Thread-safe, in-process cache of rendered responses.
+
+    Entries are evicted least recently used first as soon as there are more than max_entries of them,
+    or together they are bigger than max_bytes, and expire ttl seconds after they were set.
+    (None for any of these disables the bound)
+
+    Concurrent requests for the same key that miss the cache are coalesced: the first one renders
+    the response, the others wait up to wait_timeout seconds in get_hook and then get its result.
+    If the first one never passes its response to set_hook (e.g. rendering fails), the decorator
+    calls release_hook when it is done, so waiting requests don't have to wait for the timeout.
+    (Without a jsonapi decorator call release.) Waiting in get_hook blocks the thread, so in asyncio applications,
+    where all requests share one thread, use async_get_hook as cached_get_hook of the async_jsonapi decorator,
+    which waits without blocking the event loop. (get_hook never waits for a request of another task of its own thread)
+
+    key_builder => a function(response_obj) returning a hashable key, or None to not cache the response.
+                   Defaults to default_key, including the result of params_hook.
+    params_hook => a function returning the request params that change the response
+                   (e.g. the query string of the web framework's request), as hashable value.
+    sizeof => a function(message) returning the size of a rendered message in bytes. Defaults to default_size.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None, key_builder=None, params_hook=None, sizeof=default_size, wait_timeout=10.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.key_builder = key_builder
+        self.params_hook = params_hook
+        self.sizeof = sizeof
+        self.wait_timeout = wait_timeout
+
+        self.hits = 0 #requests answered from the cache
+        self.misses = 0 #requests that had to render their response
+        self.evictions = 0 #entries removed to stay within max_entries and max_bytes
+        self.expirations = 0 #entries removed because their ttl passed
+        self.coalesced = 0 #requests that waited for another request to render the same response
+        self.bytes = 0 #size of all entries
+
+        self.__entries = OrderedDict() #key => (message, size, expiry time or None), least recently used first
+        self.__flights = {} #key => _Flight
+        self.__lock = threading.Lock()
+
+    def key(self, response_obj):
+        """
+        returns the cache key of a JanusResponse (None if it should not be cached).
+        """
+        if self.key_builder != None:
+            return self.key_builder(response_obj)
+
+        params = self.params_hook() if self.params_hook != None else None
+        return default_key(response_obj, params)
+
+    def get_hook(self, response_obj):
+        """
+        use as cached_get_hook of the jsonapi decorator.
+        returns the cached message of the response or None if it has to be rendered.
+        """
+        key = self.key(response_obj)
+        if key == None:
+            return None
+
+        while True:
+            message, flight = self.__claim(key, True)
+            if flight == None:
+                return message
+
+            janus_logger.debug("Waiting for concurrent request to render the same response.")
+            message = self.__waited(key, flight, flight.done.wait(self.wait_timeout))
+            if message != None:
+                return message
+
+            #the leader failed or took too long, try again (and probably become the leader)
+
+    async def async_get_hook(self, response_obj):
+        """
+        use as cached_get_hook of the async_jsonapi decorator.
+        like get_hook, but waits for concurrent requests (tasks) rendering the same response without blocking the event loop.
+        """
+        key = self.key(response_obj)
+        if key == None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        while True:
+            message, flight = self.__claim(key, False)
+            if flight == None:
+                return message
+
+            janus_logger.debug("Waiting for concurrent request to render the same response.")
+            message = self.__waited(key, flight, await loop.run_in_executor(None, flight.done.wait, self.wait_timeout))
+            if message != None:
+                return message
+
+    def set_hook(self, response_obj, message):
+        """
+        use as cached_set_hook of the jsonapi decorator.
+        caches the rendered message of the response.
+        """
+        key = self.key(response_obj)
+        if key == None:
+            return
+
+        self.set(key, message)
+
+    def release_hook(self, response_obj):
+        """
+        use as cached_release_hook of the jsonapi decorator. (it is used automatically, if get_hook is the cached_get_hook)
+        releases the requests waiting for a response, that get_hook missed for the current request, if it is never
+        passed to set_hook (e.g. because rendering failed), so they don't wait for the wait_timeout.
+        """
+        key = self.key(response_obj)
+        if key == None:
+            return
+
+        with self.__lock:
+            flight = self.__flights.get(key)
+            if flight != None and flight.leader == _requester():
+                del self.__flights[key]
+                flight.done.set()
+
+    def error_hook(self, status, error_message, traceback):
+        """
+        use as error_hook of the jsonapi decorator, or call it from your own one.
+        releases all requests waiting for a response, that the current request failed to render.
+        """
+        requester = _requester()
+        with self.__lock:
+            for key, flight in list(self.__flights.items()):
+                if flight.leader == requester:
+                    del self.__flights[key]
+                    flight.done.set()
+
+    def set(self, key, message):
+        """
+        caches a message with the given key and wakes up all requests waiting for it.
+        """
+        size = self.sizeof(message)
+        expires = time.monotonic() + self.ttl if self.ttl != None else None
+
+        with self.__lock:
+            if (self.max_bytes == None or size <= self.max_bytes) and message != None: #never cache what can't fit
+                self.__remove(key)
+                self.__entries[key] = (message, size, expires)
+                self.bytes = self.bytes + size
+                self.__evict()
+
+            flight = self.__flights.pop(key, None)
+            if flight != None:
+                flight.done.set()
+
+    def get(self, key):
+        """
+        returns the message cached with the given key or None.
+        """
+        with self.__lock:
+            return self.__get(key)
+
+    def release(self, key):
+        """
+        wakes up all requests waiting for the response with the given key, without caching anything.
+        """
+        with self.__lock:
+            flight = self.__flights.pop(key, None)
+            if flight != None:
+                flight.done.set()
+
+    def invalidate(self, key=None):
+        """
+        removes the entry with the given key, or all entries if key is None.
+        """
+        with self.__lock:
+            if key == None:
+                self.__entries.clear()
+                self.bytes = 0
+            else:
+                self.__remove(key)
+
+    def stats(self):
+        """
+        returns the counters of this cache as dict.
+        """
+        with self.__lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'coalesced': self.coalesced,
+                'entries': len(self.__entries),
+                'bytes': self.bytes,
+            }
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __claim(self, key, blocking):
+        #returns (cached message, None) on a hit, (None, None) if the current request has to render the response
+        #or (None, flight) if it should wait for the flight of another request rendering it.
+        #blocking => True if waiting blocks the thread, so flights of other tasks of this thread are not waited for.
+        requester = _requester()
+        with self.__lock:
+            message = self.__get(key)
+            if message != None:
+                self.hits = self.hits + 1
+                return message, None
+
+            flight = self.__flights.get(key)
+            if flight == None or flight.leader == requester: #nobody renders this yet, or a former request of this task failed to.
+                self.__flights[key] = _Flight()
+                self.misses = self.misses + 1
+                return None, None
+
+            if blocking and flight.leader[0] == requester[0]: #another task of this thread, which can't run while this one waits.
+                self.misses = self.misses + 1
+                return None, None
+
+            self.coalesced = self.coalesced + 1
+            return None, flight
+
+    def __waited(self, key, flight, done):
+        #returns the message rendered by the leader of flight after waiting for it, None if there is none.
+        with self.__lock:
+            if done == False and self.__flights.get(key) is flight: #the leader takes too long, render it ourselves.
+                del self.__flights[key]
+                flight.done.set()
+                return None
+
+            message = self.__get(key)
+            if message != None:
+                self.hits = self.hits + 1
+
+            return message
+
+    def __get(self, key):
+        #returns the message of an entry and marks it as recently used. (Lock has to be held)
+        entry = self.__entries.get(key)
+        if entry == None:
+            return None
+
+        if entry[2] != None and entry[2] <= time.monotonic():
+            self.__remove(key)
+            self.expirations = self.expirations + 1
+            return None
+
+        self.__entries.move_to_end(key)
+        return entry[0]
+
+    def __remove(self, key):
+        #removes an entry if it exists. (Lock has to be held)
+        entry = self.__entries.pop(key, None)
+        if entry != None:
+            self.bytes = self.bytes - entry[1]
+
+    def __evict(self):
+        #removes least recently used entries until all bounds are met. (Lock has to be held)
+        while len(self.__entries) > 0 and ((self.max_entries != None and len(self.__entries) > self.max_entries) or (self.max_bytes != None and self.bytes > self.max_bytes)):
+            key, entry = self.__entries.popitem(last=False)
+            self.bytes = self.bytes - entry[1]
+            self.evictions = self.evictions + 1
+
+class FragmentCache(object):
+    """
+    Thread-safe, in-process cache of rendered resources (the dict representations of messages),
+    keyed by type, id and version of the python object they were mapped from (see MessageSchema.fragment_key).
+    Responses are assembled from cached resources, so only objects that changed since are mapped again.
+    At most max_entries resources are kept, the least recently used ones are evicted first.
+    Cached resources are shared by all responses, so they must not be changed (e.g. in a before_send_hook).
+
+    To use another backend (e.g. memcached) derive from this and override get and set.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__entries = OrderedDict() #key => resource, least recently used first
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """
+        returns the resource cached with the given key or None.
+        """
+        with self.__lock:
+            resource = self.__entries.get(key)
+            if resource == None:
+                self.misses = self.misses + 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.hits = self.hits + 1
+            return resource
+
+    def set(self, key, resource):
+        """
+        caches a resource with the given key.
+        """
+        with self.__lock:
+            self.__entries[key] = resource
+            self.__entries.move_to_end(key)
+
+            while self.max_entries != None and len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions = self.evictions + 1
+
+    def invalidate(self):
+        """
+        removes all resources.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self):
+        """
+        returns the counters of this cache as dict.
+        """
+        with self.__lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.__entries),
+            }
+
+    def __len__(self):
+        return len(self.__entries)
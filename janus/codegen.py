@@ -0,0 +1,245 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+codegen
+
+generates map_object and to_dict functions specialized for a single DataMessage sub class, as straight-line
+python code without loops over the Attributes of the class: the mapping paths are inlined (see janus.accessors),
+required and type checks are written out per Attribute and the resource is built member by member.
+The generated functions behave exactly like DataMessage.map_object and DataMessage.to_dict (same results,
+same errors and log messages), they only skip looking at the configuration of the Attributes on every call.
+This is opt-in, see DataMessage.compile. The configuration of the Attributes is read once, when the
+MessageSchema of the class is built, so Attribute objects must not be changed afterwards.
+"""
+
+from janus.janus_logging import janus_logger
+from janus.accessors import getter_lines, strict_getter_lines, find_missing, MISSING
+from janus.validators import compile_type_check, _accepted
+from janus.exceptions import InternalServerErrorException
+
+def _indent(lines, depth=1):
+    return ["    " * depth + line for line in lines]
+
+def _compile(name, schema, lines, namespace):
+    #compiles the function name from lines with the objects in namespace available to it.
+    source = "\n".join(lines)
+    msg_class = schema.msg_class
+    exec(compile(source, "<janus " + name + " " + msg_class.__module__ + "." + msg_class.__qualname__ + ">", "exec"), namespace)
+    return namespace[name]
+
+def _raise(namespace, name, message, exception="Exception"):
+    #lines logging and raising a constant error message.
+    namespace[name] = message
+    return ["janus_logger.error(" + name + ")", "raise " + exception + "(" + name + ")"]
+
+def compile_map_object(schema):
+    """
+    returns a function(msg, obj, include_relationships, do_nesting, fields) doing what DataMessage.map_object
+    does for messages of the sub class of schema (which may be restricted to a sparse fieldset).
+    """
+    class_name = str(schema.msg_class.__name__)
+    namespace = {
+        'janus_logger': janus_logger,
+        'find_missing': find_missing,
+        'MISSING': MISSING,
+        'InternalServerErrorException': InternalServerErrorException,
+        'TYPE_NAME': schema.type_name,
+    }
+
+    lines = [
+        "def map_object(msg, obj, include_relationships, do_nesting, fields):",
+        "    janus_logger.debug(\"Starting to map object to message.\")",
+        "    values = msg._values",
+        "    msg._DataMessage__data_object = obj",
+        "    msg._DataMessage__fields = fields",
+    ]
+
+    for i, field in enumerate(schema.attributes):
+        attribute = field.attribute
+        if field.path == None or attribute.write_only == True:
+            continue
+
+        n = str(i)
+        namespace['A' + n] = attribute
+        namespace['S' + n] = tuple(field.path)
+        lines += _indent(getter_lines(attribute.mapping, "obj", "v", "S" + n))
+
+        lines.append("    if v == None:")
+        if attribute.required:
+            lines += _indent(_raise(namespace, 'R' + n, 'Missing required field ' + str(attribute.name) + "."), 2)
+        else:
+            lines.append("        pass")
+
+        #the type check, with the error message of map_object split around the type of the value.
+        expected = str(attribute.value_type) + (" of " + str(attribute.item_type) if attribute.item_type != None else "")
+        namespace['E' + n] = 'Expected ' + expected + " got "
+        namespace['F' + n] = " for " + str(attribute.name) + " of " + class_name + "."
+        if attribute.item_type == None:
+            namespace['T' + n] = _accepted(attribute.value_type)
+            lines.append("    elif isinstance(v, T" + n + ") == False:")
+        else:
+            namespace['C' + n] = compile_type_check(attribute.value_type, attribute.item_type)
+            lines.append("    elif C" + n + "(v) == False:")
+        lines += [
+            "        janus_logger.error(E" + n + " + str(type(v)) + F" + n + ")",
+            "        raise Exception(E" + n + " + str(type(v)) + F" + n + ")",
+        ]
+
+        if attribute.name == 'id':
+            lines += ["    else:", "        msg.id = v"]
+        else:
+            lines += ["    else:", "        values[A" + n + "] = v"]
+
+    nested = [(i, field) for i, field in enumerate(schema.nested) if field.path != None and field.attribute.write_only == False]
+    if len(nested) > 0:
+        lines.append("    if do_nesting:")
+        for i, field in nested:
+            attribute = field.attribute
+            n = "N" + str(i)
+            namespace['A' + n] = attribute
+            namespace['S' + n] = tuple(field.path)
+            lines += _indent(getter_lines(attribute.mapping, "obj", "v", "S" + n), 2)
+            if attribute.required:
+                lines.append("        if v == None:")
+                lines += _indent(_raise(namespace, 'R' + n, 'Missing required field ' + str(attribute.name) + "."), 3)
+            lines.append("        values[A" + n + "] = v")
+
+    related = [(i, field) for i, field in enumerate(schema.related) if field.key_path != None and field.attribute.write_only == False]
+    if len(related) > 0:
+        lines += ["    if include_relationships:", "        key_values = msg._key_values"]
+        for i, field in related:
+            attribute = field.attribute
+            n = "K" + str(i)
+            namespace['A' + n] = attribute
+            namespace['S' + n] = tuple(field.key_path)
+            namespace['M' + n] = attribute.value_type
+            depth = 2
+            if attribute.nested == True: #nested records are treated like relations if they should not be nested.
+                lines.append("        if (do_nesting == True) == False:")
+                depth = 3
+
+            block = strict_getter_lines(attribute.key_mapping, "obj", "k", "S" + n)
+            block.append("if k is MISSING:")
+            if attribute.required:
+                namespace['P' + n] = attribute.key_mapping
+                namespace['E' + n] = "Keypath: " + str(field.key_path) + " returned None for path element "
+                namespace['F' + n] = " on message type " + class_name
+                block += [
+                    "    p = find_missing(P" + n + ", obj)",
+                    "    janus_logger.error(E" + n + " + p + F" + n + ")",
+                    "    raise InternalServerErrorException(E" + n + " + p + F" + n + ")",
+                ]
+            else:
+                block.append("    k = None")
+
+            if attribute.loader != None: #remember the key to load included entities
+                block.append("msg._keys[A" + n + "] = k")
+
+            block += [
+                "if k != None:",
+                "    t = M" + n + "._get_schema().type_name",
+                "    if isinstance(k, list):",
+                "        key_values[A" + n + "] = {'data': [{'type': t, 'id': str(x)} for x in k]}",
+                "    else:",
+                "        key_values[A" + n + "] = {'data': {'type': t, 'id': str(k)}}",
+            ]
+            lines += _indent(block, depth)
+
+    lines += [
+        "    janus_logger.debug(\"Finished mapping object to message. ID: %s TYPE NAME: %s\", msg.id, TYPE_NAME)",
+        "    return msg",
+    ]
+
+    return _compile("map_object", schema, lines, namespace)
+
+def compile_to_dict(schema):
+    """
+    returns a function(msg, do_nesting, context) doing what DataMessage.to_dict does for messages of the sub class of schema.
+    """
+    from janus.janus import DataMessage, MappingContext #janus.janus imports this module
+
+    namespace = {
+        'janus_logger': janus_logger,
+        'DataMessage': DataMessage,
+        'MappingContext': MappingContext,
+        'TYPE_NAME': schema.type_name,
+    }
+
+    lines = [
+        "def to_dict(msg, do_nesting, context):",
+        "    values = msg._values",
+        "    key_values = msg._key_values",
+        "    d = {'id': str(msg.id), 'type': TYPE_NAME}",
+    ]
+
+    #members with the name id are never rendered as attributes or relationships.
+    attributes = [(i, field.attribute) for i, field in enumerate(schema.attributes) if field.attribute.name != 'id']
+    if len(attributes) > 0:
+        lines.append("    attributes = {}")
+        for i, attribute in attributes:
+            n = str(i)
+            namespace['A' + n] = attribute
+            namespace['N' + n] = attribute.name
+            lines += [
+                "    v = values.get(A" + n + ")",
+                "    if v != None: attributes[N" + n + "] = v",
+            ]
+        lines.append("    if len(attributes) > 0: d['attributes'] = attributes")
+
+    relations = [(i, field.attribute) for i, field in enumerate(schema.relations) if field.attribute.name != 'id']
+    if len(relations) > 0:
+        lines.append("    relations = {}")
+        for i, attribute in relations:
+            n = "R" + str(i)
+            namespace['A' + n] = attribute
+            namespace['N' + n] = attribute.name
+            lines += [
+                "    v = key_values.get(A" + n + ")",
+                "    if v != None: relations[N" + n + "] = v",
+            ]
+        lines.append("    if len(relations) > 0: d['relationships'] = relations")
+
+    if len(schema.nested) > 0:
+        lines += [
+            "    nested = {}",
+            "    if do_nesting and context == None:",
+            "        context = MappingContext(fields=msg._DataMessage__fields)",
+        ]
+
+        nested = [(i, field.attribute) for i, field in enumerate(schema.nested) if field.attribute.name != 'id']
+        for i, attribute in nested:
+            n = "N" + str(i)
+            namespace['A' + n] = attribute
+            namespace['N' + n] = attribute.name
+            namespace['M' + n] = attribute.value_type
+            lines += [
+                "    if do_nesting:",
+                "        v = values.get(A" + n + ")",
+                "        if v != None: nested[N" + n + "] = {'data': msg.nested_to_dict(DataMessage.from_object(v, M" + n + ", include_relationships=True, do_nesting=True, context=context), context)}",
+                "    else:",
+                "        v = key_values.get(A" + n + ")",
+                "        if v != None: nested[N" + n + "] = v",
+            ]
+
+        lines += [
+            "    if len(nested) > 0:",
+            "        if 'relationships' in d:",
+            "            d['relationships'].update(nested)",
+            "        else:",
+            "            d['relationships'] = nested",
+        ]
+
+    lines += [
+        "    janus_logger.debug(\"Transformed message object to dict.\")",
+        "    return d",
+    ]
+
+    return _compile("to_dict", schema, lines, namespace)
@@ -15,13 +15,98 @@ contains all decorators of janus. See more in janus.py
 spec: http://jsonapi.org/
 
 """
+import asyncio
+import inspect
+import json
 import traceback
+from collections.abc import Iterator
 
 from janus.janus_logging import janus_logger
 from janus.janus import DataMessage
 from janus.janus import JsonApiMessage
 from janus.janus import ErrorMessage
 from janus.janus import JanusResponse
+from janus.janus import MappingContext
+from janus.janus import MessageSchema
+from janus.encoders import get_encoder
+from janus.pagination import Page
+
+class _Traceback(object):
+    #the traceback of an exception, formatted only when it is converted to str, e.g. when it is actually logged.
+    __slots__ = ('exception','text')
+
+    def __init__(self, exception):
+        self.exception = exception
+        self.text = None
+
+    def __str__(self):
+        if self.text == None:
+            e = self.exception
+            self.text = "".join(traceback.format_exception(type(e),e,e.__traceback__))
+
+        return self.text
+
+def _error_message(e, include_traceback=False):
+    #returns the ErrorMessage of an exception and its _Traceback.
+    err_msg = ErrorMessage.from_exception(e)
+    tb = _Traceback(e)
+
+    if include_traceback:
+        if err_msg.meta == None: err_msg.meta = {}
+        err_msg.traceback = str(tb)
+
+    return err_msg, tb
+
+def _chunks(objs, chunk_size):
+    #generator of lists of chunk_size objects of objs (the last one may be shorter), also for iterators.
+    chunk = []
+    for obj in objs:
+        chunk.append(obj)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if len(chunk) > 0:
+        yield chunk
+
+def map_chunk(objs, msg_class, included, do_nesting=False, fragment_cache=None, fields=None, include=None):
+    """
+    returns the resource dicts of a chunk of objects, as a jsonapi decorator maps them when streaming.
+    Included resources are added to included (a dict of (type,id) => resource), if it is not None.
+    include => include paths as returned by DataMessage.parse_include, None to include all relationships.
+    """
+    if included == None and do_nesting == False:
+        return DataMessage.from_objects(objs,msg_class,fragment_cache=fragment_cache,fields=fields)
+
+    context = MappingContext(fragment_cache,fields) #one context per chunk, so memory is bounded by the chunk size
+    data = DataMessage.from_object(objs,msg_class,do_nesting=do_nesting,context=context)
+
+    if included != None and include != None:
+        DataMessage.include_paths(data,include,included,do_nesting=do_nesting,context=context)
+    elif included != None:
+        DataMessage.load_related(data,context,do_nesting=do_nesting) #one call of each relationship loader per chunk
+        for d in data:
+            d.collect_included(included,do_nesting=do_nesting,context=context)
+
+    return [context.to_dict(d,do_nesting=do_nesting) for d in data]
+
+def _run(steps):
+    #runs a generator of jsonapi._map_response to its end and returns its result.
+    while True:
+        try:
+            next(steps)
+        except StopIteration as e:
+            return e.value
+
+async def _run_async(steps):
+    #runs a generator of jsonapi._map_response, giving control back to the event loop after every step, and returns its result.
+    while True:
+        try:
+            next(steps)
+        except StopIteration as e:
+            return e.value
+
+        await asyncio.sleep(0)
 
 class jsonapi(object):
 
@@ -35,14 +120,22 @@ class jsonapi(object):
                     error_hook=None,
                     cached_get_hook=None,
                     cached_set_hook=None,
+                    cached_release_hook=None,
                     include_relationships=False,
                     options_hook=None,
                     nest_in_responses=False,
-                    logging=False):
+                    logging=False,
+                    render_bytes=False,
+                    encoder=None,
+                    stream=False,
+                    stream_chunk_size=100,
+                    fragment_cache=None,
+                    fields=None,
+                    include=None,
+                    parallel=None):
         self.meta = meta
-        self.links = links
+        self.links = links #links added to every successful response. The links of a Page (see janus.pagination) are added to them.
         self.included = included
-        self.message = None #gets set with the JanusResponse passed from calling function
         self.success_status = success_status
         self.before_send_hook = before_send_hook
         self.include_traceback_in_errors = include_traceback_in_errors
@@ -51,15 +144,32 @@ class jsonapi(object):
         self.options_hook = options_hook
         self.cached_get_hook = cached_get_hook
         self.cached_set_hook = cached_set_hook
+        if cached_release_hook == None: #hooks of a janus.cache.ResponseCache are released by it
+            cached_release_hook = getattr(getattr(cached_get_hook,'__self__',None),'release_hook',None)
+        self.cached_release_hook = cached_release_hook #called with the response object if cached_get_hook missed, but the response was not passed to cached_set_hook (e.g. rendering failed), so requests waiting for it are released.
         self.nest_in_responses = nest_in_responses
-
-        if logging:
-            janus_logger.enable()
-        else:
-            janus_logger.disable()
+        self.render_bytes = render_bytes #if True, return UTF-8 encoded json bytes instead of a dict.
+        self.encoder = get_encoder(encoder) #the encoder used to render bytes. (see janus.encoders)
+        self.stream = stream #if True, return a generator of json byte chunks for chunked transfer. Lists and iterators are mapped on demand. Streamed responses are never cached, so the cache hooks are not called.
+        self.stream_chunk_size = stream_chunk_size #number of resources mapped and encoded at a time when streaming.
+        self.fragment_cache = fragment_cache #cache of rendered resources for message classes with a version_mapping. (see janus.cache.FragmentCache)
+        self.fields = fields #default sparse fieldsets as dict of type name => attribute names, overruled by the fields of a JanusResponse. (see janus.MessageSchema.restrict)
+        self.include = DataMessage.parse_include(include) if include != None else None #default include paths, overruling include_relationships. (see janus.DataMessage.parse_include)
+        self.parallel = parallel #a janus.parallel.ParallelRenderer mapping and encoding large lists of objects in worker processes. Only used with render_bytes=True and stream=False.
+        #the settings of this decorator that change rendered responses, as hashable value. Set as endpoint of every response, so
+        #responses of decorators with other settings get other cache keys. (see janus.cache.default_key)
+        self.endpoint = (self.include_relationships, repr(self.include), MessageSchema.fieldset_key(self.fields), self.nest_in_responses,
+                            self.render_bytes, getattr(self.encoder, 'name', type(self.encoder).__name__), repr(self.meta), repr(self.links))
+        self.logger = janus_logger.get_logger(logging) #the logger used while this decorator handles a request. logging => True for the "janus" logger, False for no logging, or a logger name or logging.Logger.
+
+        #the decorator is shared by all requests of the decorated function, which might be handled by concurrent threads,
+        #so nothing in here must be changed while handling a request. Everything request specific is kept in local variables.
 
     def __call__(self, f):
         def wrapped_f(*a, **ka):
+            logging_token = janus_logger.enable_for_request(self.logger)
+            meta = self.meta
+            pending = None #the response cached_get_hook missed, until it is passed to cached_set_hook
             try:
                 #first check if this is not a HTTP OPTIONS call using a method defined based on the  WS framework.
                 #if it is one return empty array and do nothing else.
@@ -92,81 +202,206 @@ class jsonapi(object):
                     #caching
                     loaded_from_cache = False
 
-                    if self.cached_get_hook != None:
+                    response_obj.endpoint = self.endpoint
+                    if self.cached_get_hook != None and self.stream == False:
                         cached_object = self.cached_get_hook(response_obj)
                         if cached_object != None:
                             loaded_from_cache = True
                             message = cached_object #returned cached, already mapped, response
 
-                            janus_logger.info("Will return cached message: " + str(loaded_from_cache))
+                            janus_logger.info("Will return cached message: %s", loaded_from_cache)
+                        else:
+                            pending = response_obj
 
                     if loaded_from_cache == False: #nothing in cache or cache deactivated
-                        self.message = response_obj.message #get the message type to return
-                        obj = response_obj.data #get the data to return
-
-                        data = DataMessage.from_object(obj,self.message,do_nesting=self.nest_in_responses) #generate data message with data
-
-                        #take care of includes
-                        if response_obj.include_relationships != None: self.include_relationships = response_obj.include_relationships
-                        included = None
-
-                        janus_logger.info("Should map included: " + str(self.include_relationships))
-                        if self.include_relationships:
-                            included = self.__load_included(data,self.nest_in_responses)
-
-                        #is there custome meta?
-                        if response_obj.meta != None:
-                            if self.meta == None:
-                                self.meta = response_obj.meta
-                            else:
-                                self.meta.update(response_obj.meta)
+                        msg_class, obj, fields, links, meta, include_relationships, include = self._prepare(response_obj,meta)
 
-                        message = JsonApiMessage(data=data,included=included,meta=self.meta,do_nesting=self.nest_in_responses).to_json() #render json response
+                        if self._use_parallel(obj):
+                            #map and encode chunks of the objects in worker processes.
+                            data, included = self.parallel.map(obj,msg_class,include_relationships,include,self.nest_in_responses,fields,self.encoder)
+                            message = self.parallel.render(data,included,meta,links,self.encoder) #data is already encoded
+                        else:
+                            data, included, context = _run(self._map_response(obj,msg_class,fields,include_relationships,include))
+                            message = self.__render(JsonApiMessage(data=data,included=included,meta=meta,do_nesting=self.nest_in_responses,context=context,links=links)) #render json response
 
                         #caching
-                        if self.cached_set_hook != None and loaded_from_cache == False:
+                        if self.cached_set_hook != None and loaded_from_cache == False and self.stream == False:
                             janus_logger.debug("Caching message")
                             self.cached_set_hook(response_obj,message)
+                            pending = None
 
                     if self.before_send_hook != None: #fire before send hook
                         self.before_send_hook(self.success_status,message,response_obj)
 
                     return message
             except Exception as e:
-                err_msg = ErrorMessage.from_exception(e)
-                tb = traceback.format_exc()
-
-                if self.include_traceback_in_errors:
-                    if err_msg.meta == None: err_msg.meta = {}
-                    err_msg.traceback = tb
+                err_msg, tb = _error_message(e,self.include_traceback_in_errors) #the traceback is only formatted if it is used
 
                 if self.error_hook != None:
-                    self.error_hook(int(err_msg.status),err_msg,tb)
+                    self.error_hook(int(err_msg.status),err_msg,str(tb))
 
-                message = JsonApiMessage(errors=err_msg,meta=self.meta).to_json()
+                message = self.__render(JsonApiMessage(errors=err_msg,meta=meta))
 
-                janus_logger.error("Traceback: " + tb)
+                janus_logger.error("Traceback: %s", tb)
 
                 return message
+            finally:
+                if pending != None and self.cached_release_hook != None:
+                    self.cached_release_hook(pending)
 
+                janus_logger.reset_request(logging_token)
 
         return wrapped_f
 
-    def __load_included(self, data_message,do_nesting=False):
-        included = []
-        if isinstance(data_message,list):
-            for d in data_message:
-                included = included + d.get_included(do_nesting=do_nesting)
+    def __render(self, json_api_message):
+        #render the message either to a dict the web framework serializes or directly to json bytes.
+        if self.stream:
+            return self.__stream(json_api_message)
+        elif self.render_bytes:
+            return json_api_message.to_json_bytes(self.encoder)
+        else:
+            return json_api_message.to_json()
+
+    def __stream(self, json_api_message):
+        #generator of the json byte chunks of a message, mapped and encoded while they are sent.
+        try:
+            yield from json_api_message.iter_json_bytes(self.encoder,self.stream_chunk_size)
+        except Exception as e:
+            #the response is already being sent, so there is no way to send an error message anymore.
+            err_msg, tb = _error_message(e)
+
+            if self.error_hook != None:
+                self.error_hook(int(err_msg.status),err_msg,str(tb))
+
+            janus_logger.error("Streaming response failed. Traceback: %s", tb)
+
+            raise
+
+    def _prepare(self, response_obj, meta):
+        #returns the message class, objects, sparse fieldsets, links, meta, include_relationships and include paths of a response.
+        msg_class = response_obj.message #get the message type to return
+        fields = response_obj.fields if response_obj.fields != None else self.fields #sparse fieldsets
+
+        obj, links, meta = self._paginate(response_obj.data,meta)
+        if isinstance(obj,Iterator) and self.stream == False:
+            obj = list(obj) #only mapped on demand when streaming
+
+        #take care of includes
+        include_relationships, include = self._get_include(response_obj,msg_class)
+        janus_logger.info("Should map included: %s", include_relationships)
+
+        #is there custome meta?
+        if response_obj.meta != None:
+            meta = dict(response_obj.meta if meta == None else meta) #never change the meta of the decorator, it is shared by all requests
+            meta.update(response_obj.meta)
+
+        return msg_class, obj, fields, links, meta, include_relationships, include
+
+    def _map_response(self, obj, msg_class, fields, include_relationships, include, chunk_size=None):
+        #generator mapping the objects of a response, that returns its data, included resources and MappingContext.
+        #Lists are mapped chunk_size objects at a time (all at once if it is None) and None is yielded after every chunk,
+        #so async_jsonapi can give control back to the event loop in between. The jsonapi decorator runs it at once. (see _run)
+        if self.stream and isinstance(obj,(list,tuple,Iterator)):
+            #map the objects chunk by chunk while the response is sent.
+            included = {} if include_relationships else None
+            return self._map_chunks(obj,msg_class,included,self.stream_chunk_size,fields,include), included, None
+
+        chunks = _chunks(obj,chunk_size) if chunk_size != None else [obj]
+
+        if isinstance(obj,(list,tuple)) and include_relationships == False and self.nest_in_responses == False:
+            #nothing to include or nest, so lists are mapped in bulk, without message objects.
+            data = []
+            for chunk in chunks:
+                data.extend(DataMessage.from_objects(chunk,msg_class,fragment_cache=self.fragment_cache,fields=fields))
+                yield
+
+            return data, None, None
+
+        context = MappingContext(self.fragment_cache,fields) #identity map of this response, so related objects are only mapped once
+        if isinstance(obj,(list,tuple)):
+            data = []
+            for chunk in chunks:
+                data.extend(DataMessage.from_object(chunk,msg_class,do_nesting=self.nest_in_responses,context=context))
+                yield
         else:
-             included = data_message.get_included(do_nesting=do_nesting)
+            data = DataMessage.from_object(obj,msg_class,do_nesting=self.nest_in_responses,context=context) #generate data message with data
+
+        included = None
+        if include_relationships and include == None and isinstance(data,list) and chunk_size != None:
+            #like _load_included, collecting the included resources of chunk_size messages at a time.
+            DataMessage.load_related(data,context,do_nesting=self.nest_in_responses) #one call of each relationship loader for all messages
+            collected = {}
+            for chunk in _chunks(data,chunk_size):
+                for d in chunk:
+                    d.collect_included(collected,do_nesting=self.nest_in_responses,context=context)
+                yield
+
+            included = list(collected.values())
+        elif include_relationships:
+            included = self._load_included(data,self.nest_in_responses,context,include) #all loaders are called once for the whole response
+
+        if chunk_size != None and isinstance(data,list):
+            #transform the messages to dicts chunk by chunk too, the context keeps them for rendering.
+            for chunk in _chunks(data,chunk_size):
+                for msg in chunk:
+                    context.to_dict(msg,do_nesting=self.nest_in_responses)
+                yield
+
+        return data, included, context
+
+    def _map_chunks(self, objs, msg_class, included, chunk_size, fields=None, include=None):
+        #generator of the resource dicts of objs, mapped chunk_size objects at a time.
+        for chunk in _chunks(objs,chunk_size):
+            yield from self._map_chunk(chunk,msg_class,included,fields,include)
+
+    def _map_chunk(self, objs, msg_class, included, fields=None, include=None):
+        #returns the resource dicts of a chunk of objects. Included resources are added to included, if it is not None.
+        return map_chunk(objs,msg_class,included,self.nest_in_responses,self.fragment_cache,fields,include)
+
+    def _use_parallel(self, obj):
+        #True if the objects of a response are mapped and encoded in worker processes. (see janus.parallel)
+        return self.parallel != None and self.render_bytes and self.stream == False and self.parallel.applies(obj)
+
+    def _paginate(self, obj, meta):
+        #returns the objects, links and meta of a response. Of a page only its objects are mapped and its links and meta are added.
+        links = self.links
+        if isinstance(obj,Page):
+            links = dict(links) if links != None else {}
+            links.update(obj.links())
+
+            meta = dict(meta) if meta != None else {} #never change the meta of the decorator, it is shared by all requests
+            meta.update(obj.meta())
+
+            obj = obj.items
+
+        return obj, links, meta
+
+    def _get_include(self, response_obj, msg_class):
+        #returns include_relationships and the include paths (None to include all relationships) of a response.
+        include = response_obj.include if response_obj.include != None else self.include
+        if include != None:
+            include = DataMessage.parse_include(include,msg_class)
+            return len(include) > 0, include
+
+        include_relationships = self.include_relationships
+        if response_obj.include_relationships != None: include_relationships = response_obj.include_relationships
+
+        return include_relationships, None
+
+    def _load_included(self, data_message,do_nesting=False,context=None,include=None):
+        #all messages share one dict of (type,id) => resource, so every included resource is added only once.
+        included = {}
+        if include != None: #only the relationships on the include paths
+            DataMessage.include_paths(data_message if isinstance(data_message,list) else [data_message],include,included,do_nesting=do_nesting,context=context)
+        elif isinstance(data_message,list):
+            DataMessage.load_related(data_message,context,do_nesting=do_nesting) #one call of each relationship loader for all messages
 
-        #clean dublicates from included
-        clean_included = []
-        for item in included:
-            if (item in clean_included) == False:
-                clean_included.append(item)
+            for d in data_message:
+                d.collect_included(included,do_nesting=do_nesting,context=context)
+        else:
+            data_message.collect_included(included,do_nesting=do_nesting,context=context)
 
-        return clean_included
+        return list(included.values())
 
 class describe(object):
 
@@ -214,15 +449,10 @@ class describe(object):
 
                     return message
             except Exception as e:
-                err_msg = ErrorMessage.from_exception(e)
-                tb = traceback.format_exc()
-
-                if self.include_traceback_in_errors:
-                    if err_msg.meta == None: err_msg.meta = {}
-                    err_msg.traceback = tb
+                err_msg, tb = _error_message(e,self.include_traceback_in_errors) #the traceback is only formatted if it is used
 
                 if self.error_hook != None:
-                    self.error_hook(int(err_msg.status),err_msg,tb)
+                    self.error_hook(int(err_msg.status),err_msg,str(tb))
 
                 message = JsonApiMessage(errors=err_msg).to_json()
 
@@ -230,3 +460,216 @@ class describe(object):
 
 
         return wrapped_f
+
+async def _resolve(value):
+    #awaits value if it is awaitable (e.g. returned by a coroutine function), otherwise returns it as it is.
+    if inspect.isawaitable(value):
+        return await value
+
+    return value
+
+class async_jsonapi(jsonapi):
+    """
+    asyncio version of the jsonapi decorator for async web frameworks, taking the same arguments.
+    The decorated function may be a coroutine function and every hook may return an awaitable,
+    which is awaited. Lists are mapped and rendered yield_every resources at a time, giving control
+    back to the event loop in between, so a large response does not block other requests. This holds for
+    responses rendered to dicts, json bytes (render_bytes) and streamed ones.
+    Like with the jsonapi decorator, all chunks share one MappingContext, so related objects are mapped
+    only once per response and every loader is called once for all included resources.
+    With stream=True an async generator of json byte chunks of stream_chunk_size resources is returned, like the
+    jsonapi decorator returns a generator of them. (every streamed chunk is mapped with its own MappingContext,
+    so memory is bounded by the chunk size)
+    Concurrent requests for the same response are only coalesced by a janus.cache.ResponseCache if its async_get_hook
+    is the cached_get_hook, because its get_hook would block the event loop while waiting.
+    Both decorators handle a response with the same steps (see _prepare and _map_response), this one only awaits
+    the hooks and gives control back to the event loop between the steps.
+    """
+
+    def __init__(self, *a, yield_every=100, **ka):
+        jsonapi.__init__(self, *a, **ka)
+        self.yield_every = yield_every #number of resources mapped or rendered before control is given back to the event loop.
+
+    def __call__(self, f):
+        async def wrapped_f(*a, **ka):
+            logging_token = janus_logger.enable_for_request(self.logger)
+            meta = self.meta
+            pending = None #the response cached_get_hook missed, until it is passed to cached_set_hook
+            try:
+                #first check if this is not a HTTP OPTIONS call using a method defined based on the  WS framework.
+                #if it is one return empty array and do nothing else.
+                if self.options_hook != None:
+                    if await _resolve(self.options_hook()) == True:
+                        janus_logger.debug("This was an OPTIONS request.")
+                        return {}
+
+                response_obj = await _resolve(f(*a, **ka))
+
+                #first check if there is an response object
+                #if not nothing to return so HTTP 204
+                #otherwise process response
+                if response_obj == None:
+                    if self.before_send_hook != None:
+                        await _resolve(self.before_send_hook(204,None,None))
+
+                    janus_logger.debug("Decorated function returned None. Nothing to map.")
+                    return None
+
+                #check response object
+                if isinstance(response_obj,JanusResponse) == False:
+                    janus_logger.info("Not a JanusResponse. Will return this as it is. No mapping.")
+                    return response_obj
+
+                message = None
+
+                #caching
+                loaded_from_cache = False
+
+                response_obj.endpoint = self.endpoint
+                if self.cached_get_hook != None and self.stream == False:
+                    cached_object = await _resolve(self.cached_get_hook(response_obj))
+                    if cached_object != None:
+                        loaded_from_cache = True
+                        message = cached_object #returned cached, already mapped, response
+
+                        janus_logger.info("Will return cached message: %s", loaded_from_cache)
+                    else:
+                        pending = response_obj
+
+                if loaded_from_cache == False: #nothing in cache or cache deactivated
+                    msg_class, obj, fields, links, meta, include_relationships, include = self._prepare(response_obj,meta)
+
+                    if self._use_parallel(obj):
+                        data, included = await self.parallel.map_async(obj,msg_class,include_relationships,include,self.nest_in_responses,fields,self.encoder) #the event loop keeps running meanwhile
+                        message = self.parallel.render(data,included,meta,links,self.encoder) #data is already encoded
+                    else:
+                        data, included, context = await _run_async(self._map_response(obj,msg_class,fields,include_relationships,include,self.yield_every))
+                        message = await self.__render(JsonApiMessage(data=data,included=included,meta=meta,do_nesting=self.nest_in_responses,context=context,links=links)) #render json response
+
+                    #caching
+                    if self.cached_set_hook != None and self.stream == False:
+                        janus_logger.debug("Caching message")
+                        await _resolve(self.cached_set_hook(response_obj,message))
+                        pending = None
+
+                if self.before_send_hook != None: #fire before send hook
+                    await _resolve(self.before_send_hook(self.success_status,message,response_obj))
+
+                return message
+            except Exception as e:
+                err_msg, tb = _error_message(e,self.include_traceback_in_errors) #the traceback is only formatted if it is used
+
+                if self.error_hook != None:
+                    await _resolve(self.error_hook(int(err_msg.status),err_msg,str(tb)))
+
+                message = await self.__render(JsonApiMessage(errors=err_msg,meta=meta))
+
+                janus_logger.error("Traceback: %s", tb)
+
+                return message
+            finally:
+                if pending != None and self.cached_release_hook != None:
+                    await _resolve(self.cached_release_hook(pending))
+
+                janus_logger.reset_request(logging_token)
+
+        return wrapped_f
+
+    async def __render(self, json_api_message):
+        #render the message to an async generator of json byte chunks, json bytes or a dict.
+        if self.stream:
+            return self.__stream(json_api_message)
+        elif self.render_bytes:
+            chunks = []
+            for chunk in json_api_message.iter_json_bytes(self.encoder,self.yield_every):
+                chunks.append(chunk)
+                await asyncio.sleep(0)
+            return b''.join(chunks)
+        else:
+            return await self.__to_json(json_api_message)
+
+    async def __to_json(self, json_api_message):
+        #to_json of a message, converting its resources yield_every at a time, giving control back to the event loop in between.
+        if json_api_message.errors != None:
+            return json_api_message.to_json()
+
+        msg = json_api_message.to_dict() #the resources are already transformed to dicts by _map_response
+        for name, value in msg.items():
+            if isinstance(value,list):
+                converted = []
+                for chunk in _chunks(value,self.yield_every):
+                    converted.extend(json.loads(json.dumps(chunk)))
+                    await asyncio.sleep(0)
+                msg[name] = converted
+            else:
+                msg[name] = json.loads(json.dumps(value))
+
+        return msg
+
+    async def __stream(self, json_api_message):
+        #async generator of the json byte chunks of a message, mapped and encoded while they are sent.
+        try:
+            for chunk in json_api_message.iter_json_bytes(self.encoder,self.stream_chunk_size):
+                yield chunk
+                await asyncio.sleep(0)
+        except Exception as e:
+            #the response is already being sent, so there is no way to send an error message anymore.
+            err_msg, tb = _error_message(e)
+
+            if self.error_hook != None:
+                await _resolve(self.error_hook(int(err_msg.status),err_msg,str(tb)))
+
+            janus_logger.error("Streaming response failed. Traceback: %s", tb)
+
+            raise
+
+class async_describe(describe):
+    """
+    asyncio version of the describe decorator, taking the same arguments.
+    The decorated function may be a coroutine function and every hook may return an awaitable, which is awaited.
+    """
+
+    def __call__(self, f):
+        async def wrapped_f(*a, **ka):
+            try:
+                #if this decorator is used the function must return all messages that should be described as a list
+                messages = await _resolve(f(*a, **ka))
+
+                #first check if there is an response object
+                #if not nothing to return so HTTP 204
+                #otherwise process response
+                if messages == None:
+                    if self.before_send_hook != None:
+                        await _resolve(self.before_send_hook(204,None,None))
+
+                    return None
+
+                if isinstance(messages, (list, tuple)) == False:
+                    raise Exception('Methods using the "describe" decorator have to return a list of subclasses of DataMessage to describe.')
+
+                msg_descriptions = []
+                for msg in messages:
+                    if issubclass(msg,DataMessage) == False:
+                        raise Exception('All returned classes in the returned list have to be a subclass of DataMessage.')
+
+                    msg_descriptions.append(msg().describe())
+
+                meta = {'message-types':msg_descriptions}
+
+                message = JsonApiMessage(meta=meta).to_json() #render json response
+
+                if self.before_send_hook != None: #fire before send hook
+                    await _resolve(self.before_send_hook(self.success_status,message,None))
+
+                return message
+            except Exception as e:
+                err_msg, tb = _error_message(e,self.include_traceback_in_errors) #the traceback is only formatted if it is used
+
+                if self.error_hook != None:
+                    await _resolve(self.error_hook(int(err_msg.status),err_msg,str(tb)))
+
+                message = JsonApiMessage(errors=err_msg).to_json()
+
+                return message
+
+        return wrapped_f
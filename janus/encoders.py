@@ -0,0 +1,102 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+encoders
+
+contains the json encoders janus can use to render messages directly to UTF-8 encoded bytes.
+See JsonApiMessage.to_json_bytes in janus.py.
+orjson and ujson are used only if they are installed.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+class JsonEncoder(object):
+    """
+    Encodes a dict of simple types to compact, UTF-8 encoded json using python's json module.
+    This is the base class for all encoders, to use another json library derive from
+    this and override encode.
+    """
+
+    name = "json"
+
+    def encode(self, obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class OrjsonEncoder(JsonEncoder):
+    """
+    Encodes using orjson (https://github.com/ijl/orjson), which returns bytes itself.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson == None:
+            raise Exception('orjson is not installed.')
+
+    def encode(self, obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS) #json converts non str keys to str too
+
+class UjsonEncoder(JsonEncoder):
+    """
+    Encodes using ujson (https://github.com/ultrajson/ultrajson).
+    """
+
+    name = "ujson"
+
+    def __init__(self):
+        if ujson == None:
+            raise Exception('ujson is not installed.')
+
+    def encode(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+_encoders = {
+    JsonEncoder.name: JsonEncoder,
+    OrjsonEncoder.name: OrjsonEncoder,
+    UjsonEncoder.name: UjsonEncoder,
+}
+
+def _fastest_encoder():
+    if orjson != None:
+        return OrjsonEncoder()
+    elif ujson != None:
+        return UjsonEncoder()
+    else:
+        return JsonEncoder()
+
+default_encoder = _fastest_encoder() #the fastest installed encoder, used if no other encoder is given
+
+def get_encoder(encoder=None):
+    """
+    returns an encoder instance.
+    encoder => None to get the default encoder (the fastest installed one of orjson, ujson and json),
+               the name of an encoder ("orjson", "ujson" or "json") or an object with an encode method,
+               that is returned as it is.
+    """
+    if encoder == None:
+        return default_encoder
+    elif isinstance(encoder, str):
+        if (encoder in _encoders) == False:
+            raise Exception('Unknown encoder ' + encoder + '. Use one of ' + str(list(_encoders.keys())) + '.')
+
+        return _encoders[encoder]()
+    else:
+        return encoder
@@ -17,8 +17,27 @@ spec: http://jsonapi.org/
 
 """
 
-import hashlib
-import time
+import itertools
+import os
+
+_id_prefix = os.urandom(6).hex() #random per process, so ids of concurrent processes don't collide
+_id_counter = itertools.count(1)
+
+def _reset_ids():
+    #a forked process would continue the ids of its parent, so it gets a prefix of its own.
+    global _id_prefix, _id_counter
+    _id_prefix = os.urandom(6).hex()
+    _id_counter = itertools.count(1)
+
+if hasattr(os,'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_ids)
+
+def new_error_id():
+    """
+    returns a new unique identifier for an occurrence of an error, made of a random prefix per process
+    and a counter, so we can search for it in the logs, without hashing anything.
+    """
+    return _id_prefix + "-" + str(next(_id_counter))
 
 class JanusException(Exception):
     """
@@ -55,18 +74,8 @@ class JanusException(Exception):
         self.code = code
         self.meta = meta
 
-        #we use a string representation of all we got in details plus timestamp as hash to identify this error.
-        #So we can search for it in the logs, if we need to.
-        self.id = hashlib.sha1(
-                                (
-				str(time.time()) +
-                                str(self.title) +
-                                str(self.detail) +
-                                str(self.status) +
-                                str(self.code) +
-                                str(self.meta)
-				).encode('utf-8')
-                              ).hexdigest()
+        #a unique id to identify this error, so we can search for it in the logs, if we need to.
+        self.id = new_error_id()
 
 class BadRequestException(JanusException):
     """
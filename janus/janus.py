@@ -16,9 +16,14 @@ and also deserialize json api messages back to python objects.
 spec: http://jsonapi.org/
 """
 
+import copy
 import json
+from collections.abc import Iterator
 from janus.janus_logging import janus_logger
-import copy
+from janus.encoders import get_encoder
+from janus.accessors import compile_getter, compile_strict_getter, compile_setter, find_missing, MISSING
+from janus.validators import compile_type_check, compile_validator
+from janus.codegen import compile_map_object, compile_to_dict
 from janus.exceptions import *
 
 class JanusResponse(object): #JSON API Message Object see: http://jsonapi.org/format/#document-structure
@@ -29,15 +34,20 @@ class JanusResponse(object): #JSON API Message Object see: http://jsonapi.org/fo
     """
 
     message = None #the message typ to return
-    data = None #an object, or a list of objects that should be returned from this message as data payload
+    data = None #an object, or a list of objects that should be returned from this message as data payload (an iterator of objects is read at once, or mapped on demand when streaming, see jsonapi decorator, or a page of objects, see janus.pagination)
     meta = None #custom, non json api standard meta data as dict of simple types (no objects please)
     include_relationships = None #flag to overrule this flag in the decorator.
+    fields = None #sparse fieldsets as dict of type name => attribute names, e.g. parsed from the request's "fields[type]" parameters, to overrule the ones of the decorator. (see MessageSchema.restrict)
+    include = None #include paths, e.g. the request's "include" parameter, to overrule include_relationships of the decorator and this. (see DataMessage.parse_include)
+    endpoint = None #set by the decorator rendering this: its settings that change the response, as hashable value. (part of cache keys, see janus.cache.default_key)
 
-    def __init__(self,data=None,meta=None,message=None,include_relationships=None):
+    def __init__(self,data=None,meta=None,message=None,include_relationships=None,fields=None,include=None):
         self.data = data
         self.meta = meta
         self.message = message
         self.include_relationships = include_relationships
+        self.fields = fields
+        self.include = include
 
         #check data
         if self.data == None:
@@ -59,6 +69,11 @@ class JanusResponse(object): #JSON API Message Object see: http://jsonapi.org/fo
             janus_logger.error("Meta has to be a dict with non jsonapi standard information.")
             raise Exception('Meta has to be a dict with non jsonapi standard information.')
 
+        #check fields
+        if self.fields != None and isinstance(self.fields,dict) == False:
+            janus_logger.error("Fields has to be a dict of type name => attribute names.")
+            raise Exception('Fields has to be a dict of type name => attribute names.')
+
 class JsonApiMessage(object): #JSON API Message Object see: http://jsonapi.org/format/#document-structure
     """
     Represents a jsonapi compatible message.
@@ -66,14 +81,16 @@ class JsonApiMessage(object): #JSON API Message Object see: http://jsonapi.org/f
     spec: http://jsonapi.org/format/#document-structure
     """
 
-    data = None #an object, or a list of objects, derived from janus.DataMessage or a list of such objects. Represents a json api data object.
+    data = None #an object, or a list of objects, derived from janus.DataMessage or a list of such objects. Represents a json api data object. (a list may also contain dicts returned by DataMessage.from_objects)
     meta = None #custom, non json api standard meta data as dict of simple types (no objects please)
     errors = None #a list of objects derived from janus.ErrorMessage or a list of such objects. Represents a json api error object.
-    included = None #an array of resource objects that are related to the primary data and/or each other ("included resources").
+    included = None #an array of resource objects that are related to the primary data and/or each other ("included resources"). (or a dict of (type,id) => resource object, see DataMessage.collect_included)
+    links = None #a dict of links of the primary data, e.g. pagination links. (see janus.pagination)
 
     do_nesting=False #indicates if Attributes marked with nested=True should be nested or just treated like normal relationships in responses
+    context = None #the MappingContext the data was mapped with, so nested records are mapped only once.
 
-    def __init__(self,data=None,errors=None,included=None,meta=None,do_nesting=False):
+    def __init__(self,data=None,errors=None,included=None,meta=None,do_nesting=False,context=None,links=None):
         """
         initializes the object
         at least one of the three objects (data,errors,meta) has to be set.
@@ -86,8 +103,10 @@ class JsonApiMessage(object): #JSON API Message Object see: http://jsonapi.org/f
         self.meta = meta
 
         self.included = included
+        self.links = links
 
         self.do_nesting = do_nesting
+        self.context = context
 
     def __setattr__(self, name, value):
         """
@@ -101,20 +120,21 @@ class JsonApiMessage(object): #JSON API Message Object see: http://jsonapi.org/f
         #call default __setattr__
         object.__setattr__(self, name, value)
 
-    def to_json(self):
+    def to_dict(self):
         """
-        returns a json representation of the message.
+        returns a dict representation of the message, that only has to be serialized to json.
         This is always a valid json api message according to http://jsonapi.org/format/#document-structure
         """
 
         msg = {} #initializes a dict which will later be turned into json
         if self.data != None: #if data is present add it to the message
-            if isinstance(self.data, (list, tuple)): #if data is list of objects transform these objects to a list of dicts
+            if isinstance(self.data, (list, tuple, Iterator)): #if data is list of objects transform these objects to a list of dicts
                 #call to_dict on all data objects to get a dict representation of the data object
                 #and write this as a list to the message
-                msg['data'] = [d.to_dict(do_nesting=self.do_nesting) for d in self.data]
+                #resource dicts returned by DataMessage.from_objects are already transformed.
+                msg['data'] = [d if isinstance(d,dict) else self.__data_dict(d) for d in self.data]
             else:
-                msg['data'] = self.data.to_dict(do_nesting=self.do_nesting) #set the data object dicts to the message
+                msg['data'] = self.__data_dict(self.data) #set the data object dicts to the message
 
         if self.errors != None:
             if isinstance(self.errors, (list, tuple)):
@@ -122,48 +142,148 @@ class JsonApiMessage(object): #JSON API Message Object see: http://jsonapi.org/f
             else:
                 msg['errors'] = [self.errors.to_dict(),]
 
-        if self.included != None: msg['included'] = self.included #if included is present add it to the message
+        if self.included != None: msg['included'] = self.__included_list() #if included is present add it to the message
 
         if self.meta != None: msg['meta'] = self.meta #if meta is present add it to the message
 
-        json_msg = json.loads(json.dumps(msg)) #serialize dict to json and return
+        if self.links != None: msg['links'] = self.links #if links are present add them to the message
+
+        return msg
+
+    def to_json(self):
+        """
+        returns a json representation of the message.
+        This is always a valid json api message according to http://jsonapi.org/format/#document-structure
+        """
+        if self.errors != None and self.included == None: #error documents are small and their static parts are converted once (see ErrorMessage.to_json)
+            return self.__errors_to_json()
+
+        json_msg = json.loads(json.dumps(self.to_dict())) #serialize dict to json and return
 
         janus_logger.debug("Transformed whole message object to json.")
 
         return json_msg
 
+    def to_json_bytes(self,encoder=None):
+        """
+        returns the message serialized to UTF-8 encoded json, ready to be sent as response body.
+        Use this instead of to_json if the web framework should not serialize the response itself,
+        so the message is serialized only once.
+        encoder => an encoder from janus.encoders or its name. (Defaults to the fastest installed one)
+        """
+        json_bytes = get_encoder(encoder).encode(self.to_dict())
+
+        janus_logger.debug("Rendered whole message object to json bytes.")
+
+        return json_bytes
+
+    def iter_json_bytes(self,encoder=None,chunk_size=100):
+        """
+        returns a generator of UTF-8 encoded json chunks, that together are the same json as to_json_bytes returns.
+        If data is a list or an iterator (e.g. a generator mapping objects on demand) its resources are transformed
+        and encoded chunk_size resources at a time, so a response can be sent with chunked transfer encoding
+        without holding all resources in memory.
+        If included is a dict it may still be filled while data is iterated. It is rendered after data.
+        encoder => an encoder from janus.encoders or its name. (Defaults to the fastest installed one)
+        """
+        encoder = get_encoder(encoder)
+
+        if self.data == None or isinstance(self.data, (list, tuple, Iterator)) == False:
+            yield self.to_json_bytes(encoder) #nothing to stream
+            return
+
+        yield b'{"data":['
+
+        count = 0
+        chunk = []
+        for d in self.data:
+            chunk.append(encoder.encode(d if isinstance(d,dict) else d.to_dict(do_nesting=self.do_nesting,context=self.context)))
+            if len(chunk) >= chunk_size:
+                yield (b',' if count > 0 else b'') + b','.join(chunk)
+                count = count + len(chunk)
+                chunk = []
+
+        if len(chunk) > 0:
+            yield (b',' if count > 0 else b'') + b','.join(chunk)
+            count = count + len(chunk)
+
+        yield b']'
+
+        if self.included != None: yield b',"included":' + encoder.encode(self.__included_list())
+
+        if self.meta != None: yield b',"meta":' + encoder.encode(self.meta)
+
+        if self.links != None: yield b',"links":' + encoder.encode(self.links)
+
+        yield b'}'
+
+        janus_logger.debug("Streamed %d resources as json bytes.", count)
+
+    def __errors_to_json(self):
+        #to_json of a message containing errors, converting only the parts of the errors that differ between errors of the same kind.
+        errors = self.errors if isinstance(self.errors, (list, tuple)) else [self.errors,]
+        msg = {'errors': [e.to_json() if isinstance(e,ErrorMessage) else json.loads(json.dumps(e.to_dict())) for e in errors]}
+
+        if self.meta != None: msg['meta'] = json.loads(json.dumps(self.meta))
+
+        if self.links != None: msg['links'] = json.loads(json.dumps(self.links))
+
+        return msg
+
+    def __data_dict(self,msg):
+        #dict representation of a data message, taken from the fragment cache of the context if it was mapped with one.
+        if self.context != None:
+            return self.context.to_dict(msg,do_nesting=self.do_nesting)
+
+        return msg.to_dict(do_nesting=self.do_nesting)
+
+    def __included_list(self):
+        #included as list, also if it is a dict of (type,id) => resource.
+        if isinstance(self.included,dict):
+            return list(self.included.values())
+
+        return self.included
+
 class Attribute(object): #Attribute Class to map Data from input Object to Message Object
     """
     Repesents an attribute in the DataMessage object that will be present
     in the final json api message.
-    This is used to hold it's value as well as all configuration for the
-    transformation to json.
+    This is used to hold all configuration for the transformation to json.
+    Attribute objects are shared by all instances of a DataMessage sub class and
+    never copied. The actual values are held by the DataMessage instances.
+    Attribute is a data descriptor, so reading a member containing an Attribute on a
+    message returns its value and assigning to it sets its value.
     """
 
     __primitive_types = (str,bytes,int,float,bool) #all allowed types for attribute values. (lists and dicts are also allowed, but treated differently)
 
-    value = None #holds the actual value of this attribute once it is set.
-
     value_type = None #the value type of this attribute. Used for value verification.
+    item_type = None #the type of the items of list values and of the values of dict values. Used for value verification, if set.
     name = "" #the name of this value in json.
     required = True #indicates if this attribute is required or not.
     mapping = None #tells the mapping function (DataMessage.map_object) how to get the value for this
 
     key_mapping = None #tells the mapping function how to get type and id of a related entity without loading the whole entity. This is used only for relationships.
-    key_value = None #holds the actual key
+    loader = None #loads related entities by the keys loaded using key_mapping for included resources instead of using mapping. This is used only for relationships.
 
     nested = False #used for nested objects (Embedded Records in ember.js)
     nested_type = None #the type used to deserialize nested message to.
 
     read_only = False #only for request messages. If property is readonly it won't be serialized back. #TODO implement this.
     write_only = False #only for request messages. If property is writeonly it won't be included in responses (passwords on users for example). #TODO implement this.
-    updated = False #only for request messages. True if property was present in the request and therefor has to be updated.
 
-    def __init__(self,value_type=value_type,name=name,required=False,mapping=None,key_mapping=None,read_only=False,write_only=False,nested=False,nested_type=None):
+    def __init__(self,value_type=value_type,name=name,required=False,mapping=None,key_mapping=None,read_only=False,write_only=False,nested=False,nested_type=None,loader=None,item_type=None):
         """
         initializes the object
         sets all needed configurations and checks if value is a primitive type or list or dict.
+        loader => a callable taking a list of keys (as loaded by key_mapping) and returning a dict of key => related entity.
+                  It is called once per relationship for all messages of a response (see DataMessage.load_related),
+                  so related entities don't have to be loaded one by one using mapping.
+        item_type => a primitive type all items of a list value (or values of a dict value) have to be of. Items of requests are converted to it.
         """
+        if item_type != None and ((value_type == list or value_type == dict) == False or (item_type in self.__primitive_types) == False):
+            janus_logger.error('Item Type can only be set for list or dict Attributes and must be a simple type such as ' + str(self.__primitive_types) + '.')
+            raise Exception('Item Type can only be set for list or dict Attributes and must be a simple type such as ' + str(self.__primitive_types) + '.')
 
         if value_type in self.__primitive_types or value_type == list or value_type == dict or issubclass(value_type,DataMessage):
             self.value_type = value_type
@@ -174,6 +294,7 @@ class Attribute(object): #Attribute Class to map Data from input Object to Messa
             self.write_only = write_only
             self.nested = nested
             self.nested_type=nested_type
+            self.item_type = item_type
 
             if nested == True and nested_type == None:
                 janus_logger.error('If nested == True nested_type has to be set.')
@@ -181,18 +302,338 @@ class Attribute(object): #Attribute Class to map Data from input Object to Messa
 
             if issubclass(value_type,DataMessage): #relationship
                 self.key_mapping = key_mapping
+                self.loader = loader
+
+                if loader != None and key_mapping == None:
+                    janus_logger.error('If loader is set key_mapping has to be set.')
+                    raise Exception('If loader is set key_mapping has to be set.')
         else:
             janus_logger.error('Value Type must be either be a simple type such as ' + str(self.__primitive_types) + ', a subclass of DataMessage or a list or dict containing these types.')
             raise Exception('Value Type must be either be a simple type such as ' + str(self.__primitive_types) + ', a subclass of DataMessage or a list or dict containing these types.')
 
-    #TODO USE THIS WHEN OBJECT GETS FILLED WITH VALUES
-    def __check_list(self,list_value):
-        for item in list_value:
-            if not item in self.__primitive_types:
-                janus_logger.error('Attribute ' + self.name + ' contains invalid object of type ' + str(type(item)) + ". Valid types are " + str(self.__primitive_types))
-                raise Exception('Attribute ' + self.name + ' contains invalid object of type ' + str(type(item)) + ". Valid types are " + str(self.__primitive_types))
+    def __get__(self, instance, owner):
+        """
+        returns the value of this Attribute in the given message instance.
+        If accessed on the message class the Attribute object itself is returned.
+        """
+        if instance is None:
+            return self
+
+        return instance._values.get(self)
+
+    def __set__(self, instance, value):
+        """
+        converts the value to value_type, sets it as value of this Attribute in the given message instance
+        and marks this Attribute as updated in this message instance.
+        """
+        if value != None and issubclass(self.value_type,DataMessage) == False: #try to convert to desired type for simple types
+            try:
+                value = self.value_type(value)
+                if self.item_type != None: #and the items of lists and dicts
+                    item_type = self.item_type
+                    if self.value_type == list:
+                        value = [item_type(v) if v != None else None for v in value]
+                    else:
+                        value = {k:(item_type(v) if v != None else None) for k, v in value.items()}
+            except:
+                janus_logger.error("Failed to convert " + str(value) + " to " + str(self.value_type) + " in " + instance.__class__.__name__)
+                raise AttributeError("Failed to convert " + str(value) + " to " + str(self.value_type) + " in " + instance.__class__.__name__)
+
+        instance._values[self] = value
+        instance._updated.add(self)
+
+class SchemaField(object):
+    """
+    Represents a single member of a DataMessage sub class containing an Attribute object,
+    as it is stored in the MessageSchema of this sub class.
+    Besides the member name and the Attribute object itself it holds the already split
+    mapping paths, so they don't have to be split on every mapping.
+    """
+
+    __slots__ = ('member','attribute','path','key_path','is_relationship','get_value','get_related','get_key','set_value','set_key','check_type')
+
+    def __init__(self,member,attribute):
+        self.member = member #the name of the member in the sub class.
+        self.attribute = attribute #the Attribute object of the sub class.
+        self.path = attribute.mapping.split('.') if attribute.mapping != None else None #the mapping split by '.'
+        self.key_path = attribute.key_mapping.split('.') if attribute.key_mapping != None else None #the key_mapping split by '.'
+        self.is_relationship = issubclass(attribute.value_type,DataMessage) #True for relationships and nested records.
+
+        #compiled accessors for the mapping paths (see janus.accessors), None if there is no such mapping.
+        mapping = attribute.mapping
+        key_mapping = attribute.key_mapping
+        self.get_value = compile_getter(mapping) if mapping != None else None #reads attributes and nested records
+        self.get_related = compile_strict_getter(mapping) if mapping != None else None #reads related objects
+        self.get_key = compile_strict_getter(key_mapping) if key_mapping != None else None #reads keys of related objects
+        self.set_value = compile_setter(mapping) if mapping != None else None
+        self.set_key = compile_setter(key_mapping) if key_mapping != None else None
+        self.check_type = compile_type_check(attribute.value_type,attribute.item_type) #checks values read from python objects (see janus.validators)
+
+class MessageSchema(object):
+    """
+    Holds all information about the Attribute members of a DataMessage sub class,
+    that is needed to map, render and parse messages of this class.
+    A schema is built only once per sub class, on first use, instead of
+    searching the members of the message with dir() on every call.
+    See DataMessage._get_schema.
+    """
+
+    def __init__(self,msg_class):
+        self.msg_class = msg_class
+
+        #all members of the sub class containing Attribute objects.
+        #dir() returns them sorted by name, which also defines the order of members in rendered messages.
+        self.fields = [SchemaField(attr,getattr(msg_class,attr))
+                        for attr in dir(msg_class)
+                            if type(getattr(msg_class,attr)) == Attribute
+                            and not attr.startswith("__")]
+
+        self.members = {field.member:field for field in self.fields} #member name => SchemaField
+
+        self.__split_fields()
+        self.fieldsets = {} #frozenset of attribute names => copy of this schema restricted to these attributes (see restrict)
+
+        #the member that contains the id attribute of the sub class and its Attribute. (None if there is none)
+        id_fields = [field for field in self.fields
+                        if field.is_relationship == False
+                        and field.attribute.mapping != None
+                        and field.attribute.name == 'id']
+        self.id_member = id_fields[0].member if len(id_fields) == 1 else None
+        self.id_attribute = id_fields[0].attribute if len(id_fields) == 1 else None
+
+        #the type name defaults to the name of the sub class and can be overriden
+        #by creating a member "type_name" in the sub class.
+        type_name = getattr(msg_class,'type_name',None)
+        self.type_name = type_name if type_name != None else msg_class.__name__
+
+        #reads the version of a python object, used to cache its rendered resource. (see fragment_key)
+        version_mapping = getattr(msg_class,'version_mapping',None)
+        self.get_version = compile_getter(version_mapping) if version_mapping != None else None
+
+        #checks a resource object of a request in one pass, before it is mapped. (see janus.validators.compile_validator)
+        self.validate = compile_validator(self)
+
+        #map_object and to_dict functions generated for the sub class, if it was compiled. (see DataMessage.compile and janus.codegen)
+        self.compiled_map_object = None
+        self.compiled_to_dict = None
+        if getattr(msg_class,'_compiled',False) == True:
+            self.__compile()
+
+    def __compile(self):
+        #generates the specialized functions of this schema.
+        self.compiled_map_object = compile_map_object(self)
+        self.compiled_to_dict = compile_to_dict(self)
+
+    def __split_fields(self):
+        #sorts self.fields into the lists used to map, render and parse messages.
+        self.attributes = [field for field in self.fields if field.is_relationship == False and field.attribute.nested == False] #simple attributes
+        self.related = [field for field in self.fields if field.is_relationship == True] #relationships and nested records
+        self.relations = [field for field in self.related if field.attribute.nested == False] #relationships only
+        self.nested = [field for field in self.related if field.attribute.nested == True] #nested records only
+
+    def restrict(self,fields):
+        """
+        returns the schema to map messages of the sub class with for a sparse fieldset (see http://jsonapi.org/format/#fetching-sparse-fieldsets),
+        only containing the attributes, relationships and nested records in it and the id.
+        fields => a dict of type name => list of attribute names (as in json) or a str of comma separated attribute names.
+                  If it is None or has no entry for the type of the sub class, this schema itself is returned.
+        Restricted schemas are built only once per fieldset.
+        """
+        if fields == None:
+            return self
+
+        names = fields.get(self.type_name)
+        if names == None:
+            return self
+
+        if isinstance(names,str):
+            names = names.split(',')
+        if type(names) is not frozenset:
+            names = frozenset(names)
+
+        schema = self.fieldsets.get(names)
+        if schema == None:
+            schema = copy.copy(self)
+            schema.fields = [field for field in self.fields if field.attribute.name in names or field.attribute.name == 'id']
+            schema.__split_fields()
+            schema.fieldsets = {}
+            if schema.compiled_map_object != None:
+                schema.__compile()
+            self.fieldsets[names] = schema
+
+        return schema
+
+    @staticmethod
+    def fieldset_key(fields):
+        """
+        returns a hashable representation of sparse fieldsets (see restrict) for keys of rendered resources,
+        None if there are none.
+        """
+        if fields == None or len(fields) == 0:
+            return None
+
+        return tuple(sorted((type_name,tuple(sorted(set(names.split(',') if isinstance(names,str) else names)))) for type_name, names in fields.items()))
+
+    def fragment_key(self,obj,include_relationships=True,do_nesting=False,fieldset_key=None):
+        """
+        returns the key of the resource rendered from obj in a fragment cache (see janus.cache.FragmentCache),
+        made of type, id and version of obj and the flags and sparse fieldsets (see fieldset_key) it is mapped with.
+        Returns None if obj can't be cached, because the sub class has no version_mapping or obj has no version.
+        """
+        if self.get_version == None or self.id_member == None:
+            return None
+
+        version = self.get_version(obj)
+        if version == None:
+            return None
+
+        return (self.type_name,str(self.members[self.id_member].get_value(obj)),version,self.msg_class.__module__ + "." + self.msg_class.__qualname__,include_relationships,do_nesting,fieldset_key)
+
+class MessageId(object):
+    """
+    Descriptor for the id of a DataMessage.
+    Sub classes usually keep their id Attribute (named 'id') in a member called "id",
+    which replaces this. If the id Attribute is kept in another member,
+    reading and assigning id reads and assigns the value of this member.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return None
+
+        id_attribute = owner._get_schema().id_attribute
+        if id_attribute == None:
+            return None
+
+        return instance._values.get(id_attribute)
+
+    def __set__(self, instance, value):
+        id_attribute = instance._get_schema().id_attribute
+        if id_attribute == None:
+            janus_logger.error(instance.__class__.__name__ + " is missing Attribute 'id'.")
+            raise Exception(instance.__class__.__name__ + " is missing Attribute 'id'.")
+
+        id_attribute.__set__(instance,value)
+
+class MappingContext(object):
+    """
+    Holds the state of mapping the objects of a single response to DataMessage objects.
+    It contains an identity map, so every backend object is mapped to a message of a
+    certain class only once and every message is transformed to a dict only once,
+    no matter how often the object is related to other objects of the response.
+    Create one per response and pass it to DataMessage.from_object, to_dict and
+    collect_included. Do not share it between responses, because backend objects
+    might change in between.
+    fragment_cache => a cache of rendered resources shared by all responses (see janus.cache.FragmentCache),
+                      used for message classes with a version_mapping.
+    fields => sparse fieldsets of the response as dict of type name => attribute names (see MessageSchema.restrict),
+              applied to all messages mapped in this context, including the ones of included resources.
+    """
+
+    def __init__(self,fragment_cache=None,fields=None):
+        self.messages = {} #(message class, id of backend object, include_relationships, do_nesting) => (backend object, message)
+        self.dicts = {} #(id of message, do_nesting) => dict representation of the message
+        self.loaded = {} #Attribute => dict of key => related entity loaded by the loader of the Attribute
+        self.fragment_cache = fragment_cache
+        self.fragment_keys = {} #id of message => fragment key of its backend object (without the do_nesting of to_dict)
+        self.fields = fields
+        self.fieldset_key = MessageSchema.fieldset_key(fields)
+
+    def get_message(self,obj,msg_class,include_relationships=True,do_nesting=False):
+        """
+        returns the message of class msg_class mapped from obj and maps it, if this wasn't done yet.
+        """
+        key = (msg_class,id(obj),include_relationships,do_nesting)
+        entry = self.messages.get(key)
+        if entry != None:
+            return entry[1]
+
+        msg = msg_class()
+        msg.map_object(obj,include_relationships,do_nesting=do_nesting,fields=self.fields)
+
+        self.messages[key] = (obj,msg) #keep a reference to the object, so its id can't be reused by another object.
+
+        if self.fragment_cache != None:
+            self.fragment_keys[id(msg)] = msg_class._get_schema().fragment_key(obj,include_relationships,do_nesting,self.fieldset_key)
 
-class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/#document-structure
+        return msg
+
+    def get_fragment(self,obj,msg_class,include_relationships=True,do_nesting=False,dict_nesting=False):
+        """
+        returns the dict representation of the message of class msg_class mapped from obj (with include_relationships
+        and do_nesting), as to_dict(msg,dict_nesting) would return it, from the fragment cache without mapping obj.
+        Returns None if it is not cached.
+        """
+        if self.fragment_cache == None:
+            return None
+
+        key = msg_class._get_schema().fragment_key(obj,include_relationships,do_nesting,self.fieldset_key)
+        if key == None:
+            return None
+
+        return self.fragment_cache.get(key + (dict_nesting,))
+
+    def load(self,attribute,keys):
+        """
+        loads the related entities of a relationship Attribute with a loader for all given keys,
+        that were not loaded yet, with a single call of the loader.
+        returns a dict of key => related entity (None if the loader did not return one)
+        """
+        loaded = self.loaded.get(attribute)
+        if loaded == None:
+            loaded = {}
+            self.loaded[attribute] = loaded
+
+        missing = []
+        for key in keys:
+            if (key in loaded) == False:
+                loaded[key] = None #not found, until the loader returns it
+                missing.append(key)
+
+        if len(missing) > 0:
+            janus_logger.debug("Loading %d related objects for %s.", len(missing), attribute.name)
+            loaded.update(attribute.loader(missing))
+
+        return loaded
+
+    def to_dict(self,msg,do_nesting=False):
+        """
+        returns the dict representation of a message returned by get_message.
+        """
+        key = (id(msg),do_nesting)
+        msg_dict = self.dicts.get(key)
+        if msg_dict == None:
+            fragment_key = self.fragment_keys.get(id(msg))
+            if fragment_key != None:
+                fragment_key = fragment_key + (do_nesting,)
+                msg_dict = self.fragment_cache.get(fragment_key)
+
+            if msg_dict == None:
+                msg_dict = msg.to_dict(do_nesting=do_nesting,context=self)
+                if fragment_key != None:
+                    self.fragment_cache.set(fragment_key,msg_dict)
+
+            self.dicts[key] = msg_dict
+
+        return msg_dict
+
+class DataMessageMeta(type):
+    """
+    Metaclass of DataMessage.
+    Drops the cached MessageSchema of a DataMessage sub class, and all classes derived
+    from it, as soon as one of its members is set or deleted, so the schema
+    gets rebuilt on next use.
+    """
+
+    def __setattr__(cls, name, value):
+        type.__setattr__(cls, name, value)
+        if name != '_schema': cls._invalidate_schema()
+
+    def __delattr__(cls, name):
+        type.__delattr__(cls, name)
+        if name != '_schema': cls._invalidate_schema()
+
+class DataMessage(object, metaclass=DataMessageMeta): #JSON API Data Object see: http://jsonapi.org/format/#document-structure
     """
     Repesents a DataMessage object that will be present in the final json api message.
     This is used as a base class for all message template objects.
@@ -203,129 +644,144 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
     spec: http://jsonapi.org/format/#document-structure
     """
 
-    id = None #the data object's id (has to be set for each json api data object)
-    __type_name = None #the data object's type (has to be set for each json api data object)
+    id = MessageId() #the data object's id (has to be set for each json api data object)
+
+    version_mapping = None #mapping of the version (e.g. updated-at) of the python object, to cache rendered resources. (see MessageSchema.fragment_key)
 
     __data_object = None #the data object that holds the data for the message
+    __fields = None #the sparse fieldsets the message was mapped with (see map_object)
+
+    _compiled = False #True if specialized map_object and to_dict functions are generated for this class and classes derived from it. (see compile)
 
     def __init__(self):
         """
         initializes the object
-        sets __type_name to the name type name of the derived class.
-        __type_name can be overriden by creating a member "type_name" in the derived class
-        and setting a new string value to it.
-        This method also reinitializes all members containing Attribute objects by full
-        copies of the objects, so every instance of this get's also its own Attribute objects.
-        """
-
-        #set type name to class name (takes name of sub class)
-        self.__type_name = self.__class__.__name__
-
-        ### START ATTRIBUTE COPY """
-        #get all members of the sub class containing Attribute objects
-        attributes = {attr:object.__getattribute__(self,attr).value
-                        for attr in dir(self)
-                            if not callable(object.__getattribute__(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and not attr.startswith("__")}
-
-        #reinitialize all members containing Attribute objects by full
-        #copies of the objects, so every instance of this get's also its own Attribute objects.
-        #otherwise they would share these objects resulting in all instances having the same value,
-        #which is bad. ;-)
-        for attr in attributes:
-            object.__setattr__(self,attr,copy.deepcopy(object.__getattribute__(self,attr)))
-
-    def __get_id_attribute(self):
-        #check if there is a id attribute in the subclass
-        result = [attr for attr in dir(self)
-                    if not callable(getattr(self,attr))
-                    and type(object.__getattribute__(self,attr)) == Attribute
-                    and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == False
-                    and object.__getattribute__(self,attr).mapping != None
-                    and object.__getattribute__(self,attr).name == 'id'
-                    and not attr.startswith("__")]
-
-        if len(result) == 1: #id attribute found
-            return result[0]
-        else:
-            janus_logger.error(self.__type_name + " is missing Attribute 'id'.")
-            raise Exception(self.__type_name + " is missing Attribute 'id'.")
+        The Attribute objects of the sub class are shared by all its instances, so
+        every instance gets its own stores for the values of these Attributes.
+        All stores are keyed by the Attribute object of the sub class (by member name while pickled or copied, see __getstate__).
+        """
+        self._values = {} #Attribute => value of the Attribute
+        self._key_values = {} #relationship Attribute => its key (type and id of the related entity)
+        self._keys = {} #relationship Attribute with a loader => its key as loaded using key_mapping
+        self._updated = set() #Attributes that were present in a request and therefor have to be updated.
 
-    def __convert_to_value_type(self,name,value):
-        if value == None:
-            return None
-        else:
-            #try to convert to desired type for simple types
-            if issubclass(object.__getattribute__(self,name).value_type,DataMessage) == False:
-                _type = object.__getattribute__(self,name).value_type
-                try:
-                    return _type(value)
-                except:
-                    janus_logger.error("Failed to convert " + str(value) + " to " + str(_type) + " in " + self.__type_name)
-                    raise AttributeError("Failed to convert " + str(value) + " to " + str(_type) + " in " + self.__type_name)
-            else:
-                return value
+    def __getstate__(self):
+        """
+        returns the state of the message for pickle and copy.
+        A pickled or copied Attribute would be a new object, that is no member of the class,
+        so the stores are keyed by the member name of their Attributes instead. (see __setstate__)
+        """
+        members = {field.attribute:field.member for field in self._get_schema().fields}
 
-    def __setattr__(self, name, value):
+        state = dict(self.__dict__)
+        for store in ('_values','_key_values','_keys'):
+            if store in state:
+                state[store] = {members[attribute]:value for attribute,value in state[store].items() if attribute in members}
+        if '_updated' in state:
+            state['_updated'] = set(members[attribute] for attribute in state['_updated'] if attribute in members)
+
+        return state
+
+    def __setstate__(self, state):
         """
-        Overrides the default behaviour of members assignments to make members containing
-        Attribute objects behave like members contaning a simple type like int or str.
-        So this causes assignments to set the value of the Attribute object inside
-        the actual member to be set instead of overriding the whole object on
-        assignment.
+        restores the state returned by __getstate__, keying the stores by the Attributes of the class again.
         """
-        if type(object.__getattribute__(self,name)) == Attribute or name == "id":
-            #if this set's id we also set id to the member that contains id in the subclass
-            is_id = False
-            if name == "id":
-                is_id = True
-                name = self.__get_id_attribute()
+        fields = self._get_schema().members
 
-            #convert value to defined value_type
-            value = self.__convert_to_value_type(name, value)
+        state = dict(state)
+        for store in ('_values','_key_values','_keys'):
+            if store in state:
+                state[store] = {fields[member].attribute:value for member,value in state[store].items() if member in fields}
+        if '_updated' in state:
+            state['_updated'] = set(fields[member].attribute for member in state['_updated'] if member in fields)
 
-            #set value
-            object.__getattribute__(self,name).value = value
-            object.__getattribute__(self,name).updated = True
+        self.__dict__.update(state)
 
-            if is_id:
-                object.__setattr__(self, "id", value) #set value to id
+    @classmethod
+    def _get_schema(cls):
+        """
+        returns the MessageSchema of this class and builds it, if this wasn't done yet
+        or the class was changed since.
+        The schema is stored in member "_schema" of the class itself, never inherited from a parent class.
+        """
+        schema = cls.__dict__.get('_schema')
+        if schema == None: #not built yet or dropped since
+            schema = MessageSchema(cls)
+            type.__setattr__(cls,'_schema',schema)
 
-        else: #if the member does not contain an Attribute object, act normal.
-            object.__setattr__(self, name, value)
+        return schema
 
-    def __getattribute__(self, name):
+    @classmethod
+    def _invalidate_schema(cls):
         """
-        Overrides the default behaviour of gettting member values containing Attribute
-        objects, to return the value of the Attribute object instead of the whole
-        Attribute object.
+        drops the cached MessageSchema of this class and all classes derived from it.
         """
-        try:
-            if type(object.__getattribute__(self,name)) == Attribute:
-                return object.__getattribute__(self,name).value
-            else: #if the member does not contain an Attribute object, act normal.
-                return object.__getattribute__(self,name)
-        except AttributeError: #if message does not contain an Attribute, return None
-            return None
+        if '_schema' in cls.__dict__:
+            type.__delattr__(cls,'_schema')
+
+        for sub_class in cls.__subclasses__():
+            sub_class._invalidate_schema()
+
+    @classmethod
+    def compile(cls,msg_class=None):
+        """
+        Opt-in code generation for a message class and all classes derived from it: map_object and to_dict
+        run functions generated from the Attributes of the class (see janus.codegen), that return exactly
+        the same as the generic ones, without looking at the configuration of the Attributes on every call.
+        Attribute objects must not be changed afterwards (assigning or deleting members of the class is fine).
+        msg_class => the class to compile, defaults to this class. Returns it, so this can be used as class decorator:
+
+            @DataMessage.compile
+            class ArticleMessage(DataMessage):
+                ...
+
+        or called as ArticleMessage.compile().
+        """
+        if msg_class == None:
+            msg_class = cls
+
+        msg_class._compiled = True #drops the schema of the class, the next one is built with the generated functions.
+        msg_class._get_schema()
+
+        return msg_class
+
+    def __getattr__(self, name):
+        """
+        Only called if a member was not found the normal way.
+        If message does not contain a member, return None.
+        """
+        if name.startswith("__"): #python's protocols (copy, pickle, ...) look for optional members like __reduce_ex__ or __copy__
+            raise AttributeError(name)
+
+        return None
+
+    def nested_to_dict(self,nested_obj,context=None):
+        if context == None:
+            context = MappingContext()
 
-    def nested_to_dict(self,nested_obj):
         if isinstance(nested_obj,(list,tuple)):
-            return [o.to_dict(do_nesting=True) for o in nested_obj]
+            return [context.to_dict(o,do_nesting=True) for o in nested_obj]
         else:
-            return nested_obj.to_dict(do_nesting=True)
+            return context.to_dict(nested_obj,do_nesting=True)
 
-    def to_dict(self,do_nesting=False):
+    def to_dict(self,do_nesting=False,context=None):
         """
         Returns a dict representation of this objects's members containing Attribute
         objects, with their configured name as key and their values.
         The dict is already in a jsonapi format.
+        context => the MappingContext of the response, used to map nested records only once.
         """
+        schema = self._get_schema()
+        if schema.compiled_to_dict != None:
+            return schema.compiled_to_dict(self,do_nesting,context)
+
+        values = self._values
+        key_values = self._key_values
 
         #initialize the dict with id and type, because they are mandatory in json api.
         msg = {
             'id': str(self.id),
-            'type': self.__type_name
+            'type': schema.type_name
         }
 
         #get all members of the subclass containing Attribute members that are not relations, which do not contain
@@ -333,15 +789,12 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
         #a dict fitting the jsonapi specification for the data objects "attributes" member.
         #key => attribute name as specified in the Attribute object
         #value => the loaded value from the object(s) given to "from_object"
-        attributes = {object.__getattribute__(self,attr).name:object.__getattribute__(self,attr).value
-                        for attr in dir(self)
-                            if not callable(object.__getattribute__(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == False
-                            and object.__getattribute__(self,attr).nested == False
-                            and not attr.startswith("__")
-                            and object.__getattribute__(self,attr).name != 'id'
-                            and object.__getattribute__(self,attr).value != None}
+        attributes = {}
+        for field in schema.attributes:
+            attribute = field.attribute
+            value = values.get(attribute)
+            if attribute.name != 'id' and value != None:
+                attributes[attribute.name] = value
 
         #if there are attributes we add them to the dict using "attributes" as key.
         if len(attributes.keys()) > 0: msg['attributes'] = attributes
@@ -351,15 +804,12 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
         #a dict fitting the jsonapi specification for the data objects "relations" member.
         #key => attribute name as specified in the Attribute object
         #value => the loaded relations key (type and id) from the object(s) given to "from_object"
-        relations = {object.__getattribute__(self,attr).name:object.__getattribute__(self,attr).key_value
-                        for attr in dir(self)
-                            if not callable(object.__getattribute__(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                            and object.__getattribute__(self,attr).nested == False
-                            and not attr.startswith("__")
-                            and object.__getattribute__(self,attr).name != 'id'
-                            and object.__getattribute__(self,attr).key_value != None}
+        relations = {}
+        for field in schema.relations:
+            attribute = field.attribute
+            key_value = key_values.get(attribute)
+            if attribute.name != 'id' and key_value != None:
+                relations[attribute.name] = key_value
 
         #if there are relations we add them to the dict using "relations" as key.
         if len(relations.keys()) > 0: msg['relationships'] = relations
@@ -370,30 +820,22 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
         #key => attribute name as specified in the Attribute object
         #value => the loaded object serialized to json api message
         nested = {}
-        if do_nesting:
-            nested = {
-                            object.__getattribute__(self,attr).name:{'data':self.nested_to_dict(DataMessage.from_object(object.__getattribute__(self,attr).value,object.__getattribute__(self,attr).value_type,include_relationships=True,do_nesting=True))}
-                                        for attr in dir(self)
-                                            if not callable(object.__getattribute__(self,attr))
-                                            and type(object.__getattribute__(self,attr)) == Attribute
-                                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                                            and object.__getattribute__(self,attr).nested == True
-                                            and not attr.startswith("__")
-                                            and object.__getattribute__(self,attr).name != 'id'
-                                            and object.__getattribute__(self,attr).value != None
-                                }
-        else:
-            nested = {
-                        object.__getattribute__(self,attr).name:object.__getattribute__(self,attr).key_value
-                                    for attr in dir(self)
-                                        if not callable(object.__getattribute__(self,attr))
-                                        and type(object.__getattribute__(self,attr)) == Attribute
-                                        and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                                        and object.__getattribute__(self,attr).nested == True
-                                        and not attr.startswith("__")
-                                        and object.__getattribute__(self,attr).name != 'id'
-                                        and object.__getattribute__(self,attr).key_value != None
-                            }
+        if do_nesting and context == None and len(schema.nested) > 0:
+            context = MappingContext(fields=self.__fields)
+
+        for field in schema.nested:
+            attribute = field.attribute
+            if attribute.name == 'id':
+                continue
+
+            if do_nesting:
+                value = values.get(attribute)
+                if value != None:
+                    nested[attribute.name] = {'data':self.nested_to_dict(DataMessage.from_object(value,attribute.value_type,include_relationships=True,do_nesting=True,context=context),context)}
+            else:
+                key_value = key_values.get(attribute)
+                if key_value != None:
+                    nested[attribute.name] = key_value
 
         if len(nested.keys()) > 0:
             if 'relationships' in msg:
@@ -405,272 +847,545 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
 
         return msg
 
-    def map_object(self,obj,include_relationships=True,do_nesting=False):
+    def map_object(self,obj,include_relationships=True,do_nesting=False,fields=None):
         """
         Used to set values from a python object, as specified in the Attribute objects
         of the sub class of this, to the values of the Attribute objects of the sub class.
         So in other words, this is the data mapping from object to DataMessage object.
+        fields => sparse fieldsets as dict of type name => attribute names (see MessageSchema.restrict).
+                  The mapping and key_mapping of Attributes not in the fieldset of this type are never evaluated.
         """
         janus_logger.debug("Starting to map object to message.")
 
-        self.__data_object = obj #remember the object this message is based on
+        schema = self._get_schema().restrict(fields)
+        if schema.compiled_map_object != None:
+            return schema.compiled_map_object(self,obj,include_relationships,do_nesting,fields)
+
+        values = self._values
 
-        #get all members of the subclass containing Attribute members that are no relations as a dict.
-        #key => member name in the sub class.
-        #value => the Attribute inside of this member.
-        attributes = {attr:object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == False
-                            and object.__getattribute__(self,attr).nested == False
-                            and object.__getattribute__(self,attr).mapping != None
-                            and object.__getattribute__(self,attr).write_only == False
-                            and not attr.startswith("__")}
+        self.__data_object = obj #remember the object this message is based on
+        self.__fields = fields
 
         #for each member containing an Attribute object that is no relations set its value
         #to the value retrieved from the python object as specified in the
         #Attribute mapping and set it to the Attribute objects value.
-        for attr in attributes:
-            value = obj #start in the object itself to search for value
-            value_path = attributes[attr].mapping.split('.') #get mapping and split by '.', because this indicates a deeper path to get it.
-            for path_element in value_path: #go down this path in the python object to find the value
-                try: #Did a simple try/except, because hassattr actually calls the member
-                    current_value = getattr(value,path_element) #get the next value of current path element.
-                    value = current_value() if callable(current_value) else current_value #call the attribute if it is callable otherwise just read value
-                except AttributeError:
-                    value = None
+        for field in schema.attributes:
+            attribute = field.attribute
+            if field.path == None or attribute.write_only == True:
+                continue
+
+            value = field.get_value(obj) #go down the mapping path in the python object to find the value
 
             if value == None: #check if this field is required
-                if attributes[attr].required:
-                    janus_logger.error('Missing required field ' + str(attributes[attr].name) + ".")
-                    raise Exception('Missing required field ' + str(attributes[attr].name) + ".")
+                if attribute.required:
+                    janus_logger.error('Missing required field ' + str(attribute.name) + ".")
+                    raise Exception('Missing required field ' + str(attribute.name) + ".")
             else:
-                if isinstance(value,attributes[attr].value_type) == False: #check if actual value fit's value_type
-                    if ((attributes[attr].value_type == str or attributes[attr].value_type == str) and (isinstance(value,bytes) or isinstance(value,str))) == False:
-                        janus_logger.error('Expected ' + str(attributes[attr].value_type) + " got " + str(type(value)) + " for " + str(attributes[attr].name) + " of " + str(self.__type_name) + ".")
-                        raise Exception('Expected ' + str(attributes[attr].value_type) + " got " + str(type(value)) + " for " + str(attributes[attr].name) + " of " + str(self.__type_name) + ".")
+                if field.check_type(value) == False: #check if actual value fit's value_type
+                    expected = str(attribute.value_type) + (" of " + str(attribute.item_type) if attribute.item_type != None else "")
+                    janus_logger.error('Expected ' + expected + " got " + str(type(value)) + " for " + str(attribute.name) + " of " + str(self.__class__.__name__) + ".")
+                    raise Exception('Expected ' + expected + " got " + str(type(value)) + " for " + str(attribute.name) + " of " + str(self.__class__.__name__) + ".")
 
-                if attributes[attr].name == 'id': #if the attributes name is id, set it to the object'S id, because id is not inside "attributes"
+                if attribute.name == 'id': #if the attributes name is id, set it to the object'S id, because id is not inside "attributes"
                     setattr(self,'id',value)
                 else:
-                    attributes[attr].value = value #set loaded value to the Attribute object's value.
+                    values[attribute] = value #set loaded value as the Attribute object's value.
 
         if do_nesting:
             #nested records
-            #get all members of the subclass containing Attribute members that are nested as a dict.
-            #key => member name in the sub class.
-            #value => the Attribute inside of this member.
-            nested = {attr:object.__getattribute__(self,attr)
-                            for attr in dir(self)
-                                if not callable(getattr(self,attr))
-                                and type(object.__getattribute__(self,attr)) == Attribute
-                                and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                                and object.__getattribute__(self,attr).nested == True
-                                and object.__getattribute__(self,attr).mapping != None
-                                and object.__getattribute__(self,attr).write_only == False
-                                and not attr.startswith("__")}
-
             #for each member containing an Attribute object that is nested set its value (nested object)
             #to the value retrieved from the python object as specified in the
             #Attribute mapping and set it to the Attribute objects value.
-            for attr in nested:
-                value = obj #start in the object itself to search for value
-                value_path = nested[attr].mapping.split('.') #get mapping and split by '.', because this indicates a deeper path to get it.
-                for path_element in value_path: #go down this path in the python object to find the value
-                    try: #Did a simple try/except, because hassattr actually calls the member
-                        current_value = getattr(value,path_element) #get the next value of current path element.
-                        value = current_value() if callable(current_value) else current_value #call the attribute if it is callable otherwise just read value
-                    except AttributeError:
-                        value = None
+            for field in schema.nested:
+                attribute = field.attribute
+                if field.path == None or attribute.write_only == True:
+                    continue
+
+                value = field.get_value(obj) #go down the mapping path in the python object to find the value
 
                 if value == None: #check if this field is required
-                    if nested[attr].required:
-                        janus_logger.error('Missing required field ' + str(nested[attr].name) + ".")
-                        raise Exception('Missing required field ' + str(nested[attr].name) + ".")
+                    if attribute.required:
+                        janus_logger.error('Missing required field ' + str(attribute.name) + ".")
+                        raise Exception('Missing required field ' + str(attribute.name) + ".")
 
-                nested[attr].value = value #set loaded value to the Attribute object's value.
+                values[attribute] = value #set loaded value as the Attribute object's value.
 
         if include_relationships:
-            #get all members of the subclass containing Attribute members that are relations as a dict.
-            #key => member name in the sub class.
-            #value => the Attribute inside of this member.
-            relations = {attr:object.__getattribute__(self,attr)
-                            for attr in dir(self)
-                                if not callable(getattr(self,attr))
-                                and type(object.__getattribute__(self,attr)) == Attribute
-                                and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                                and (object.__getattribute__(self,attr).nested == False or do_nesting == False)
-                                and object.__getattribute__(self,attr).key_mapping != None
-                                and object.__getattribute__(self,attr).write_only == False
-                                and not attr.startswith("__")}
+            key_values = self._key_values
 
             #for each member containing an Attribute object that is a relations set its value
             #to the value retrieved from the python object as specified in the
             #Attribute mapping and set it to the Attribute objects value.
-            for attr in relations:
-                #load key first (for relations element)
-                key_id = obj
-                key_id_path = relations[attr].key_mapping.split('.') #get mapping to the keys of this relations and split by '.', because this indicates a deeper path to get it.
-
-                for path_element in key_id_path: #go down this path in the python object to find the value
-                    if key_id == None:
-                        if relations[attr].required:
-                            janus_logger.error("Keypath: " + str(key_id_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
-                            raise InternalServerErrorException("Keypath: " + str(key_id_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
-                        else:
-                            key_id = None
-                            continue # skip this not required relationship, because it'S value is None.
+            #nested records are treated like relations if they should not be nested.
+            for field in schema.related:
+                attribute = field.attribute
+                if (attribute.nested == True and do_nesting == True) or field.key_path == None or attribute.write_only == True:
+                    continue
 
-                    if hasattr(key_id,path_element):
-                        current_key_id = getattr(key_id,path_element) #get the next value of current path element.
-                        key_id = current_key_id() if callable(current_key_id) else current_key_id #call the attribute if it is callable otherwise just read value
+                #load key first (for relations element)
+                key_id = field.get_key(obj) #go down the key_mapping path in the python object to find the key(s)
+                if key_id is MISSING:
+                    if attribute.required:
+                        path_element = find_missing(attribute.key_mapping,obj)
+                        janus_logger.error("Keypath: " + str(field.key_path) + " returned None for path element " + path_element + " on message type " + self.__class__.__name__)
+                        raise InternalServerErrorException("Keypath: " + str(field.key_path) + " returned None for path element " + path_element + " on message type " + self.__class__.__name__)
                     else:
-                        if relations[attr].required:
-                            janus_logger.error("Keypath: " + str(key_id_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
-                            raise InternalServerErrorException("Keypath: " + str(key_id_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
-                        else:
-                            key_id = None
-                            continue # skip this not required relationship, because it'S value is None.
+                        key_id = None # skip this not required relationship, because it'S value is None.
+
+                if attribute.loader != None: #remember the key to load included entities
+                    self._keys[attribute] = key_id
 
                 #now get type name for this relation
                 if key_id != None:
-                    type_name = relations[attr].value_type.__name__
-                    if hasattr(relations[attr].value_type(),'type_name') and relations[attr].value_type().type_name != None: #if sub class has a member "type_name"...
-                        type_name = relations[attr].value_type().type_name #get this type name
+                    type_name = attribute.value_type._get_schema().type_name
 
                     if isinstance(key_id,list): #one-to-many relation
-                        relations[attr].key_value = {'data':[]}
-                        for k in key_id:
-                            relations[attr].key_value['data'].append({'type':type_name,'id':str(k)})
+                        key_values[attribute] = {'data':[{'type':type_name,'id':str(k)} for k in key_id]}
                     else: #one-to-one relation
-                        relations[attr].key_value = {'data':{'type':type_name,'id':str(key_id)}}
-
-        if hasattr(self,'type_name') and self.type_name != None: #if sub class has a member "type_name"...
-            self.__type_name = self.type_name #... override __type_name to set this to 'type' in the final data object.
+                        key_values[attribute] = {'data':{'type':type_name,'id':str(key_id)}}
 
-        janus_logger.debug("Finished mapping object to message. ID: " + str(self.id) + " TYPE NAME: " + str(self.__type_name))
+        janus_logger.debug("Finished mapping object to message. ID: %s TYPE NAME: %s", self.id, schema.type_name)
 
         return self
 
     def get_included(self,do_nesting=False):
+        """
+        Returns the dict representations of all objects related to this message (included resources)
+        as list, without duplicates.
+        """
+        included = {}
+        self.collect_included(included,do_nesting=do_nesting)
+        return list(included.values())
+
+    def collect_included(self,included,do_nesting=False,context=None):
+        """
+        Loads and maps all objects related to this message (included resources) and adds their
+        dict representations to included.
+        included => a dict of (type,id) => dict representation of a resource. Resources already in it are
+                    neither added again nor transformed to dicts again, so it can be shared by all messages of a response.
+        context => the MappingContext of the response, so related objects are mapped only once per response.
+        """
         janus_logger.debug("Loading and mapping included objects.")
-        included = []
-
-        #get all members of the subclass containing Attribute members that are relations and have a mapping as a dict.
-        #key => member name in the sub class.
-        #value => the Attribute inside of this member.
-        relations = {attr:object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                            and (object.__getattribute__(self,attr).nested == False or do_nesting == False)
-                            and object.__getattribute__(self,attr).mapping != None
-                            and not attr.startswith("__")}
-
-        #for each member containing an Attribute object that is a relations set its value
-        #to the value retrieved from the python object as specified in the
-        #Attribute mapping and set it to the Attribute objects value.
-        for attr in relations:
-            #load key first (for relations element)
-            value = self.__data_object
-            value_path = relations[attr].mapping.split('.') #get mapping to the keys of this relations and split by '.', because this indicates a deeper path to get it.
-
-            for path_element in value_path: #go down this path in the python object to find the value
-                if hasattr(value,path_element):
-                    current_value = getattr(value,path_element) #get the next value of current path element.
-                    value = current_value() if callable(current_value) else current_value #call the attribute if it is callable otherwise just read value
-                else:
-                    if relations[attr].required:
-                        janus_logger.error("Keypath: " + str(value_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
-                        raise InternalServerErrorException("Keypath: " + str(value_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
-                    else:
-                        value = None
-                        continue # skip this not required relationship, because it'S value is None.
+        count = len(included)
+
+        if context == None:
+            context = MappingContext(fields=self.__fields)
 
-                #current_value = getattr(value,path_element) #get the next value of current path element.
-                #value = current_value() if callable(current_value) else current_value #call the attribute if it is callable otherwise just read value
+        schema = self._get_schema().restrict(self.__fields) #relationships not in the fieldset are not included
 
+        #for each member containing an Attribute object that is a relations load the related
+        #object(s) either by the loader of the Attribute using the key loaded in map_object or
+        #from the python object as specified in the Attribute mapping.
+        for field in schema.related:
+            attribute = field.attribute
+            if attribute.nested == True and do_nesting == True:
+                continue
+
+            value = self.__get_related(field,context)
             if value == None:
-                if relations[attr].required:
-                    janus_logger.error("Keypath: " + str(value_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
-                    raise InternalServerErrorException("Keypath: " + str(value_path) + " returned None for path element " + path_element + " on message type " + self.__type_name)
+                continue # skip this not required relationship, because it'S value is None.
+
+            for v in (value if isinstance(value,(list,tuple)) else [value]):
+                #resources rendered for the same version of an object before are taken from the fragment cache, without mapping.
+                fragment = context.get_fragment(v,attribute.value_type,include_relationships=True,do_nesting=do_nesting)
+                if fragment != None:
+                    included.setdefault((fragment['type'],fragment['id']),fragment)
+                else:
+                    DataMessage.__include(included,DataMessage.from_object(v,attribute.value_type,include_relationships=True,do_nesting=do_nesting,context=context),context) #map now with relationships
+
+        if do_nesting:
+            nested_attributes = self.get_all_nested_included(context)
+
+            for attribute, value in nested_attributes:
+                if isinstance(value,list) == True:
+                    for v in value: DataMessage.__include(included,DataMessage.from_object(v,attribute.value_type,include_relationships=True,do_nesting=True,context=context),context,do_nesting=True)
                 else:
-                    continue # skip this not required relationship, because it'S value is None.
+                    DataMessage.__include(included,DataMessage.from_object(value,attribute.value_type,include_relationships=True,do_nesting=True,context=context),context,do_nesting=True)
+
+        janus_logger.debug("Loaded and mapped %d included objects.", len(included) - count)
+
+    @classmethod
+    def parse_include(cls,include,msg_class=None):
+        """
+        returns the include paths of a request (see http://jsonapi.org/format/#fetching-includes) as tree of
+        relationship name => tree of the relationships to include from the related resources, e.g.
+        "author,comments.author" => {'author': {}, 'comments': {'author': {}}}
+        include => a str of comma separated paths, a list of paths or an already parsed tree, which is returned as it is.
+        msg_class => if set, a BadRequestException is raised if a path doesn't follow relationships of msg_class.
+        """
+        if isinstance(include,dict):
+            tree = include
+        else:
+            if isinstance(include,str):
+                include = include.split(',')
 
+            tree = {}
+            for path in include:
+                if path == "":
+                    continue
 
-            #data = DataMessage.from_object(value,object.__getattribute__(self,attr).value_type,include_relationships=False) #map but without relationships
-            data = DataMessage.from_object(value,object.__getattribute__(self,attr).value_type,include_relationships=True,do_nesting=do_nesting) #map now with relationships
+                node = tree
+                for name in path.split('.'):
+                    node = node.setdefault(name,{})
 
-            if isinstance(data,list) == True:
-                for d in data: included.append(d.to_dict())
+        if msg_class != None:
+            DataMessage.__check_include(tree,msg_class,"")
+
+        return tree
+
+    @staticmethod
+    def __check_include(tree,msg_class,prefix):
+        #raises a BadRequestException if a name in tree is no relationship of msg_class.
+        related = {field.attribute.name:field.attribute for field in msg_class._get_schema().related}
+        for name, subtree in tree.items():
+            if (name in related) == False:
+                janus_logger.error("Can't include " + prefix + name + ", it is no relationship of " + msg_class._get_schema().type_name + ".")
+                raise BadRequestException(detail="Can't include " + prefix + name + ", it is no relationship of " + msg_class._get_schema().type_name + ".")
+
+            DataMessage.__check_include(subtree,related[name].value_type,prefix + name + ".")
+
+    @classmethod
+    def include_paths(cls,messages,include,included,do_nesting=False,context=None):
+        """
+        Loads and maps only the related objects on the include paths of the given messages (included resources), instead
+        of all directly related objects as collect_included does, and adds their dict representations to included.
+        The paths are followed level by level for all messages at once, so every relationship loader is called once per level.
+        Relationships on the paths are followed even if they are not in the sparse fieldset of a message.
+        messages => a list of messages, as returned by from_object
+        include => include paths as returned by parse_include
+        included => a dict of (type,id) => dict representation of a resource (see collect_included)
+        context => the MappingContext of the response, so related objects are mapped only once per response.
+        """
+        if context == None:
+            context = MappingContext()
+
+        level = [(msg,include) for msg in messages if len(include) > 0]
+        visited = set() #(id of message, id of subtree) already followed
+        while len(level) > 0:
+            #load the related objects of all relationships with a loader of this level at once.
+            keys = {}
+            for msg, tree in level:
+                for field in msg._get_schema().related:
+                    attribute = field.attribute
+                    if attribute.name in tree and attribute.loader != None and attribute in msg._keys:
+                        DataMessage.__add_keys(keys,msg,attribute)
+
+            for attribute in keys:
+                context.load(attribute,keys[attribute])
+
+            next_level = []
+            for msg, tree in level:
+                for field in msg._get_schema().related:
+                    attribute = field.attribute
+                    subtree = tree.get(attribute.name)
+                    if subtree == None:
+                        continue
+
+                    nested = attribute.nested == True and do_nesting == True #nested records are rendered in their message, not included.
+                    if nested:
+                        value = msg._values.get(attribute)
+                    else:
+                        value = msg.__get_related(field,context)
+
+                    if value == None:
+                        continue
+
+                    for v in (value if isinstance(value,(list,tuple)) else [value]):
+                        if len(subtree) == 0 and nested == False:
+                            fragment = context.get_fragment(v,attribute.value_type,include_relationships=True,do_nesting=do_nesting)
+                            if fragment != None:
+                                included.setdefault((fragment['type'],fragment['id']),fragment)
+                                continue
+
+                        related_msg = DataMessage.from_object(v,attribute.value_type,include_relationships=True,do_nesting=do_nesting,context=context)
+                        if nested == False:
+                            DataMessage.__include(included,related_msg,context)
+
+                        if len(subtree) > 0 and ((id(related_msg),id(subtree)) in visited) == False:
+                            visited.add((id(related_msg),id(subtree)))
+                            next_level.append((related_msg,subtree))
+
+            level = next_level
+
+    def __get_related(self,field,context):
+        #returns the related object(s) of a relationship, either loaded by the loader of the Attribute or read using its mapping.
+        if field.attribute.loader != None and field.attribute in self._keys:
+            return self.__get_loaded_related(field,context)
+        elif field.path != None:
+            return self.__get_mapped_related(field)
+
+        return None
+
+    def __get_mapped_related(self,field):
+        #returns the related object(s) of a relationship read from the data object using the Attribute mapping.
+        attribute = field.attribute
+        schema = self._get_schema()
+
+        value_path = field.path
+        value = field.get_related(self.__data_object) #go down the mapping path in the python object to find the value
+
+        if value is MISSING:
+            if attribute.required:
+                path_element = find_missing(attribute.mapping,self.__data_object)
+                janus_logger.error("Keypath: " + str(value_path) + " returned None for path element " + path_element + " on message type " + schema.type_name)
+                raise InternalServerErrorException("Keypath: " + str(value_path) + " returned None for path element " + path_element + " on message type " + schema.type_name)
             else:
-                included.append(data.to_dict())
+                value = None # skip this not required relationship, because it'S value is None.
+        elif value == None and attribute.required:
+            janus_logger.error("Keypath: " + str(value_path) + " returned None for path element " + value_path[-1] + " on message type " + schema.type_name)
+            raise InternalServerErrorException("Keypath: " + str(value_path) + " returned None for path element " + value_path[-1] + " on message type " + schema.type_name)
 
-        if do_nesting:
-            nested_attributes = self.get_all_nested_included()
+        return value
 
-            for attribute in nested_attributes:
-                if isinstance(attribute.value,list) == True:
-                    for v in attribute.value: included.append(DataMessage.from_object(v,attribute.value_type,include_relationships=True,do_nesting=True).to_dict(do_nesting=True))
-                else:
-                    included.append(included.append(DataMessage.from_object(attribute.value,attribute.value_type,include_relationships=True,do_nesting=True).to_dict(do_nesting=True)))
+    def __get_loaded_related(self,field,context):
+        #returns the related object(s) of a relationship loaded by the loader of the Attribute using the key(s) loaded in map_object.
+        attribute = field.attribute
+        key = self._keys[attribute]
 
-        janus_logger.debug("Loaded and mapped " + str(len(included)) + " included objects.")
+        value = None
+        if isinstance(key,list): #one-to-many relation
+            loaded = context.load(attribute,key)
+            value = [loaded[k] for k in key if loaded[k] != None]
+        elif key != None: #one-to-one relation
+            value = context.load(attribute,[key])[key]
 
-        return included
+        if value == None and attribute.required:
+            janus_logger.error("Keypath: " + str(field.key_path) + " returned no related object on message type " + self._get_schema().type_name)
+            raise InternalServerErrorException("Keypath: " + str(field.key_path) + " returned no related object on message type " + self._get_schema().type_name)
 
-    def get_all_nested_included(self):
+        return value
+
+    @classmethod
+    def load_related(cls,messages,context,do_nesting=False):
+        """
+        Loads the related objects of all relationships with a loader (see Attribute) for all given messages,
+        calling each loader only once with the keys of all messages instead of once per message.
+        The loaded objects are kept in the MappingContext, so collect_included does not load them again.
+        messages => a list of messages, as returned by from_object for a list of objects
+        context => the MappingContext of the response.
+        """
+        keys = {} #Attribute => all keys of all messages
+        for msg in messages:
+            for field in msg._get_schema().relations if do_nesting else msg._get_schema().related:
+                attribute = field.attribute
+                if attribute.loader == None or (attribute in msg._keys) == False:
+                    continue
+
+                DataMessage.__add_keys(keys,msg,attribute)
+
+        for attribute in keys:
+            context.load(attribute,keys[attribute])
+
+    @staticmethod
+    def __add_keys(keys,msg,attribute):
+        #adds the key(s) of a relationship with a loader loaded by msg to the keys of all messages.
+        key = msg._keys[attribute]
+        if isinstance(key,list):
+            keys.setdefault(attribute,[]).extend(key)
+        elif key != None:
+            keys.setdefault(attribute,[]).append(key)
+
+    @staticmethod
+    def __include(included,msg,context,do_nesting=False):
+        #add the dict representation of msg to included, if there is none for its type and id yet.
+        key = (msg._get_schema().type_name,str(msg.id))
+        if (key in included) == False:
+            included[key] = context.to_dict(msg,do_nesting=do_nesting)
+
+    def get_all_nested_included(self,context=None):
         nested_included = []
-        return self.get_nested_included(nested_included)
-
-    def get_nested_included(self,nested_included):
-        nested = [object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                            and object.__getattribute__(self,attr).nested == True
-                            and object.__getattribute__(self,attr).mapping != None
-                            and not attr.startswith("__")]
+        return self.get_nested_included(nested_included,context)
+
+    def get_nested_included(self,nested_included,context=None):
+        """
+        Adds all nested records of this message and the nested records of these
+        to nested_included as tuples of (Attribute,value).
+        """
+        if context == None:
+            context = MappingContext(fields=self.__fields)
+
+        nested = [(field.attribute,self._values.get(field.attribute))
+                        for field in self._get_schema().restrict(self.__fields).nested
+                            if field.path != None]
 
         nested_included += nested
 
-        for nested_obj in nested:
-            obj = nested_obj.value
-            msg = DataMessage.from_object(obj,nested_obj.value_type,include_relationships=True,do_nesting=True)
+        for attribute, obj in nested:
+            msg = DataMessage.from_object(obj,attribute.value_type,include_relationships=True,do_nesting=True,context=context)
             if isinstance(msg,list) == True:
                 for m in msg:
-                    m.get_nested_included(nested_included)
+                    m.get_nested_included(nested_included,context)
             else:
-                msg.get_nested_included(nested_included)
+                msg.get_nested_included(nested_included,context)
 
         return nested_included
 
 
 
     @classmethod
-    def from_object(cls,obj,msg_class,include_relationships=True,do_nesting=False):
+    def from_object(cls,obj,msg_class,include_relationships=True,do_nesting=False,context=None,fields=None):
         """
         Used to get a DataMessage (an object derived from DataMessage) with values in its
         Attribute members loaded from a python object according to Attribute objects mapping.
         obj => the python object containing the data that should be mapped to the message object. If this is a list of objects a list of message objects is returned.
         msg_class => the class (derived from DataMessage) which should be used as message class. (This class will be initialized and returned)
+        context => the MappingContext of the response. If set, objects already mapped in this response are not mapped again.
+        fields => sparse fieldsets (see map_object), only used without context. (the context has its own)
         """
         if isinstance(obj, (list, tuple)):
             messages = []
             for o in obj:  # map all objects to new meassage objects
-                msg = msg_class()
-                msg.map_object(o, include_relationships, do_nesting=do_nesting)
+                if context != None:
+                    msg = context.get_message(o,msg_class,include_relationships,do_nesting)
+                else:
+                    msg = msg_class()
+                    msg.map_object(o, include_relationships, do_nesting=do_nesting, fields=fields)
                 messages.append(msg)
 
             return messages
         else: #map a single object to a message object.
+            if context != None:
+                return context.get_message(obj,msg_class,include_relationships,do_nesting)
+
             msg = msg_class()
-            msg.map_object(obj,include_relationships,do_nesting=do_nesting)
+            msg.map_object(obj,include_relationships,do_nesting=do_nesting,fields=fields)
             return msg
 
+    @classmethod
+    def from_objects(cls,objs,msg_class,include_relationships=True,fragment_cache=None,fields=None):
+        """
+        Bulk version of from_object for large lists, that returns the dict representations of the
+        messages, as to_dict would, without creating a message object for every python object.
+        The mapping runs column-wise: every Attribute's mapping is read from all objects at once and
+        its values are type checked together, before the resource dicts are built.
+        Nested records are treated like relationships and no included resources can be collected from
+        the result, so use from_object if the response should contain nesting or included resources.
+        Sub classes overriding map_object or to_dict are mapped message by message, so their overrides are used.
+        (classes compiled with compile don't override them, they are mapped column-wise too)
+        objs => a list of python objects containing the data that should be mapped.
+        msg_class => the class (derived from DataMessage) which defines the mapping.
+        fragment_cache => a cache of rendered resources (see janus.cache.FragmentCache). Only objects not in it are mapped.
+        fields => sparse fieldsets (see map_object). Columns of Attributes not in the fieldset are not mapped.
+        The returned list can be used as data of a JsonApiMessage.
+        """
+        schema = msg_class._get_schema().restrict(fields)
+
+        if fragment_cache != None and schema.get_version != None:
+            fieldset_key = MessageSchema.fieldset_key(fields)
+            keys = [schema.fragment_key(o,include_relationships,False,fieldset_key) for o in objs]
+            keys = [key + (False,) if key != None else None for key in keys] #rendered without nesting
+            resources = [fragment_cache.get(key) if key != None else None for key in keys]
+
+            missing = [i for i in range(len(resources)) if resources[i] == None]
+            if len(missing) > 0:
+                mapped = DataMessage.from_objects([objs[i] for i in missing],msg_class,include_relationships,fields=fields)
+                for i, resource in zip(missing,mapped):
+                    resources[i] = resource
+                    if keys[i] != None:
+                        fragment_cache.set(keys[i],resource)
+
+            return resources
+
+        if msg_class.map_object is not DataMessage.map_object or msg_class.to_dict is not DataMessage.to_dict:
+            #the sub class overrides the mapping or rendering of single messages, which the columns would bypass.
+            return [msg.to_dict() for msg in DataMessage.from_object(objs,msg_class,include_relationships,fields=fields)]
+
+        class_name = msg_class.__name__
+        count = len(objs)
+
+        #ids
+        id_attribute = schema.id_attribute
+        id_fields = [field for field in schema.attributes if field.path != None and field.attribute.write_only == False and field.attribute.name == 'id']
+        if len(id_fields) > 1 or (len(id_fields) == 1 and id_fields[0].attribute is not id_attribute):
+            #the id is spread over several members, let the messages handle this.
+            return [msg.to_dict() for msg in DataMessage.from_object(objs,msg_class,include_relationships,fields=fields)]
+
+        ids = ['None'] * count
+        if len(id_fields) == 1:
+            field = id_fields[0]
+            value_type = id_attribute.value_type
+            column = cls.__map_column(field,objs,class_name)
+            ids = [str(value_type(value)) if value != None else 'None' for value in column] #converted like assigning the id would
+
+        #attributes
+        attributes = [{} for o in objs]
+        for field in schema.attributes:
+            attribute = field.attribute
+            if field.path == None or attribute.write_only == True or attribute.name == 'id':
+                continue
+
+            name = attribute.name
+            for attrs, value in zip(attributes,cls.__map_column(field,objs,class_name)):
+                if value != None:
+                    attrs[name] = value
+
+        #relationships and nested records (which are not nested here)
+        relationships = [{} for o in objs]
+        if include_relationships:
+            for field in schema.relations + schema.nested:
+                attribute = field.attribute
+                if field.key_path == None or attribute.write_only == True or attribute.name == 'id':
+                    continue
+
+                name = attribute.name
+                type_name = attribute.value_type._get_schema().type_name
+                for rels, key_id in zip(relationships,cls.__map_key_column(field,objs,class_name)):
+                    if key_id != None:
+                        if isinstance(key_id,list): #one-to-many relation
+                            rels[name] = {'data':[{'type':type_name,'id':str(k)} for k in key_id]}
+                        else: #one-to-one relation
+                            rels[name] = {'data':{'type':type_name,'id':str(key_id)}}
+
+        type_name = schema.type_name
+        resources = []
+        for msg_id, attrs, rels in zip(ids,attributes,relationships):
+            msg = {'id': msg_id, 'type': type_name}
+            if len(attrs) > 0: msg['attributes'] = attrs
+            if len(rels) > 0: msg['relationships'] = rels
+            resources.append(msg)
+
+        janus_logger.debug("Mapped %d objects to %s dicts.", count, class_name)
+
+        return resources
+
+    @staticmethod
+    def __map_column(field,objs,class_name):
+        #returns the values of an attribute for all objects and checks them like map_object does.
+        attribute = field.attribute
+        value_type = attribute.value_type
+        check_type = field.check_type
+        check_items = attribute.item_type != None #values of exactly value_type only need to be checked for their items
+        column = list(map(field.get_value,objs))
+
+        for value in column:
+            if value == None: #check if this field is required
+                if attribute.required:
+                    janus_logger.error('Missing required field ' + str(attribute.name) + ".")
+                    raise Exception('Missing required field ' + str(attribute.name) + ".")
+            elif (check_items or type(value) is not value_type) and check_type(value) == False: #check if actual value fit's value_type
+                expected = str(value_type) + (" of " + str(attribute.item_type) if check_items else "")
+                janus_logger.error('Expected ' + expected + " got " + str(type(value)) + " for " + str(attribute.name) + " of " + class_name + ".")
+                raise Exception('Expected ' + expected + " got " + str(type(value)) + " for " + str(attribute.name) + " of " + class_name + ".")
+
+        return column
+
+    @staticmethod
+    def __map_key_column(field,objs,class_name):
+        #returns the keys of a relationship for all objects and checks them like map_object does.
+        attribute = field.attribute
+        column = list(map(field.get_key,objs))
+
+        for i, key_id in enumerate(column):
+            if key_id is MISSING:
+                if attribute.required:
+                    path_element = find_missing(attribute.key_mapping,objs[i])
+                    janus_logger.error("Keypath: " + str(field.key_path) + " returned None for path element " + path_element + " on message type " + class_name)
+                    raise InternalServerErrorException("Keypath: " + str(field.key_path) + " returned None for path element " + path_element + " on message type " + class_name)
+                else:
+                    column[i] = None # skip this not required relationship, because it'S value is None.
+
+        return column
+
     ### REQUEST HANDLING ###
     def map_message(self,message):
         """
@@ -680,110 +1395,104 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
         """
         janus_logger.debug("Starting to map json message to DataMessage object.")
 
+        schema = self._get_schema()
+
         #get id
         if 'id' in message:
             self.id = message['id']
 
         if 'attributes' in message:
             #get attributes
-            attributes = {attr:object.__getattribute__(self,attr)
-                            for attr in dir(self)
-                                if not callable(getattr(self,attr))
-                                and type(object.__getattribute__(self,attr)) == Attribute
-                                and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == False
-                                and object.__getattribute__(self,attr).nested == False
-                                and object.__getattribute__(self,attr).mapping != None
-                                and object.__getattribute__(self,attr).name != 'id'
-                                and not attr.startswith("__")}
-
-            for attr in attributes:
-                if attributes[attr].name in message['attributes']:
-                    setattr(self,attr,message['attributes'][attributes[attr].name])
-                    setattr(attributes[attr],'updated',True) #mark this attribute as updated for later updating the backend object
+            for field in schema.attributes:
+                attribute = field.attribute
+                if field.path == None or attribute.name == 'id':
+                    continue
+
+                if attribute.name in message['attributes']:
+                    setattr(self,field.member,message['attributes'][attribute.name]) #this also marks the attribute as updated for later updating the backend object
                 else:
-                    if attributes[attr].required == True:
-                        janus_logger.error('Missing required field ' + str(attributes[attr].name) + ".")
-                        raise Exception('Missing required field ' + str(attributes[attr].name) + ".")
+                    if attribute.required == True:
+                        janus_logger.error('Missing required field ' + str(attribute.name) + ".")
+                        raise BadRequestException(detail='Missing required field ' + str(attribute.name) + ".")
 
             if 'relationships' in message:
                 #get nested attributes
-                nested = {attr:object.__getattribute__(self,attr)
-                                for attr in dir(self)
-                                    if not callable(getattr(self,attr))
-                                    and type(object.__getattribute__(self,attr)) == Attribute
-                                    and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                                    and object.__getattribute__(self,attr).nested == True
-                                    and object.__getattribute__(self,attr).mapping != None
-                                    and object.__getattribute__(self,attr).name != 'id'
-                                    and not attr.startswith("__")}
-
-                for attr in nested:
-                    if nested[attr].name in message['relationships']:
-                        val = message['relationships'][nested[attr].name]['data']
+                for field in schema.nested:
+                    attribute = field.attribute
+                    if field.path == None or attribute.name == 'id':
+                        continue
+
+                    if attribute.name in message['relationships']:
+                        val = message['relationships'][attribute.name]['data']
 
+                        #nested records are already parsed, so they are mapped directly without encoding and parsing them again.
                         if isinstance(val,(list,tuple)):
                             val_list = []
                             for v in val:
-                                val_list.append(DataMessage.from_message(json.dumps({'data':v}),object.__getattribute__(self,attr).value_type))
+                                val_list.append(DataMessage.from_message({'data':v},attribute.value_type,validate=False))
 
-                            setattr(self,attr,val_list)
-                        else:
-                            setattr(self,attr,DataMessage.from_message(json.dumps(val),object.__getattribute__(self,attr).value_type))
-
-                        setattr(nested[attr],'updated',True) #mark this attribute as updated for later updating the backend object
+                            setattr(self,field.member,val_list)
+                        elif val != None:
+                            setattr(self,field.member,DataMessage.from_message({'data':val},attribute.value_type,validate=False)) #this also marks the attribute as updated
+                        else: #removed nested record
+                            setattr(self,field.member,None)
                     else:
-                        if nested[attr].required == True:
-                            janus_logger.error('Missing required field ' + str(nested[attr].name) + ".")
-                            raise Exception('Missing required field ' + str(nested[attr].name) + ".")
+                        if attribute.required == True:
+                            janus_logger.error('Missing required field ' + str(attribute.name) + ".")
+                            raise BadRequestException(detail='Missing required field ' + str(attribute.name) + ".")
 
         if 'relationships' in message:
             #get relationships
-            relations = {attr:object.__getattribute__(self,attr)
-                            for attr in dir(self)
-                                if not callable(getattr(self,attr))
-                                and type(object.__getattribute__(self,attr)) == Attribute
-                                and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                                and object.__getattribute__(self,attr).nested == False
-                                and object.__getattribute__(self,attr).key_mapping != None
-                                and object.__getattribute__(self,attr).name != 'id'
-                                and not attr.startswith("__")}
-
-            for attr in relations:
-                if relations[attr].name in message['relationships']:
+            for field in schema.relations:
+                attribute = field.attribute
+                if field.key_path == None or attribute.name == 'id':
+                    continue
+
+                if attribute.name in message['relationships']:
                     rel_objects = []
-                    if isinstance(message['relationships'][relations[attr].name]['data'], (list, tuple)):
-                        for item in message['relationships'][relations[attr].name]['data']:
-                            rel_object = relations[attr].value_type()
+                    if isinstance(message['relationships'][attribute.name]['data'], (list, tuple)):
+                        for item in message['relationships'][attribute.name]['data']:
+                            rel_object = attribute.value_type()
                             rel_object.id = item['id']
                             rel_objects.append(rel_object)
                     else:
-                        rel_object = relations[attr].value_type()
+                        rel_object = attribute.value_type()
 
-                        rel_data = message['relationships'][relations[attr].name]['data']
+                        rel_data = message['relationships'][attribute.name]['data']
 
                         #removed releationships result in "None" data part. We use None id to idicate this state internally.
                         if rel_data == None:
                             rel_object.id = None
                         else:
-                            rel_object.id = message['relationships'][relations[attr].name]['data']['id']
+                            rel_object.id = message['relationships'][attribute.name]['data']['id']
 
                         rel_objects = rel_object
 
-                    setattr(self,attr,rel_objects)
-                    setattr(relations[attr],'updated',True) #mark this attribute as updated for later updating the backend object
+                    setattr(self,field.member,rel_objects) #this also marks the attribute as updated for later updating the backend object
                 else:
-                    if relations[attr].required == True:
-                        janus_logger.error('Missing required field ' + str(relations[attr].name) + ".")
-                        raise Exception('Missing required field ' + str(relations[attr].name) + ".")
+                    if attribute.required == True:
+                        janus_logger.error('Missing required field ' + str(attribute.name) + ".")
+                        raise BadRequestException(detail='Missing required field ' + str(attribute.name) + ".")
 
     @classmethod
-    def from_message(cls,raw_message,msg_class):
+    def from_message(cls,raw_message,msg_class,validate=True):
         """
         Used to get a DataMessage (an object derived from DataMessage) with values in its
         Attribute members loaded from a jsonapi request object (raw string request) according to Attribute objects mapping.
+        raw_message => the request body as str, bytes, bytearray or memoryview, or as dict if the web framework already parsed it.
         msg_class => the class (derived from DataMessage) which should be used as message class. (This class will be initialized and returned)
+        validate => if True, the resources are checked (see MessageSchema.validate) before any message is built. If any of them is
+                    invalid a BadRequestException is raised, with the detail and source pointer of every error in its meta.
+        If data of the request is an array of resources (bulk requests), a list of messages is returned. If any of them is invalid
+        a BadRequestException is raised, with the error and source pointer (e.g. "/data/3") of every invalid resource in its meta. (Errors that are not
+        caused by the data of a resource, see update_objects, are raised as they are)
         """
-        json_message = json.loads(raw_message) #parse raw_message to json
+        if isinstance(raw_message,dict): #already parsed
+            json_message = raw_message
+        elif isinstance(raw_message,memoryview):
+            json_message = json.loads(raw_message.tobytes()) #parse raw_message to json
+        else:
+            json_message = json.loads(raw_message) #parse raw_message to json (str, bytes and bytearray)
 
         if json_message == None: #no request body
             return None
@@ -796,13 +1505,107 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
             janus_logger.error("Message is missing data.")
             raise Exception("Message is missing data.")
 
+        if validate:
+            validate_resource = msg_class._get_schema().validate
+            if isinstance(data,list):
+                errors = []
+                for index, item in enumerate(data):
+                    errors.extend(validate_resource(item,"/data/" + str(index)))
+            else:
+                errors = validate_resource(data,"/data")
+
+            DataMessage.__raise_validation_errors(errors)
+
+        if isinstance(data,list): #bulk request
+            messages = []
+            errors = []
+            for index, item in enumerate(data):
+                try:
+                    msg = msg_class()
+                    msg.map_message(item)
+                    messages.append(msg)
+                except Exception as e:
+                    detail = DataMessage.__item_error(e)
+                    if detail == None: #not caused by the data of this resource
+                        raise
+
+                    errors.append({'detail':detail,'source':{'pointer':"/data/" + str(index)}})
+
+            DataMessage.__raise_item_errors(errors,len(data),"resources in request")
+
+            return messages
+
         msg = msg_class()
         msg.map_message(data)
         return msg
 
+    @classmethod
+    def update_objects(cls,messages,objs,commit_hook=None):
+        """
+        Applies update_object of every message to the backend object at the same index in objs.
+        messages => a list of messages, as returned by from_message for bulk requests
+        objs => a list of backend objects, one per message
+        commit_hook => a function(objs) called once, after all objects were updated, to write them to the backend at once.
+        If updating any object fails with a type, conversion or validation error (TypeError, ValueError, AttributeError or
+        BadRequestException), the commit_hook is not called and a BadRequestException is raised, with the error of every
+        failed object and the source pointer of its message in the request (e.g. "/data/3") in its meta. Other errors (e.g. a NotFoundException or errors of the backend) are raised as they are.
+        returns objs
+        """
+        if len(messages) != len(objs):
+            janus_logger.error("Got " + str(len(messages)) + " messages to update " + str(len(objs)) + " objects.")
+            raise Exception("Got " + str(len(messages)) + " messages to update " + str(len(objs)) + " objects.")
+
+        errors = []
+        for index, (msg, obj) in enumerate(zip(messages,objs)):
+            try:
+                msg.update_object(obj)
+            except Exception as e:
+                detail = DataMessage.__item_error(e)
+                if detail == None: #not caused by the data of this message, e.g. a backend error
+                    raise
+
+                errors.append({'detail':detail,'source':{'pointer':"/data/" + str(index)}})
+
+        DataMessage.__raise_item_errors(errors,len(objs),"objects to update")
+
+        if commit_hook != None:
+            commit_hook(objs)
+
+        return objs
+
+    @staticmethod
+    def __raise_validation_errors(errors):
+        #raises a BadRequestException listing all errors found by validating a request, if there are any.
+        if len(errors) > 0:
+            detail = errors[0]['detail'] if len(errors) == 1 else str(len(errors)) + " fields of the request are invalid."
+            janus_logger.error("%s %s", detail, errors)
+            raise BadRequestException(detail=detail,meta={'errors':errors})
+
+    @staticmethod
+    def __item_error(e):
+        #returns the detail of an error of a single item of a bulk request, if it is a type, conversion or validation error,
+        #otherwise None, so it is raised as it is and keeps its status. (e.g. NotFoundException or errors of the backend)
+        if isinstance(e,BadRequestException):
+            return str(e.detail)
+        elif isinstance(e,JanusException):
+            return None
+        elif isinstance(e,(TypeError,ValueError,AttributeError)):
+            return str(e)
+
+        return None
+
+    @staticmethod
+    def __raise_item_errors(errors,count,items):
+        #raises a BadRequestException listing the errors of all failed items of a bulk request, if there are any.
+        #errors have the same form as the ones of __raise_validation_errors: {'detail': ..., 'source': {'pointer': "/data/<index>"}}
+        if len(errors) > 0:
+            detail = str(len(errors)) + " of " + str(count) + " " + items + " are invalid."
+            janus_logger.error("%s %s", detail, errors)
+            raise BadRequestException(detail=detail,meta={'errors':errors})
+
     def update_object(self,obj):
         """
-        Used to set values from a DataMessage that were updated (self.__updated == True),
+        Used to set values from a DataMessage that were updated (Attributes in self._updated),
         as specified in the Attribute objects of the sub class of this, to the values of
         the backend object that matches this DataMessage Object.
         So in other words, this is the data mapping from DataMessage to backend object.
@@ -810,114 +1613,57 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
         """
         janus_logger.debug("Starting to update object from DataMessage object.")
 
-        attributes = {attr:object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == False
-                            and object.__getattribute__(self,attr).nested == False
-                            and object.__getattribute__(self,attr).updated == True
-                            and object.__getattribute__(self,attr).read_only == False
-                            and object.__getattribute__(self,attr).mapping != None
-                            #and object.__getattribute__(self,attr).name != 'id'
-                            and not attr.startswith("__")}
-
-        for attr in attributes:
-            attr_obj = obj
-            attr_path = attributes[attr].mapping.split('.') #get mapping and split by '.', because this indicates a deeper path to get it.
-            actual_attr = None
-            i = 1
-            for path_element in attr_path: #go down this path in the python object to find the value
-                if i < len(attr_path): #go down the path, but exclude the last element to get the parent object of the attribute
-                    current_attr_obj = getattr(attr_obj,path_element) #get the next value of current path element.
-                    attr_obj = current_attr_obj() if callable(current_attr_obj) else current_attr_obj #call the attribute if it is callable otherwise just read value
-                else: #the last element is what we actually want to set
-                    actual_attr = path_element
-
-                i = i + 1
+        schema = self._get_schema()
+        values = self._values
+        updated = self._updated
+
+        for field in schema.attributes:
+            attribute = field.attribute
+            #an id attribute in member "id" is never written back, the id of the message only identifies the backend object.
+            if (attribute in updated) == False or attribute.read_only == True or field.path == None or field.member == 'id':
+                continue
 
             #set value to to the attr in the subobject
-            setattr(attr_obj, actual_attr, object.__getattribute__(self,attr).value)
+            field.set_value(obj, values.get(attribute))
 
         #nested objects
-        nested = {attr:object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                            and object.__getattribute__(self,attr).nested == True
-                            and object.__getattribute__(self,attr).updated == True
-                            and object.__getattribute__(self,attr).read_only == False
-                            and object.__getattribute__(self,attr).mapping != None
-                            #and object.__getattribute__(self,attr).name != 'id'
-                            and not attr.startswith("__")}
-
-        for attr in nested:
-            attr_obj = obj
-            attr_path = nested[attr].mapping.split('.') #get mapping and split by '.', because this indicates a deeper path to get it.
-            actual_attr = None
-            i = 1
-            for path_element in attr_path: #go down this path in the python object to find the value
-                if i < len(attr_path): #go down the path, but exclude the last element to get the parent object of the attribute
-                    current_attr_obj = getattr(attr_obj,path_element) #get the next value of current path element.
-                    attr_obj = current_attr_obj() if callable(current_attr_obj) else current_attr_obj #call the attribute if it is callable otherwise just read value
-                else: #the last element is what we actually want to set
-                    actual_attr = path_element
-
-                i = i + 1
+        for field in schema.nested:
+            attribute = field.attribute
+            if (attribute in updated) == False or attribute.read_only == True or field.path == None:
+                continue
 
             #map nested object(s)
-            nested_message_value = object.__getattribute__(self,attr).value
+            nested_message_value = values.get(attribute)
             new_value = None
             if nested_message_value != None:
                 if isinstance(nested_message_value,(list,tuple)): #list value
                     new_value = [] #initialize list
 
                     for nested_message in nested_message_value:
-                        new_obj = object.__getattribute__(self,attr).nested_type()
+                        new_obj = attribute.nested_type()
                         nested_message.update_object(new_obj)
                         new_value.append(new_obj)
                 else: #single object
-                    new_obj = object.__getattribute__(self,attr).nested_type()
+                    new_obj = attribute.nested_type()
                     nested_message_value.update_object(new_obj)
                     new_value = new_obj
 
             #set nested object(s) to the attr in the subobject
-            setattr(attr_obj, actual_attr, new_value)
+            field.set_value(obj, new_value)
 
         #relationships
-        relations = {attr:object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                            and object.__getattribute__(self,attr).nested == False
-                            and object.__getattribute__(self,attr).updated == True
-                            and object.__getattribute__(self,attr).read_only == False
-                            and object.__getattribute__(self,attr).key_mapping != None
-                            and not attr.startswith("__")}
-
-
-        for attr in relations:
-            attr_obj = obj
-            attr_path = relations[attr].key_mapping.split('.') #get key_mapping and split by '.', because this indicates a deeper path to get it.
-            actual_attr = None
-            i = 1
-            for path_element in attr_path: #go down this path in the python object to find the value
-                if i < len(attr_path): #go down the path, but exclude the last element to get the parent object of the attribute
-                    current_attr_obj = getattr(attr_obj,path_element) #get the next value of current path element.
-                    attr_obj = current_attr_obj() if callable(current_attr_obj) else current_attr_obj #call the attribute if it is callable otherwise just read value
-                else: #the last element is what we actually want to set
-                    actual_attr = path_element
-
-                i = i + 1
+        for field in schema.relations:
+            attribute = field.attribute
+            if (attribute in updated) == False or attribute.read_only == True or field.key_path == None:
+                continue
 
             #extract ids and set to object
-            if isinstance(object.__getattribute__(self,attr).value,(list,tuple)):
-                ids = [r.id for r in object.__getattribute__(self,attr).value]
-                setattr(attr_obj, actual_attr, ids)
+            value = values.get(attribute)
+            if isinstance(value,(list,tuple)):
+                ids = [r.id for r in value]
+                field.set_key(obj, ids)
             else:
-                setattr(attr_obj, actual_attr, object.__getattribute__(self,attr).value.id)
+                field.set_key(obj, value.id)
 
         return obj
 
@@ -927,60 +1673,42 @@ class DataMessage(object): #JSON API Data Object see: http://jsonapi.org/format/
         all it's attributes and relationships as dict. This can be send in a meta member of
         a JsonApiMessage to describe the service entites to client developers.
         """
-        #read type name
-        if hasattr(self,'type_name') and self.type_name != None: #if sub class has a member "type_name"...
-            self.__type_name = self.type_name #... override __type_name to set this to 'type' in the final data object.
+        schema = self._get_schema()
 
-        message_description = { "type":self.__type_name }
+        message_description = { "type":schema.type_name }
 
         #initialize attribute and relationship lists
         message_description['attributes'] = []
         message_description['relationships'] = []
 
         #get attributes
-        attributes = {attr:object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == False
-                            and object.__getattribute__(self,attr).mapping != None
-                            and object.__getattribute__(self,attr).name != 'id'
-                            and not attr.startswith("__")}
-
-        for attr in attributes:
+        for field in schema.fields:
+            attribute = field.attribute
+            if field.is_relationship == True or field.path == None or attribute.name == 'id':
+                continue
+
             attr_desription = {
-                "name": attributes[attr].name,
-                "value-type": type(attributes[attr].value_type()).__name__,
-                "is-required": str(attributes[attr].required),
-                "is-read-only": str(attributes[attr].read_only),
-                "is-write-only": str(attributes[attr].write_only)
+                "name": attribute.name,
+                "value-type": type(attribute.value_type()).__name__,
+                "is-required": str(attribute.required),
+                "is-read-only": str(attribute.read_only),
+                "is-write-only": str(attribute.write_only)
             }
 
             message_description['attributes'].append(attr_desription)
 
         #get relationships
-        relations = {attr:object.__getattribute__(self,attr)
-                        for attr in dir(self)
-                            if not callable(getattr(self,attr))
-                            and type(object.__getattribute__(self,attr)) == Attribute
-                            and issubclass(object.__getattribute__(self,attr).value_type,DataMessage) == True
-                            and object.__getattribute__(self,attr).key_mapping != None
-                            and object.__getattribute__(self,attr).name != 'id'
-                            and not attr.startswith("__")}
-
-        for attr in relations:
-            #get type name of relation
-            rel_object = relations[attr].value_type()
-            type_name = type(relations[attr].value_type()).__name__
-            if hasattr(rel_object,'type_name') and rel_object.type_name != None: #if sub class has a member "type_name"...
-                type_name = rel_object.type_name #... take this one
+        for field in schema.related:
+            attribute = field.attribute
+            if field.key_path == None or attribute.name == 'id':
+                continue
 
             attr_desription = {
-                "name": relations[attr].name,
-                "value-type": type_name,
-                "is-required": str(relations[attr].required),
-                "is-read-only": str(relations[attr].read_only),
-                "is-write-only": str(relations[attr].write_only)
+                "name": attribute.name,
+                "value-type": attribute.value_type._get_schema().type_name, #get type name of relation
+                "is-required": str(attribute.required),
+                "is-read-only": str(attribute.read_only),
+                "is-write-only": str(attribute.write_only)
             }
 
             message_description['relationships'].append(attr_desription)
@@ -996,6 +1724,9 @@ class ErrorMessage(object): #JSON API Error Object see: http://jsonapi.org/forma
     meta = None #a meta object containing non-standard meta-information about the error.
     traceback = None #excepton traceback
 
+    __parts = {} #(status, code, title) => these members as json ready dict, built once per kind of error. (see to_json)
+    __simple_types = (str,int,float,bool) #values json keeps as they are
+
     @classmethod
     def from_exception(cls, exception):
         """
@@ -1013,7 +1744,7 @@ class ErrorMessage(object): #JSON API Error Object see: http://jsonapi.org/forma
             msg.detail = exception.detail
             msg.meta = exception.meta
         else:
-            msg.id = hashlib.sha1((str(time.time()) + str(exception)).encode('utf-8')).hexdigest()
+            msg.id = new_error_id()
             msg.status = 500
             msg.code = 500 #TODO add code for uncaught exception
             msg.title = "Internal Server Error"
@@ -1037,11 +1768,39 @@ class ErrorMessage(object): #JSON API Error Object see: http://jsonapi.org/forma
             'detail':self.detail
         }
 
-        if self.meta != None:
-            msg['meta'] = self.meta
+        #the traceback is added to a copy of meta, which may be the meta of the exception.
+        meta = self.meta
+        if self.traceback != None:
+            meta = dict(meta) if meta != None else {}
+            meta['traceback'] = self.traceback
+
+        if meta != None:
+            msg['meta'] = meta
+
+        return msg
 
+    def to_json(self):
+        """
+        returns the same as to_dict serialized to json and parsed again, like JsonApiMessage.to_json does, but
+        status, code and title, which are the same for all errors of a kind, are converted only once per kind.
+        """
+        key = (self.status,self.code,self.title)
+        parts = ErrorMessage.__parts.get(key)
+        if parts == None:
+            parts = json.loads(json.dumps({'status':self.status,'code':self.code,'title':self.title}))
+            if len(ErrorMessage.__parts) < 1000: #the title might be built per error, don't keep an unbounded number of them.
+                ErrorMessage.__parts[key] = parts
+
+        msg = {'id': self.id if type(self.id) is str else json.loads(json.dumps(self.id))}
+        msg.update(parts)
+        msg['detail'] = self.detail if self.detail == None or type(self.detail) in ErrorMessage.__simple_types else json.loads(json.dumps(self.detail))
+
+        meta = self.meta
         if self.traceback != None:
-            if self.meta == None: self.meta = {}
-            msg['meta']['traceback'] = self.traceback
+            meta = dict(meta) if meta != None else {}
+            meta['traceback'] = self.traceback
+
+        if meta != None:
+            msg['meta'] = json.loads(json.dumps(meta))
 
         return msg
@@ -9,11 +9,24 @@ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLI
 """
 
 import logging
+from contextvars import ContextVar
+
+_request_logger = ContextVar('janus_request_logger', default=None) #logger of the current request (thread or asyncio task), False if logging is off
 
 class janus_logger(object):
+    """
+    The logger of janus. Messages take lazy %-style arguments, like the logging module:
+
+        janus_logger.debug("Mapped %d objects to %s.", count, class_name)
+
+    They are only formatted if the message will be logged, so logging calls on hot paths are cheap
+    while the level of the logger drops them. Use isEnabledFor to skip building expensive arguments.
+    Decorators log to their own logger (see get_logger), other code logs to "janus".
+    """
 
     __prefix = "JANUS: "
-    enabled = True
+    enabled = True #used outside of requests handled by a decorator.
+    logger = logging.getLogger("janus") #used outside of requests handled by a decorator and by decorators with logging=True.
 
     @classmethod
     def enable(cls):
@@ -23,22 +36,82 @@ class janus_logger(object):
     def disable(cls):
         cls.enabled = False
 
+    @staticmethod
+    def get_logger(logger):
+        """
+        returns the logging.Logger for the logging argument of a decorator, None if logging is off.
+        logger => True for the "janus" logger, False to switch logging off, a logger name or a logging.Logger.
+        """
+        if logger == True:
+            return janus_logger.logger
+        elif logger == False or logger == None:
+            return None
+        elif isinstance(logger, str):
+            return logging.getLogger(logger)
+
+        return logger
+
+    @classmethod
+    def active_logger(cls):
+        """
+        returns the logger of the current request, or the "janus" logger outside of requests. (None if logging is off)
+        """
+        logger = _request_logger.get()
+        if logger == None:
+            return cls.logger if cls.enabled else None
+
+        return logger if logger != False else None
+
+    @classmethod
+    def isEnabledFor(cls, level):
+        logger = cls.active_logger()
+        return logger != None and logger.isEnabledFor(level)
+
+    @classmethod
+    def is_enabled(cls):
+        return cls.active_logger() != None
+
+    @classmethod
+    def enable_for_request(cls, logger):
+        """
+        sets the logger for the current request only (the current thread or asyncio task),
+        without affecting concurrent requests. Returns a token to pass to reset_request.
+        logger => a logging.Logger or None to switch logging off for the request.
+        """
+        return _request_logger.set(logger if logger != None else False)
+
+    @classmethod
+    def reset_request(cls, token):
+        _request_logger.reset(token)
+
+    @classmethod
+    def __log(cls, level, message, args):
+        logger = _request_logger.get()
+        if logger == None:
+            if cls.enabled == False: return
+            logger = cls.logger
+        elif logger == False:
+            return
+
+        if logger.isEnabledFor(level):
+            logger.log(level, cls.__prefix + message, *args)
+
     @classmethod
-    def debug(cls, message):
-        if cls.enabled: logging.debug(cls.__prefix + message)
+    def debug(cls, message, *args):
+        cls.__log(logging.DEBUG, message, args)
 
     @classmethod
-    def info(cls, message):
-        if cls.enabled: logging.info(cls.__prefix + message)
+    def info(cls, message, *args):
+        cls.__log(logging.INFO, message, args)
 
     @classmethod
-    def warning(cls, message):
-        if cls.enabled: logging.warning(cls.__prefix + message)
+    def warning(cls, message, *args):
+        cls.__log(logging.WARNING, message, args)
 
     @classmethod
-    def error(cls, message):
-        if cls.enabled: logging.error(cls.__prefix + message)
+    def error(cls, message, *args):
+        cls.__log(logging.ERROR, message, args)
 
     @classmethod
-    def critical(cls, message):
-        if cls.enabled: logging.critical(cls.__prefix + message)
+    def critical(cls, message, *args):
+        cls.__log(logging.CRITICAL, message, args)
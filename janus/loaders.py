@@ -0,0 +1,31 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+loaders
+
+contains loaders for relationship Attributes (see loader in janus.Attribute).
+A loader is any callable taking a list of keys and returning a dict of key => related object.
+"""
+
+class DictLoader(object):
+    """
+    Loads related objects from a dict of key => object held in memory.
+    This is a stand-in for loaders fetching from a datastore, e.g. in tests.
+    Every call is recorded in calls, to check how often the datastore would have been hit.
+    """
+
+    def __init__(self, objects):
+        self.objects = objects #key => object
+        self.calls = [] #the list of keys of every call
+
+    def __call__(self, keys):
+        self.calls.append(list(keys))
+        return {key: self.objects[key] for key in keys if key in self.objects}
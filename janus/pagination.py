@@ -0,0 +1,279 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+pagination
+
+contains pages of objects to return as data of a JanusResponse, read lazily from any iterable
+or sliceable source (lists, generators, querysets of ORMs, ...). See http://jsonapi.org/format/#fetching-pagination
+
+    @jsonapi()
+    def get(...):
+        page = Page(query, number=args.get('page[number]'), size=args.get('page[size]'), url=base_url, params=args)
+        return JanusResponse(data=page, message=ArticleMessage)
+
+The jsonapi decorator maps the objects of the page only and adds its links (first, prev, next and last)
+and meta to the response. Only size + 1 objects are read from the source, to know whether there is a next page.
+"""
+
+import inspect
+import itertools
+from collections.abc import Iterator, Sequence, Sized
+from urllib.parse import urlencode
+
+from janus.janus_logging import janus_logger
+from janus.exceptions import BadRequestException
+
+def _to_int(value, name, default):
+    #returns a page parameter as positive int, e.g. as read from the query string.
+    if value == None or value == "":
+        return default
+
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = 0
+
+    if value < 1:
+        janus_logger.error("%s has to be a positive number.", name)
+        raise BadRequestException(detail=name + " has to be a positive number.")
+
+    return value
+
+def _slice(source, start, stop):
+    #returns the objects from start to stop of source as list, slicing it if possible, so no other objects are read.
+    if isinstance(source, Iterator) == False and hasattr(source, '__getitem__'):
+        try:
+            return list(source[start:stop])
+        except TypeError: #not sliceable, e.g. a deque
+            pass
+
+    return list(itertools.islice(source, start, stop))
+
+def _takes_no_arguments(f):
+    #True if f can be called without arguments.
+    try:
+        parameters = inspect.signature(f).parameters.values()
+    except (TypeError, ValueError): #no signature, e.g. of some builtins
+        return False
+
+    return all(p.default is not p.empty or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD) for p in parameters)
+
+def _count(source):
+    #returns the number of objects in source, None if it can't be counted.
+    #sequences (lists, tuples, ranges, deques, ...) know their length, their count method counts occurrences of a value.
+    #other sources are counted with their count method if it takes no arguments (e.g. querysets of ORMs, counted by the database).
+    if isinstance(source, Sequence):
+        return len(source)
+
+    count = getattr(source, 'count', None)
+    if callable(count) and _takes_no_arguments(count):
+        return count()
+    elif isinstance(source, Sized):
+        return len(source)
+
+    return None
+
+class Page(object):
+    """
+    A page of the objects of a source, selected by page number and size (page[number] and page[size]).
+    source => an iterable or sliceable source of objects.
+    number, size => the page parameters of the request, as int or str. (invalid ones raise a BadRequestException)
+    max_size => the maximum size clients may request.
+    count => True to add the total number of objects and pages to meta and a last link, or a function(source)
+             returning the total number of objects. The total is only counted if needed and not on the last page.
+    url => the url of the request without query string, used for the links.
+    params => all other query parameters of the request, as dict, kept in the links. (page parameters are replaced)
+    """
+
+    def __init__(self, source, number=1, size=20, max_size=100, count=False, url=None, params=None):
+        self.source = source
+        self.number = _to_int(number, "page[number]", 1)
+        self.size = _to_int(size, "page[size]", 20)
+        if max_size != None and self.size > max_size:
+            self.size = max_size
+
+        self.count = count
+        self.url = url if url != None else ""
+        self.params = {k: v for k, v in (params or {}).items() if k.startswith("page[") == False}
+
+        self._items = None #objects of this page, read on first use
+        self._has_next = None
+        self._total = None
+
+    def _fetch(self):
+        #reads the objects of this page and one more to know whether there is a next one.
+        start = (self.number - 1) * self.size
+        items = _slice(self.source, start, start + self.size + 1)
+
+        self._has_next = len(items) > self.size
+        self._items = items[:self.size]
+        if self._has_next == False and (len(self._items) > 0 or self.number == 1): #the last page, so the total is known without counting
+            self._total = start + len(self._items)
+
+        janus_logger.debug("Read %d objects of page %d.", len(self._items), self.number)
+
+    @property
+    def items(self):
+        """
+        the objects of this page as list.
+        """
+        if self._items == None:
+            self._fetch()
+
+        return self._items
+
+    @property
+    def has_next(self):
+        if self._items == None:
+            self._fetch()
+
+        return self._has_next
+
+    @property
+    def total(self):
+        """
+        the total number of objects of the source, None if count is off or the source can't be counted.
+        """
+        if self.count == False or self.count == None:
+            return None
+
+        if self._items == None:
+            self._fetch()
+
+        if self._total == None:
+            self._total = self.count(self.source) if callable(self.count) else _count(self.source)
+
+        return self._total
+
+    def link(self, page_params):
+        """
+        returns the url of the request with the given page parameters.
+        """
+        params = dict(self.params)
+        params.update(page_params)
+        return self.url + "?" + urlencode(params, safe="[]")
+
+    def links(self):
+        """
+        returns the pagination links of this page for the links of the response.
+        """
+        links = {
+            'self': self.link({'page[number]': self.number, 'page[size]': self.size}),
+            'first': self.link({'page[number]': 1, 'page[size]': self.size}),
+        }
+
+        if self.number > 1:
+            links['prev'] = self.link({'page[number]': self.number - 1, 'page[size]': self.size})
+
+        if self.has_next:
+            links['next'] = self.link({'page[number]': self.number + 1, 'page[size]': self.size})
+
+        total = self.total
+        if total != None:
+            links['last'] = self.link({'page[number]': max(1, (total + self.size - 1) // self.size), 'page[size]': self.size})
+
+        return links
+
+    def meta(self):
+        """
+        returns the pagination meta of this page for the meta of the response.
+        """
+        page = {'number': self.number, 'size': self.size}
+
+        total = self.total
+        if total != None:
+            page['total'] = total
+            page['pages'] = max(1, (total + self.size - 1) // self.size)
+
+        return {'page': page}
+
+    def key(self):
+        """
+        returns the page parameters as hashable value, e.g. for cache keys.
+        """
+        return (type(self).__name__, self.number, self.size, self.count != False and self.count != None, self.url, tuple(sorted(self.params.items(), key=lambda item: str(item[0]))))
+
+class CursorPage(Page):
+    """
+    A page of the objects of a source, following the object with a cursor (page[after] and page[size]).
+    Cursors stay stable when objects are added to or removed from earlier pages, unlike page numbers.
+    after => the cursor of the last object of the previous page, None for the first page.
+    seek => a function(source, after) returning the objects of source following the object with the cursor after,
+            e.g. a query filtered by id > after. Without it, the source is read up to that object.
+    cursor => a function(obj) returning the cursor of an object as str. Defaults to its id.
+    size, max_size, count, url, params => see Page.
+    """
+
+    def __init__(self, source, after=None, size=20, max_size=100, seek=None, cursor=None, count=False, url=None, params=None):
+        Page.__init__(self, source, number=1, size=size, max_size=max_size, count=count, url=url, params=params)
+        self.after = after if after != "" else None
+        self.seek = seek
+        self.cursor = cursor if cursor != None else (lambda obj: str(obj.id))
+
+    def _fetch(self):
+        #reads the objects following the cursor and one more to know whether there is a next page.
+        source = self.source
+        if self.after != None:
+            if self.seek != None:
+                source = self.seek(source, self.after)
+            else:
+                source = iter(source)
+                for obj in source:
+                    if self.cursor(obj) == self.after:
+                        break
+
+        items = _slice(source, 0, self.size + 1)
+
+        self._has_next = len(items) > self.size
+        self._items = items[:self.size]
+        if self._has_next == False and self.after == None: #the only page
+            self._total = len(self._items)
+
+        janus_logger.debug("Read %d objects after cursor %s.", len(self._items), self.after)
+
+    def links(self):
+        """
+        returns the pagination links of this page for the links of the response.
+        (there is no prev or last link, because they can't be known from a cursor)
+        """
+        params = {'page[size]': self.size}
+        if self.after != None:
+            params['page[after]'] = self.after
+
+        links = {
+            'self': self.link(params),
+            'first': self.link({'page[size]': self.size}),
+        }
+
+        if self.has_next:
+            links['next'] = self.link({'page[after]': self.cursor(self.items[-1]), 'page[size]': self.size})
+
+        return links
+
+    def meta(self):
+        """
+        returns the pagination meta of this page for the meta of the response.
+        """
+        page = {'size': self.size}
+        if self.after != None:
+            page['after'] = self.after
+
+        total = self.total
+        if total != None:
+            page['total'] = total
+
+        return {'page': page}
+
+    def key(self):
+        """
+        returns the page parameters as hashable value, e.g. for cache keys.
+        """
+        return Page.key(self) + (self.after,)
@@ -0,0 +1,200 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+parallel
+
+renders responses with very large lists of objects (e.g. exports) in a pool of worker processes,
+so mapping and encoding them is not limited to a single core:
+
+    renderer = ParallelRenderer(workers=4, chunk_size=1000)
+
+    @jsonapi(render_bytes=True, parallel=renderer)
+    def get(...):
+        ...
+
+The objects are split into chunks, every chunk is mapped and encoded to json by a worker and
+the encoded chunks are joined in order. Included resources are collected per chunk and
+de-duplicated for the whole response. The response is the same as rendered in a single process,
+except that resources included by include paths (see DataMessage.include_paths) are ordered per chunk.
+
+The objects, the message classes and everything the mappings return are sent to the workers
+with pickle, so they have to be picklable and the message classes (and loaders of their Attributes)
+importable by the workers. Objects that can't be pickled (e.g. instances of ORMs bound to a session)
+can be turned into picklable snapshots first with the snapshot function, e.g. for plain dicts:
+
+    renderer = ParallelRenderer(snapshot=lambda row: types.SimpleNamespace(**row))
+
+Workers don't share the fragment cache of the decorator, so it is not used for these responses.
+If a worker dies (e.g. killed for using too much memory), the response is rendered in the process
+of the request and a new pool is started for the next one.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from janus.janus_logging import janus_logger
+from janus.encoders import get_encoder
+from janus.decorators import map_chunk
+
+def _render_chunk(objs, msg_class, include_relationships, include, do_nesting, fields, encoder):
+    #runs in a worker: returns the encoded resources of a chunk joined by "," and its included resources as list of ((type,id), resource).
+    included = {} if include_relationships else None
+    resources = map_chunk(objs,msg_class,included,do_nesting,None,fields,include)
+
+    data = b','.join([encoder.encode(resource) for resource in resources])
+    return data, list(included.items()) if included != None else None
+
+class ParallelRenderer(object):
+    """
+    Maps and encodes large lists of objects of responses in a pool of worker processes. (see jsonapi decorator)
+    It can be shared by all decorated functions and threads, the pool is started on first use.
+    workers => the number of worker processes. Defaults to the number of cores.
+    chunk_size => the number of objects mapped and encoded by a worker at a time.
+    min_size => lists with fewer objects are rendered in the process of the request, because sending them to
+                workers would take longer than rendering them. Defaults to twice the chunk_size.
+    snapshot => a function(obj) returning a picklable copy of an object, with all members the mappings need.
+    mp_context => the multiprocessing context of the pool. (e.g. multiprocessing.get_context("forkserver") for
+                  web servers with threads, where forking the process is not safe)
+    """
+
+    def __init__(self, workers=None, chunk_size=1000, min_size=None, snapshot=None, mp_context=None):
+        self.workers = workers if workers != None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.min_size = min_size if min_size != None else 2 * chunk_size
+        self.snapshot = snapshot
+        self.mp_context = mp_context
+
+        self.__executor = None
+        self.__lock = threading.Lock()
+
+    def applies(self, objs):
+        """
+        returns True if objs (the data of a response) should be rendered by the workers.
+        """
+        return isinstance(objs, (list, tuple)) and len(objs) >= self.min_size
+
+    def executor(self):
+        """
+        returns the pool of worker processes and starts it, if this wasn't done yet.
+        """
+        with self.__lock:
+            if self.__executor == None:
+                janus_logger.debug("Starting %d rendering workers.", self.workers)
+                self.__executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context)
+
+            return self.__executor
+
+    def close(self):
+        """
+        stops the worker processes. The next response rendered starts new ones.
+        """
+        with self.__lock:
+            executor = self.__executor
+            self.__executor = None
+
+        if executor != None:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def map(self, objs, msg_class, include_relationships=False, include=None, do_nesting=False, fields=None, encoder=None):
+        """
+        maps and encodes objs in the workers, like the jsonapi decorator would.
+        returns the encoded resources joined by "," and the included resources as list (None if include_relationships is False).
+        include => include paths as returned by DataMessage.parse_include, None to include all relationships.
+        fields => sparse fieldsets (see MessageSchema.restrict)
+        encoder => an encoder from janus.encoders or its name. (Defaults to the fastest installed one)
+        """
+        encoder = get_encoder(encoder)
+        chunks = self.__chunks(objs)
+        n = len(chunks)
+        executor = self.executor()
+        try:
+            results = list(executor.map(_render_chunk, chunks, [msg_class] * n, [include_relationships] * n, [include] * n, [do_nesting] * n, [fields] * n, [encoder] * n))
+        except BrokenProcessPool:
+            self.__drop(executor)
+            results = [_render_chunk(chunk, msg_class, include_relationships, include, do_nesting, fields, encoder) for chunk in chunks]
+
+        return self.__merge(results, include_relationships)
+
+    async def map_async(self, objs, msg_class, include_relationships=False, include=None, do_nesting=False, fields=None, encoder=None):
+        """
+        asyncio version of map, the event loop keeps running while the workers render.
+        """
+        encoder = get_encoder(encoder)
+        loop = asyncio.get_running_loop()
+        chunks = self.__chunks(objs)
+        executor = self.executor()
+        try:
+            results = await asyncio.gather(*[loop.run_in_executor(executor, _render_chunk, chunk, msg_class, include_relationships, include, do_nesting, fields, encoder)
+                                                for chunk in chunks])
+        except BrokenProcessPool:
+            self.__drop(executor)
+            results = []
+            for chunk in chunks:
+                results.append(_render_chunk(chunk, msg_class, include_relationships, include, do_nesting, fields, encoder))
+                await asyncio.sleep(0) #give control back to the event loop between chunks
+
+        return self.__merge(results, include_relationships)
+
+    def render(self, data, included=None, meta=None, links=None, encoder=None):
+        """
+        returns the json bytes of a response with data and included as returned by map,
+        laid out like JsonApiMessage.to_json_bytes renders it.
+        """
+        encoder = get_encoder(encoder)
+
+        json_bytes = b'{"data":[' + data + b']'
+        if included != None: json_bytes = json_bytes + b',"included":' + encoder.encode(included)
+        if meta != None: json_bytes = json_bytes + b',"meta":' + encoder.encode(meta)
+        if links != None: json_bytes = json_bytes + b',"links":' + encoder.encode(links)
+
+        return json_bytes + b'}'
+
+    def __drop(self, executor):
+        #drops a pool that can't be used anymore, because a worker died. The next response starts a new one.
+        janus_logger.warning("A rendering worker died, rendering the response in this process.")
+        with self.__lock:
+            if self.__executor is executor:
+                self.__executor = None
+
+        executor.shutdown(wait=False)
+
+    def __chunks(self, objs):
+        #splits objs into lists of chunk_size objects, as snapshots if a snapshot function is set.
+        chunks = []
+        for start in range(0, len(objs), self.chunk_size):
+            chunk = objs[start:start + self.chunk_size]
+            chunks.append([self.snapshot(obj) for obj in chunk] if self.snapshot != None else list(chunk))
+
+        janus_logger.debug("Rendering %d objects in %d chunks.", len(objs), len(chunks))
+        return chunks
+
+    def __merge(self, results, include_relationships):
+        #joins the results of all chunks in order. Resources included by several chunks are kept only once.
+        data = []
+        included = {} if include_relationships else None
+        for chunk_data, chunk_included in results:
+            if len(chunk_data) > 0:
+                data.append(chunk_data)
+
+            if included != None:
+                for key, resource in chunk_included:
+                    included.setdefault(key, resource)
+
+        return b','.join(data), list(included.values()) if included != None else None
@@ -0,0 +1,179 @@
+"""
+Copyright (c) 2018, xamoom GmbH
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+"""
+validators
+
+compiles the checks of Attribute values and of whole incoming resource objects once per DataMessage
+sub class, so the configuration of the Attributes is not looked at again on every message.
+Incoming resources are checked in one pass, collecting all errors with a JSON:API source pointer each
+(see http://jsonapi.org/format/#error-objects), before any message or backend object is built.
+See MessageSchema in janus.py.
+"""
+
+def _accepted(value_type):
+    #the types accepted for values of value_type read from python objects. (str also accepts bytes)
+    return (str, bytes) if value_type == str else value_type
+
+def compile_type_check(value_type, item_type=None):
+    """
+    returns a function(value) returning True if a value read from a python object (see DataMessage.map_object)
+    is of value_type. If item_type is set, all items of lists and all values of dicts have to be of item_type (or None).
+    """
+    accepted = _accepted(value_type)
+    if item_type == None or (value_type in (list, dict)) == False:
+        return lambda value: isinstance(value, accepted)
+
+    items = _accepted(item_type)
+    if value_type == list:
+        return lambda value: isinstance(value, list) and all(v is None or isinstance(v, items) for v in value)
+
+    return lambda value: isinstance(value, dict) and all(v is None or isinstance(v, items) for v in value.values())
+
+def _convertible(value_type, value):
+    #True if an Attribute of value_type accepts value from a request, converting it like Attribute.__set__ does.
+    if isinstance(value, (list, dict)): #json arrays and objects are no simple values
+        return False
+
+    try:
+        value_type(value)
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+    return True
+
+def compile_value_check(name, value_type, item_type=None):
+    """
+    returns a function(value) returning None if a value of a request (see DataMessage.map_message) can be
+    assigned to an Attribute of value_type and item_type, otherwise the detail of the error.
+    None (json null) is always accepted, like map_message converts it to None. (e.g. to clear an optional member)
+    name => the name of the Attribute, for the error detail.
+    """
+    def error(value, expected):
+        return "Expected " + expected + " got " + type(value).__name__ + " for " + name + "."
+
+    if value_type in (list, dict):
+        expected = value_type.__name__
+        if item_type == None:
+            return lambda value: None if value is None or isinstance(value, value_type) else error(value, expected)
+
+        def check_items(items):
+            for v in items:
+                if v is not None and type(v) is not item_type and _convertible(item_type, v) == False:
+                    return error(v, item_type.__name__ + " items")
+
+            return None
+
+        if value_type == list:
+            return lambda value: None if value is None else error(value, expected) if isinstance(value, list) == False else check_items(value)
+
+        return lambda value: None if value is None else error(value, expected) if isinstance(value, dict) == False else check_items(value.values())
+
+    #values of json types fitting value_type are accepted without trying to convert them.
+    accepted = {value_type, str, int, float, bool} if value_type == str else {value_type, int} if value_type == float else {value_type}
+    expected = value_type.__name__
+    return lambda value: None if value is None or type(value) in accepted or _convertible(value_type, value) else error(value, expected)
+
+def compile_validator(schema):
+    """
+    returns a function(resource, pointer) returning the errors of an incoming resource object (the data of a request)
+    of the DataMessage sub class of schema, as list of {'detail': ..., 'source': {'pointer': ...}}.
+    It checks everything DataMessage.map_message needs of the resource: that required members are present, that
+    attributes can be converted to their value_type and that relationships contain resource identifiers.
+    Nested records are checked with the validators of their classes.
+    pointer => the JSON pointer of the resource in the request, e.g. "/data" or "/data/3" for bulk requests.
+    """
+    id_check = compile_value_check('id', schema.id_attribute.value_type) if schema.id_attribute != None else None
+
+    attributes = [(field.attribute.name, field.attribute.required, compile_value_check(field.attribute.name, field.attribute.value_type, field.attribute.item_type))
+                    for field in schema.attributes
+                        if field.path != None and field.attribute.name != 'id']
+
+    nested = [(field.attribute.name, field.attribute.required, field.attribute.value_type)
+                for field in schema.nested
+                    if field.path != None and field.attribute.name != 'id']
+
+    relations = [(field.attribute.name, field.attribute.required)
+                    for field in schema.relations
+                        if field.key_path != None and field.attribute.name != 'id']
+
+    def fail(errors, detail, pointer):
+        errors.append({'detail': detail, 'source': {'pointer': pointer}})
+
+    def validate(resource, pointer):
+        errors = []
+        if isinstance(resource, dict) == False:
+            fail(errors, "Expected a resource object.", pointer)
+            return errors
+
+        if 'id' in resource and id_check != None:
+            detail = id_check(resource['id'])
+            if detail != None: fail(errors, detail, pointer + "/id")
+
+        relationships = resource.get('relationships')
+        if 'relationships' in resource and isinstance(relationships, dict) == False:
+            fail(errors, "Expected relationships to be an object.", pointer + "/relationships")
+            relationships = None
+
+        if 'attributes' in resource: #required members are only checked if attributes are sent, like map_message does.
+            values = resource['attributes']
+            if isinstance(values, dict) == False:
+                fail(errors, "Expected attributes to be an object.", pointer + "/attributes")
+                values = {}
+
+            for name, required, check in attributes:
+                if name in values:
+                    detail = check(values[name])
+                    if detail != None: fail(errors, detail, pointer + "/attributes/" + name)
+                elif required:
+                    fail(errors, "Missing required field " + name + ".", pointer + "/attributes/" + name)
+
+            if relationships != None:
+                for name, required, msg_class in nested:
+                    if name in relationships:
+                        member_pointer = pointer + "/relationships/" + name
+                        relationship = relationships[name]
+                        if isinstance(relationship, dict) == False or ('data' in relationship) == False:
+                            fail(errors, "Expected a relationship object with data.", member_pointer)
+                            continue
+
+                        data = relationship['data']
+                        validate_nested = msg_class._get_schema().validate
+                        if isinstance(data, list):
+                            for i, item in enumerate(data):
+                                errors.extend(validate_nested(item, member_pointer + "/data/" + str(i)))
+                        elif data != None:
+                            errors.extend(validate_nested(data, member_pointer + "/data"))
+                    elif required:
+                        fail(errors, "Missing required field " + name + ".", pointer + "/relationships/" + name)
+
+        if relationships != None:
+            for name, required in relations:
+                if name in relationships:
+                    member_pointer = pointer + "/relationships/" + name
+                    relationship = relationships[name]
+                    if isinstance(relationship, dict) == False or ('data' in relationship) == False:
+                        fail(errors, "Expected a relationship object with data.", member_pointer)
+                        continue
+
+                    #resource identifier objects
+                    data = relationship['data']
+                    if isinstance(data, list):
+                        for i, item in enumerate(data):
+                            if type(item) is not dict or ('id' in item) == False:
+                                fail(errors, "Expected a resource identifier with id.", member_pointer + "/data/" + str(i))
+                    elif data != None and (type(data) is not dict or ('id' in data) == False):
+                        fail(errors, "Expected a resource identifier with id.", member_pointer + "/data")
+                elif required:
+                    fail(errors, "Missing required field " + name + ".", pointer + "/relationships/" + name)
+
+        return errors
+
+    return validate
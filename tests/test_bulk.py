@@ -0,0 +1,118 @@
+"""
+Tests of bulk requests: DataMessage.from_message with an array of resources and DataMessage.update_objects.
+"""
+
+import pytest
+
+from janus.janus import Attribute, DataMessage
+from janus.exceptions import BadRequestException, NotFoundException
+from janus.janus_logging import janus_logger
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class Person(object):
+    #a backend object, whose age can only be set to numbers.
+    def __init__(self, id):
+        self.id = id
+        self.name = None
+        self.__age = None
+
+    @property
+    def age(self):
+        return self.__age
+
+    @age.setter
+    def age(self, value):
+        if value != None and value < 0:
+            raise ValueError("age can't be negative")
+        self.__age = value
+
+class PersonMessage(DataMessage):
+    type_name = "person"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name', required=True)
+    age = Attribute(value_type=int, name='age', mapping='age')
+
+@pytest.fixture(autouse=True)
+def quiet():
+    #invalid requests log their errors
+    janus_logger.disable()
+    yield
+    janus_logger.enable()
+
+def person(id, **attributes):
+    values = {'name': "person " + str(id)}
+    values.update(attributes)
+    return {'id': str(id), 'type': "person", 'attributes': values}
+
+def pointers(raised):
+    return [error['source']['pointer'] for error in raised.value.meta['errors']]
+
+def test_array_data_returns_list_of_messages():
+    messages = DataMessage.from_message({'data': [person(i, age=i) for i in range(3)]}, PersonMessage)
+
+    assert [(msg.id, msg.name, msg.age) for msg in messages] == [("0", "person 0", 0), ("1", "person 1", 1), ("2", "person 2", 2)]
+
+def test_empty_array_data():
+    assert DataMessage.from_message({'data': []}, PersonMessage) == []
+
+@pytest.mark.parametrize('validate', [True, False])
+def test_errors_point_at_resource(validate):
+    data = [person(0), person(1, age="old"), person(2)]
+    del data[2]['attributes']['name']
+
+    with pytest.raises(BadRequestException) as raised:
+        DataMessage.from_message({'data': data}, PersonMessage, validate=validate)
+
+    if validate:
+        assert pointers(raised) == ["/data/1/attributes/age", "/data/2/attributes/name"]
+    else: #errors of mapping point at the whole resource
+        assert pointers(raised) == ["/data/1", "/data/2"]
+    assert raised.value.meta['errors'][1]['detail'] == "Missing required field name."
+
+def test_update_objects_commits_once():
+    messages = DataMessage.from_message({'data': [person(i, age=i * 10) for i in range(3)]}, PersonMessage)
+    objs = [Person(str(i)) for i in range(3)]
+    commits = []
+
+    assert DataMessage.update_objects(messages, objs, commit_hook=commits.append) is objs
+
+    assert commits == [objs]
+    assert [(obj.name, obj.age) for obj in objs] == [("person 0", 0), ("person 1", 10), ("person 2", 20)]
+
+def test_update_objects_reports_every_failed_object():
+    messages = DataMessage.from_message({'data': [person(0, age=-1), person(1), person(2, age=-2)]}, PersonMessage)
+    objs = [Person(str(i)) for i in range(3)]
+    commits = []
+
+    with pytest.raises(BadRequestException) as raised:
+        DataMessage.update_objects(messages, objs, commit_hook=commits.append)
+
+    assert commits == [] #nothing is written if any object failed
+    assert pointers(raised) == ["/data/0", "/data/2"]
+    assert raised.value.meta['errors'][0]['detail'] == "age can't be negative"
+    assert raised.value.detail == "2 of 3 objects to update are invalid."
+
+def test_update_objects_raises_other_errors_as_they_are():
+    messages = DataMessage.from_message({'data': [person(0), person(1)]}, PersonMessage)
+    commits = []
+
+    class Missing(object):
+        def __setattr__(self, name, value):
+            raise NotFoundException(detail="gone")
+
+    with pytest.raises(NotFoundException):
+        DataMessage.update_objects(messages, [Person("0"), Missing()], commit_hook=commits.append)
+
+    assert commits == []
+
+def test_update_objects_needs_an_object_per_message():
+    messages = DataMessage.from_message({'data': [person(0), person(1)]}, PersonMessage)
+    commits = []
+
+    with pytest.raises(Exception, match="2 messages to update 1 objects"):
+        DataMessage.update_objects(messages, [Person("0")], commit_hook=commits.append)
+
+    assert commits == []
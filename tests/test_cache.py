@@ -0,0 +1,288 @@
+"""
+Tests of the caches in janus.cache.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from janus.janus import Attribute, DataMessage, JanusResponse
+from janus.decorators import jsonapi, async_jsonapi
+from janus.cache import FragmentCache, ResponseCache
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class Row(object):
+    mapped = 0 #how often the name of any row was read, i.e. a resource was mapped
+
+    def __init__(self, i, version=1, owner=None):
+        self.id = "row%d" % i
+        self.version = version
+        self.owner = owner
+        self.count = i
+        self.__name = "name %d" % i
+
+    def name(self):
+        Row.mapped = Row.mapped + 1
+        return self.__name
+
+class OwnerMessage(DataMessage):
+    type_name = "owner"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+
+class RowMessage(DataMessage):
+    type_name = "row"
+    version_mapping = 'version'
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+    count = Attribute(value_type=int, name='count', mapping='count')
+    owner = Attribute(value_type=OwnerMessage, name='owner', mapping='owner', key_mapping='owner.id', nested=True, nested_type=Obj)
+
+OWNER = Obj(id="o1", name="owner")
+
+def respond(rows, fragment_cache=None, **options):
+    @jsonapi(fragment_cache=fragment_cache, **options)
+    def get():
+        return JanusResponse(data=rows, message=RowMessage)
+
+    return get()
+
+OPTIONS = [
+    dict(),
+    dict(include_relationships=True),
+    dict(nest_in_responses=True),
+    dict(fields={'row': ["name"]}),
+]
+
+@pytest.mark.parametrize('options', OPTIONS, ids=repr)
+def test_fragment_cache_renders_like_mapping(options):
+    rows = [Row(i, owner=OWNER) for i in range(5)]
+    fragments = FragmentCache()
+
+    expected = respond(rows, **options)
+    assert respond(rows, fragments, **options) == expected
+
+    hits = fragments.stats()['hits']
+    assert respond(rows, fragments, **options) == expected
+    assert fragments.stats()['hits'] >= hits + len(rows)
+
+def test_fragment_cache_maps_only_changed_objects():
+    rows = [Row(i) for i in range(5)]
+    fragments = FragmentCache()
+    respond(rows, fragments)
+
+    rows[2] = Row(2, version=2)
+    rows[2].count = 20
+
+    Row.mapped = 0
+    response = respond(rows, fragments)
+    assert Row.mapped == 1
+    assert [resource['attributes']['count'] for resource in response['data']] == [0, 1, 20, 3, 4]
+
+def test_fragment_cache_skips_objects_without_version():
+    rows = [Row(i, version=None) for i in range(3)]
+    fragments = FragmentCache()
+    respond(rows, fragments)
+
+    assert len(fragments) == 0
+
+def test_fragment_cache_keys_sparse_fieldsets():
+    rows = [Row(i) for i in range(3)]
+    fragments = FragmentCache()
+
+    full = respond(rows, fragments)
+    sparse = respond(rows, fragments, fields={'row': ["count"]})
+
+    assert full == respond(rows)
+    assert sparse == respond(rows, fields={'row': ["count"]})
+    assert len(fragments) == 6
+
+def test_fragment_cache_evicts_least_recently_used():
+    fragments = FragmentCache(max_entries=3)
+    respond([Row(i) for i in range(5)], fragments)
+
+    assert len(fragments) == 3
+    assert fragments.stats()['evictions'] == 2
+
+def test_response_cache_shared_by_decorators_with_other_settings():
+    cache = ResponseCache()
+    rows = [Row(i, owner=OWNER) for i in range(3)]
+
+    def endpoint(**options):
+        @jsonapi(cached_get_hook=cache.get_hook, cached_set_hook=cache.set_hook, **options)
+        def get():
+            return JanusResponse(data=rows, message=RowMessage)
+
+        return get
+
+    plain = endpoint()
+    nested = endpoint(nest_in_responses=True)
+
+    assert plain() == respond(rows)
+    assert nested() == respond(rows, nest_in_responses=True)
+    assert plain() == respond(rows)
+    assert cache.stats()['hits'] == 1
+
+def test_response_cache_not_used_for_streamed_responses():
+    cache = ResponseCache(wait_timeout=5)
+    rows = [Row(i) for i in range(3)]
+
+    @jsonapi(cached_get_hook=cache.get_hook, cached_set_hook=cache.set_hook, stream=True)
+    def get():
+        return JanusResponse(data=rows, message=RowMessage)
+
+    get() #never consumed, so it would never be passed to cached_set_hook
+    thread = threading.Thread(target=lambda: b''.join(get()))
+    start = time.monotonic()
+    thread.start()
+    thread.join()
+
+    assert time.monotonic() - start < 1
+    assert cache.stats()['misses'] == 0 and len(cache) == 0
+
+def test_response_cache_releases_waiting_requests_if_rendering_fails():
+    cache = ResponseCache(wait_timeout=5)
+    rows = [Row(i) for i in range(3)]
+
+    @jsonapi(cached_get_hook=cache.get_hook, cached_set_hook=cache.set_hook)
+    def get():
+        return JanusResponse(data=rows, message=RowMessage)
+
+    rows[1].count = "1" #fails to render
+    assert 'errors' in get()
+
+    rows[1].count = 1
+    responses = []
+    thread = threading.Thread(target=lambda: responses.append(get()))
+    start = time.monotonic()
+    thread.start()
+    thread.join()
+
+    assert time.monotonic() - start < 1 #did not wait for the failed request
+    assert responses == [respond(rows)]
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", {'n': 1})
+    cache.set("b", {'n': 2})
+    cache.get("a") #a is used more recently than b now
+    cache.set("c", {'n': 3})
+
+    assert cache.get("b") == None
+    assert cache.get("a") == {'n': 1} and cache.get("c") == {'n': 3}
+    assert cache.stats()['evictions'] == 1
+
+def test_response_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = ResponseCache(ttl=10)
+    cache.set("a", {'n': 1})
+
+    now[0] = 1009.0
+    assert cache.get("a") == {'n': 1}
+
+    now[0] = 1010.0
+    assert cache.get("a") == None
+    assert cache.stats()['expirations'] == 1 and len(cache) == 0
+
+def test_response_cache_bounded_by_bytes():
+    cache = ResponseCache(max_entries=None, max_bytes=20)
+    cache.set("a", b"x" * 8)
+    cache.set("b", b"y" * 8)
+    assert cache.stats()['bytes'] == 16
+
+    cache.set("c", b"z" * 8) #evicts a
+    assert cache.get("a") == None and cache.get("b") != None
+    assert cache.stats()['bytes'] == 16 and cache.stats()['evictions'] == 1
+
+    cache.set("d", b"w" * 21) #never cached, it can't fit
+    assert cache.get("d") == None and cache.stats()['bytes'] == 16
+
+    cache.invalidate()
+    assert cache.stats()['bytes'] == 0 and len(cache) == 0
+
+def test_response_cache_counters():
+    cache = ResponseCache()
+    rows = [Row(i) for i in range(3)]
+
+    @jsonapi(cached_get_hook=cache.get_hook, cached_set_hook=cache.set_hook)
+    def get():
+        return JanusResponse(data=rows, message=RowMessage)
+
+    expected = get()
+    assert get() == expected
+    assert get() == expected
+
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 0, 'expirations': 0, 'coalesced': 0, 'entries': 1, 'bytes': cache.stats()['bytes']}
+    assert cache.stats()['bytes'] > 0
+
+class SlowRow(Row):
+    renders = 0 #how often any slow row was mapped
+
+    def name(self):
+        if self.id == "row0":
+            SlowRow.renders = SlowRow.renders + 1
+            time.sleep(0.2) #long enough for all requests to miss the cache at once
+
+        return Row.name(self)
+
+def test_response_cache_coalesces_concurrent_misses():
+    cache = ResponseCache(wait_timeout=5)
+    rows = [SlowRow(i) for i in range(3)]
+    SlowRow.renders = 0
+
+    @jsonapi(cached_get_hook=cache.get_hook, cached_set_hook=cache.set_hook)
+    def get():
+        return JanusResponse(data=rows, message=RowMessage)
+
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(get())) for i in range(5)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+
+    assert SlowRow.renders == 1
+    assert len(responses) == 5 and all(response == responses[0] for response in responses)
+    assert cache.stats()['misses'] == 1 and cache.stats()['coalesced'] == 4
+
+def test_response_cache_coalesces_concurrent_tasks():
+    cache = ResponseCache(wait_timeout=5)
+    rows = [Row(i) for i in range(3)]
+    renders = [0]
+
+    @async_jsonapi(cached_get_hook=cache.async_get_hook, cached_set_hook=cache.set_hook)
+    async def get():
+        renders[0] = renders[0] + 1
+        await asyncio.sleep(0.1) #all tasks miss the cache meanwhile
+        return JanusResponse(data=rows, message=RowMessage)
+
+    async def run():
+        return await asyncio.gather(*[get() for i in range(5)])
+
+    responses = asyncio.run(run())
+
+    assert renders == [5] #the decorated function runs before the cache is looked at
+    assert all(response == respond(rows) for response in responses)
+    assert cache.stats()['misses'] == 1 and cache.stats()['coalesced'] == 4
+
+def test_response_cache_get_hook_never_blocks_other_tasks():
+    cache = ResponseCache(wait_timeout=5)
+    rows = [Row(i) for i in range(3)]
+
+    @async_jsonapi(cached_get_hook=cache.get_hook, cached_set_hook=cache.set_hook)
+    async def get():
+        await asyncio.sleep(0.1)
+        return JanusResponse(data=rows, message=RowMessage)
+
+    async def run():
+        return await asyncio.gather(*[get() for i in range(3)])
+
+    start = time.monotonic()
+    responses = asyncio.run(run())
+
+    assert time.monotonic() - start < 1
+    assert all(response == respond(rows) for response in responses)
@@ -0,0 +1,157 @@
+"""
+Tests that message classes compiled with DataMessage.compile (see janus.codegen) map and render
+exactly like the generic map_object and to_dict, and raise the same errors, for every configuration of Attributes.
+"""
+
+import pytest
+
+from janus.janus import Attribute, DataMessage
+from janus.janus_logging import janus_logger
+from janus.loaders import DictLoader
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+TAGS = {"t1": Obj(id="t1", label="one"), "t2": Obj(id="t2", label="two")}
+
+MISSING = object() #the backend object has no members for the value
+
+#Attribute configurations of member "member" of the tested message class. Related classes are given by name.
+ATTRIBUTES = {
+    'str': dict(value_type=str, mapping='value'),
+    'required': dict(value_type=str, mapping='value', required=True),
+    'int': dict(value_type=int, mapping='value'),
+    'float': dict(value_type=float, mapping='value'),
+    'bool': dict(value_type=bool, mapping='value'),
+    'bytes': dict(value_type=bytes, mapping='value'),
+    'list': dict(value_type=list, mapping='value'),
+    'list item_type': dict(value_type=list, mapping='value', item_type=str),
+    'dict': dict(value_type=dict, mapping='value'),
+    'dict item_type': dict(value_type=dict, mapping='value', item_type=int),
+    'dotted mapping': dict(value_type=str, mapping='inner.value'),
+    'callable mapping': dict(value_type=str, mapping='get_value'),
+    'no python name': dict(value_type=str, mapping='inner.odd-name'),
+    'write_only': dict(value_type=str, mapping='value', write_only=True),
+    'no mapping': dict(value_type=str),
+    'id in other member': dict(value_type=str, mapping='value', name='id'),
+    'relationship': dict(value_type='TagMessage', mapping='tag', key_mapping='tag_id'),
+    'required relationship': dict(value_type='TagMessage', mapping='tag', key_mapping='tag_id', required=True),
+    'dotted key_mapping': dict(value_type='TagMessage', mapping='tag', key_mapping='tag.id'),
+    'to-many relationship': dict(value_type='TagMessage', mapping='tags', key_mapping='tag_ids'),
+    'loader': dict(value_type='TagMessage', mapping='tag', key_mapping='tag_id', loader=DictLoader(TAGS)),
+    'nested': dict(value_type='AddressMessage', mapping='address', key_mapping='address.id', nested=True, nested_type=Obj),
+    'required nested': dict(value_type='AddressMessage', mapping='address', key_mapping='address.id', nested=True, nested_type=Obj, required=True),
+}
+
+VALUES = ["x", 5, 1.5, True, b"x", ["a", 1], ["a", None], {'a': 1}, {'a': "1"}, "t1", ["t1", "t2"], 7, None, MISSING]
+
+MODES = [
+    dict(include_relationships=True, do_nesting=False, fields=None),
+    dict(include_relationships=False, do_nesting=False, fields=None),
+    dict(include_relationships=True, do_nesting=True, fields=None),
+    dict(include_relationships=True, do_nesting=True, fields={'person': "id,member", 'address': ["city"]}),
+    dict(include_relationships=True, do_nesting=False, fields={'person': ["id"]}),
+]
+
+@pytest.fixture(autouse=True)
+def quiet():
+    #the error cases would log every error
+    janus_logger.disable()
+    yield
+    janus_logger.enable()
+
+def message_class(config, compiled):
+    #the message classes for an Attribute configuration, with the same names for generic and compiled ones.
+    class TagMessage(DataMessage):
+        type_name = "tag"
+        id = Attribute(value_type=str, name='id', mapping='id')
+        label = Attribute(value_type=str, name='label', mapping='label')
+
+    class AddressMessage(DataMessage):
+        type_name = "address"
+        id = Attribute(value_type=int, name='id', mapping='id')
+        city = Attribute(value_type=str, name='city', mapping='city', required=True)
+        tags = Attribute(value_type=TagMessage, name='tags', mapping='tags', key_mapping='tag_ids')
+
+    kwargs = dict(ATTRIBUTES[config])
+    if isinstance(kwargs['value_type'], str):
+        kwargs['value_type'] = {'TagMessage': TagMessage, 'AddressMessage': AddressMessage}[kwargs['value_type']]
+    kwargs.setdefault('name', 'member')
+
+    members = {'type_name': "person", 'member': Attribute(**kwargs)}
+    if kwargs['name'] != 'id':
+        members['id'] = Attribute(value_type=str, name='id', mapping='key')
+
+    msg_class = type("PersonMessage", (DataMessage,), members)
+    if compiled:
+        DataMessage.compile(TagMessage)
+        AddressMessage.compile()
+        msg_class.compile()
+
+    return msg_class
+
+def backend_object(value):
+    obj = Obj(key="p1")
+    if value is MISSING:
+        return obj
+
+    inner = Obj(value=value)
+    setattr(inner, 'odd-name', value)
+
+    obj.value = value
+    obj.inner = inner
+    obj.get_value = lambda: value
+    obj.tag_id = value
+    obj.tag = TAGS.get(value) if isinstance(value, str) else None
+    obj.tag_ids = value
+    obj.tags = [TAGS[v] for v in value if v in TAGS] if isinstance(value, list) else None
+    obj.address = Obj(id=value, city="Graz", tags=[TAGS["t1"]], tag_ids=["t1"]) if value != None else None
+    return obj
+
+def render(msg_class, obj, mode):
+    #everything map_object and to_dict produce, or the error they raise.
+    try:
+        msg = msg_class()
+        msg.map_object(obj, mode['include_relationships'], do_nesting=mode['do_nesting'], fields=mode['fields'])
+        keys = sorted((attribute.name, repr(key)) for attribute, key in msg._keys.items())
+        return (msg.to_dict(), msg.to_dict(do_nesting=mode['do_nesting']), keys, sorted(attribute.name for attribute in msg._updated))
+    except Exception as e:
+        return (type(e).__name__, str(e))
+
+@pytest.mark.parametrize('value', VALUES, ids=repr)
+@pytest.mark.parametrize('config', sorted(ATTRIBUTES))
+def test_compiled_like_generic(config, value):
+    generic = message_class(config, compiled=False)
+    compiled = message_class(config, compiled=True)
+    obj = backend_object(value)
+
+    for mode in MODES:
+        assert render(compiled, obj, mode) == render(generic, obj, mode), mode
+
+def test_compile_generates_functions():
+    generic = message_class('str', compiled=False)
+    compiled = message_class('str', compiled=True)
+
+    assert generic._get_schema().compiled_map_object == None
+    assert compiled._get_schema().compiled_map_object != None
+    assert compiled._get_schema().compiled_to_dict != None
+    assert compiled._get_schema().restrict({'person': ["id"]}).compiled_map_object != None
+
+def test_compile_as_class_decorator_compiles_sub_classes():
+    @DataMessage.compile
+    class BaseMessage(DataMessage):
+        id = Attribute(value_type=str, name='id', mapping='id')
+
+    class SubMessage(BaseMessage):
+        name = Attribute(value_type=str, name='name', mapping='name')
+
+    assert SubMessage._get_schema().compiled_to_dict != None
+    assert SubMessage().map_object(Obj(id="1", name="a")).to_dict() == {'id': "1", 'type': "SubMessage", 'attributes': {'name': "a"}}
+
+def test_members_changed_after_compile():
+    compiled = message_class('str', compiled=True)
+    compiled.extra = Attribute(value_type=int, name='extra', mapping='extra')
+
+    msg = compiled().map_object(Obj(key="p1", value="a", extra=1))
+    assert msg.to_dict()['attributes'] == {'member': "a", 'extra': 1}
@@ -0,0 +1,126 @@
+"""
+Tests of the responses of the jsonapi and async_jsonapi decorators.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from janus.janus import Attribute, DataMessage, JanusResponse, JsonApiMessage
+from janus.decorators import jsonapi, async_jsonapi
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class AuthorMessage(DataMessage):
+    type_name = "author"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+
+class ArticleMessage(DataMessage):
+    type_name = "article"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    title = Attribute(value_type=str, name='title', mapping='title')
+    author = Attribute(value_type=AuthorMessage, name='author', mapping='author', key_mapping='author.id')
+
+AUTHORS = [Obj(id="a%d" % i, name="author %d" % i) for i in range(3)]
+
+def articles(count=10):
+    return [Obj(id=str(i), title="title %d" % i, author=AUTHORS[i % 3]) for i in range(count)]
+
+def respond(data, **options):
+    @jsonapi(**options)
+    def get():
+        return JanusResponse(data=data, message=ArticleMessage)
+
+    return get()
+
+def respond_async(data, **options):
+    @async_jsonapi(**options)
+    async def get():
+        return JanusResponse(data=data, message=ArticleMessage)
+
+    return asyncio.run(get())
+
+async def consume(chunks):
+    return b''.join([chunk async for chunk in chunks])
+
+OPTIONS = [dict(), dict(include_relationships=True), dict(nest_in_responses=True), dict(include="author", meta={'a': 1}, links={'self': "/articles"})]
+
+@pytest.mark.parametrize('options', OPTIONS, ids=repr)
+def test_iterator_mapped_like_list(options):
+    expected = respond(articles(), **options)
+
+    assert len(expected['data']) == 10
+    assert respond(iter(articles()), **options) == expected
+    assert respond((a for a in articles()), **options) == expected
+    assert respond_async(iter(articles()), **options) == expected
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 100])
+@pytest.mark.parametrize('options', OPTIONS, ids=repr)
+def test_streamed_bytes_equal_rendered_bytes(options, chunk_size):
+    expected = respond(articles(), render_bytes=True, **options)
+
+    assert json.loads(expected) == respond(articles(), **options)
+    assert b''.join(respond(articles(), stream=True, stream_chunk_size=chunk_size, **options)) == expected
+    assert b''.join(respond(iter(articles()), stream=True, stream_chunk_size=chunk_size, **options)) == expected
+    assert asyncio.run(consume(respond_async(iter(articles()), stream=True, stream_chunk_size=chunk_size, **options))) == expected
+
+def test_streamed_bytes_equal_to_json_bytes():
+    data = DataMessage.from_object(articles(7), ArticleMessage)
+    message = JsonApiMessage(data=data, meta={'count': 7})
+
+    assert b''.join(message.iter_json_bytes(chunk_size=2)) == message.to_json_bytes()
+
+def test_stream_maps_on_demand():
+    read = []
+    def source():
+        for article in articles(10):
+            read.append(article.id)
+            yield article
+
+    chunks = respond(source(), stream=True, stream_chunk_size=4)
+    assert read == []
+
+    next(chunks) #the start of the document
+    next(chunks)
+    assert len(read) == 4
+
+@pytest.mark.parametrize('options', OPTIONS, ids=repr)
+def test_async_like_sync(options):
+    for render_bytes in (False, True):
+        expected = respond(articles(250), render_bytes=render_bytes, **options)
+        assert respond_async(articles(250), render_bytes=render_bytes, yield_every=7, **options) == expected
+
+def test_async_streams_stream_chunk_size_resources():
+    sync_chunks = list(respond(articles(10), stream=True, stream_chunk_size=3))
+
+    async def collect(chunks):
+        return [chunk async for chunk in chunks]
+
+    assert asyncio.run(collect(respond_async(articles(10), stream=True, stream_chunk_size=3, yield_every=100))) == sync_chunks
+
+@pytest.mark.parametrize('render_bytes', [False, True])
+@pytest.mark.parametrize('options', OPTIONS, ids=repr)
+def test_async_gives_control_back_to_event_loop(options, render_bytes):
+    @async_jsonapi(yield_every=10, render_bytes=render_bytes, **options)
+    async def get():
+        return JanusResponse(data=articles(500), message=ArticleMessage)
+
+    async def run():
+        ticks = [0]
+        async def tick():
+            while True:
+                ticks[0] = ticks[0] + 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.ensure_future(tick())
+        await asyncio.sleep(0)
+        start = ticks[0]
+        await get()
+        ticker.cancel()
+        return ticks[0] - start
+
+    assert asyncio.run(run()) >= 100 #at least once per chunk for mapping and once for rendering
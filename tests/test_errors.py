@@ -0,0 +1,104 @@
+"""
+Tests of error documents: ErrorMessage.to_json, which converts the static parts of errors only once
+per kind of error, has to return exactly what to_dict serialized to json and parsed again returns.
+"""
+
+import json
+
+import pytest
+
+from janus.janus import Attribute, DataMessage, ErrorMessage, JanusResponse, JsonApiMessage
+from janus.decorators import jsonapi
+from janus.exceptions import BadRequestException, NotFoundException, InternalServerErrorException
+from janus.janus_logging import janus_logger
+
+@pytest.fixture(autouse=True)
+def quiet():
+    #failed requests log their errors
+    janus_logger.disable()
+    yield
+    janus_logger.enable()
+
+def exceptions():
+    return [
+        BadRequestException(detail="Missing required field name."),
+        BadRequestException(detail="2 fields of the request are invalid.", meta={'errors': [{'detail': "a", 'source': {'pointer': "/data/id"}}, {'detail': "b"}]}),
+        NotFoundException(detail="not found"),
+        InternalServerErrorException(detail="failed", meta={'values': (1, 2.5, None, True)}),
+        ValueError("not janus"),
+        KeyError("key"),
+    ]
+
+def error_message(exception, detail=None, traceback=None):
+    err_msg = ErrorMessage.from_exception(exception)
+    if detail != None:
+        err_msg.detail = detail
+    err_msg.traceback = traceback
+    return err_msg
+
+def expected(err_msg):
+    return json.loads(json.dumps(err_msg.to_dict()))
+
+@pytest.mark.parametrize('exception', exceptions(), ids=repr)
+@pytest.mark.parametrize('traceback', [None, "Traceback (most recent call last): ..."], ids=["", "traceback"])
+def test_to_json_matches_to_dict(exception, traceback):
+    err_msg = error_message(exception, traceback=traceback)
+
+    assert err_msg.to_json() == expected(err_msg)
+
+@pytest.mark.parametrize('detail', [{'field': "name"}, ["a", "b"], 42, 1.5, False], ids=repr)
+def test_detail_of_any_type(detail):
+    err_msg = error_message(BadRequestException(), detail=detail)
+
+    assert err_msg.to_json() == expected(err_msg)
+
+def test_document_matches_to_dict():
+    errors = [error_message(e) for e in exceptions()]
+    message = JsonApiMessage(errors=errors, meta={'request': ("id", 1)}, links={'about': "http://example.com"})
+
+    assert message.to_json() == json.loads(json.dumps(message.to_dict()))
+    assert JsonApiMessage(errors=errors[0]).to_json() == json.loads(json.dumps(JsonApiMessage(errors=errors[0]).to_dict()))
+
+def test_traceback_does_not_change_meta_of_exception():
+    exception = BadRequestException(detail="bad", meta={'field': "name"})
+    err_msg = error_message(exception, traceback="tb")
+
+    assert err_msg.to_dict()['meta'] == {'field': "name", 'traceback': "tb"}
+    assert err_msg.to_json()['meta'] == {'field': "name", 'traceback': "tb"}
+    assert exception.meta == {'field': "name"}
+
+def test_documents_do_not_share_parts():
+    first = error_message(BadRequestException(detail="first")).to_json()
+    first['title'] = "changed"
+    first['status'] = 0
+
+    second = error_message(BadRequestException(detail="second")).to_json()
+    assert second['title'] == BadRequestException().title and second['status'] == BadRequestException().status
+
+def test_ids_are_unique():
+    ids = [error_message(e).id for e in exceptions() + exceptions()]
+
+    assert len(set(ids)) == len(ids)
+
+class ArticleMessage(DataMessage):
+    type_name = "article"
+    id = Attribute(value_type=str, name='id', mapping='id')
+
+@pytest.mark.parametrize('include_traceback', [False, True])
+@pytest.mark.parametrize('render_bytes', [False, True])
+def test_decorator_renders_error_document(include_traceback, render_bytes):
+    hooked = []
+
+    @jsonapi(include_traceback_in_errors=include_traceback, render_bytes=render_bytes, error_hook=lambda status, err_msg, tb: hooked.append((status, err_msg, tb)))
+    def get():
+        raise NotFoundException(detail="no article", meta={'id': "1"})
+
+    response = get()
+    if render_bytes:
+        response = json.loads(response)
+
+    status, err_msg, tb = hooked[0]
+    assert response == {'errors': [expected(err_msg)]}
+    assert status == 404 and "NotFoundException" in tb
+    assert response['errors'][0]['detail'] == "no article"
+    assert ('traceback' in response['errors'][0]['meta']) == include_traceback
@@ -0,0 +1,142 @@
+"""
+Tests of sparse fieldsets (see http://jsonapi.org/format/#fetching-sparse-fieldsets): attributes and relationships
+that are not requested are neither rendered nor mapped.
+"""
+
+import pytest
+
+from janus.janus import Attribute, DataMessage, JanusResponse
+from janus.decorators import jsonapi
+
+READ = [] #(type, member) of every mapping and key_mapping read from the backend objects
+
+class Author(object):
+    def __init__(self, i):
+        self.id = "a%d" % i
+        self.i = i
+
+    @property
+    def name(self):
+        READ.append(("author", "name"))
+        return "author %d" % self.i
+
+    @property
+    def email(self):
+        READ.append(("author", "email"))
+        return "author%d@example.com" % self.i
+
+class Article(object):
+    def __init__(self, i, author):
+        self.id = "%d" % i
+        self.i = i
+        self.writer = author
+
+    @property
+    def title(self):
+        READ.append(("article", "title"))
+        return "title %d" % self.i
+
+    @property
+    def body(self):
+        READ.append(("article", "body"))
+        return "body %d" % self.i
+
+    @property
+    def author(self):
+        READ.append(("article", "author"))
+        return self.writer
+
+    @property
+    def author_id(self):
+        READ.append(("article", "author_id"))
+        return self.writer.id
+
+def message_classes(compiled):
+    #new message classes for every test, so compiling them doesn't change the ones of other tests.
+    class AuthorMessage(DataMessage):
+        type_name = "author"
+        id = Attribute(value_type=str, name='id', mapping='id')
+        name = Attribute(value_type=str, name='name', mapping='name')
+        email = Attribute(value_type=str, name='email', mapping='email')
+
+    class ArticleMessage(DataMessage):
+        type_name = "article"
+        id = Attribute(value_type=str, name='id', mapping='id')
+        title = Attribute(value_type=str, name='title', mapping='title')
+        body = Attribute(value_type=str, name='body', mapping='body')
+        author = Attribute(value_type=AuthorMessage, name='author', mapping='author', key_mapping='author_id')
+
+    if compiled:
+        DataMessage.compile(ArticleMessage)
+        DataMessage.compile(AuthorMessage)
+
+    return ArticleMessage
+
+@pytest.fixture(params=[False, True], ids=["generic", "compiled"])
+def message(request):
+    return message_classes(request.param)
+
+@pytest.fixture
+def articles():
+    authors = [Author(i) for i in range(2)]
+    return [Article(i, authors[i % 2]) for i in range(4)]
+
+def respond(articles, message, decorator_fields=None, **response):
+    @jsonapi(include_relationships=True, fields=decorator_fields)
+    def get():
+        return JanusResponse(data=articles, message=message, **response)
+
+    del READ[:]
+    return get()
+
+def test_only_requested_attributes_are_mapped(articles, message):
+    response = respond(articles, message, fields={'article': ["title"]})
+
+    assert response['data'][0] == {'id': "0", 'type': "article", 'attributes': {'title': "title 0"}}
+    assert 'included' not in response or response['included'] == []
+    assert set(READ) == {("article", "title")}
+
+def test_requested_relationship_is_mapped(articles, message):
+    response = respond(articles, message, fields={'article': "body,author"})
+
+    assert response['data'][1]['attributes'] == {'body': "body 1"}
+    assert response['data'][1]['relationships'] == {'author': {'data': {'type': "author", 'id': "a1"}}}
+    assert ("article", "title") not in READ
+
+def test_included_resources_are_restricted(articles, message):
+    response = respond(articles, message, fields={'article': ["author"], 'author': ["email"]})
+
+    assert sorted(resource['id'] for resource in response['included']) == ["a0", "a1"]
+    assert all(resource['attributes'] == {'email': resource['id'].replace("a", "author") + "@example.com"} for resource in response['included'])
+    assert ("author", "name") not in READ and ("article", "title") not in READ and ("article", "body") not in READ
+
+def test_types_without_fieldset_are_not_restricted(articles, message):
+    response = respond(articles, message, fields={'author': ["name"]})
+
+    assert sorted(response['data'][0]['attributes']) == ["body", "title"]
+    assert response['included'][0]['attributes'] == {'name': "author 0"}
+    assert ("author", "email") not in READ
+
+def test_fields_of_response_overrule_decorator(articles, message):
+    response = respond(articles, message, decorator_fields={'article': ["title"]}, fields={'article': ["body"]})
+
+    assert response['data'][0]['attributes'] == {'body': "body 0"}
+    assert set(READ) == {("article", "body")}
+
+def test_fields_of_decorator(articles, message):
+    response = respond(articles, message, decorator_fields={'article': ["title"]})
+
+    assert response['data'][0]['attributes'] == {'title': "title 0"}
+    assert set(READ) == {("article", "title")}
+
+def test_unknown_attributes_are_ignored(articles, message):
+    response = respond(articles, message, fields={'article': ["title", "unknown"]})
+
+    assert response['data'][0]['attributes'] == {'title': "title 0"}
+
+def test_from_object_with_fields(articles, message):
+    del READ[:]
+    msg = DataMessage.from_object(articles[0], message, fields={'article': ["body"]})
+
+    assert msg.to_dict() == {'id': "0", 'type': "article", 'attributes': {'body': "body 0"}}
+    assert set(READ) == {("article", "body")}
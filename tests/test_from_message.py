@@ -0,0 +1,103 @@
+"""
+Tests of DataMessage.from_message with the request body in the forms web frameworks pass it.
+"""
+
+import json
+
+import pytest
+
+import janus.janus
+from janus.janus import Attribute, DataMessage
+from janus.janus_logging import janus_logger
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class AddressMessage(DataMessage):
+    type_name = "address"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    city = Attribute(value_type=str, name='city', mapping='city')
+
+class TagMessage(DataMessage):
+    type_name = "tag"
+    id = Attribute(value_type=str, name='id', mapping='id')
+
+class PersonMessage(DataMessage):
+    type_name = "person"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+    address = Attribute(value_type=AddressMessage, name='address', mapping='address', key_mapping='address.id', nested=True, nested_type=Obj)
+    homes = Attribute(value_type=AddressMessage, name='homes', mapping='homes', key_mapping='home_ids', nested=True, nested_type=Obj)
+    tags = Attribute(value_type=TagMessage, name='tags', mapping='tags', key_mapping='tag_ids')
+
+@pytest.fixture(autouse=True)
+def quiet():
+    #invalid requests log their errors
+    janus_logger.disable()
+    yield
+    janus_logger.enable()
+
+BODY = {'data': {
+    'id': "1",
+    'type': "person",
+    'attributes': {'name': "Ada"},
+    'relationships': {
+        'address': {'data': {'id': "a1", 'type': "address", 'attributes': {'city': "Graz"}}},
+        'homes': {'data': [{'id': "a2", 'type': "address", 'attributes': {'city': "Wien"}}, {'id': "a3", 'type': "address", 'attributes': {'city': "Linz"}}]},
+        'tags': {'data': [{'id': "t1", 'type': "tag"}, {'id': "t2", 'type': "tag"}]},
+    },
+}}
+
+TEXT = json.dumps(BODY)
+
+BODIES = [
+    TEXT,
+    TEXT.encode('utf-8'),
+    bytearray(TEXT.encode('utf-8')),
+    memoryview(TEXT.encode('utf-8')),
+    json.loads(TEXT),
+]
+
+def summary(msg):
+    return (msg.id, msg.name, msg.address.id, msg.address.city, [home.city for home in msg.homes], [tag.id for tag in msg.tags])
+
+@pytest.mark.parametrize('body', BODIES, ids=lambda body: type(body).__name__)
+def test_every_form_of_body_gives_same_message(body):
+    msg = DataMessage.from_message(body, PersonMessage)
+
+    assert summary(msg) == ("1", "Ada", "a1", "Graz", ["Wien", "Linz"], ["t1", "t2"])
+
+@pytest.mark.parametrize('body', BODIES, ids=lambda body: type(body).__name__)
+def test_body_is_parsed_at_most_once(body, monkeypatch):
+    parsed = []
+    loads = json.loads
+    monkeypatch.setattr(janus.janus.json, 'loads', lambda s, **kwargs: parsed.append(s) or loads(s, **kwargs))
+    monkeypatch.setattr(janus.janus.json, 'dumps', lambda *args, **kwargs: pytest.fail("nested records are encoded again"))
+
+    DataMessage.from_message(body, PersonMessage)
+
+    assert len(parsed) == (0 if isinstance(body, dict) else 1)
+
+def test_parsed_body_is_not_changed():
+    body = json.loads(TEXT)
+    DataMessage.from_message(body, PersonMessage)
+
+    assert body == BODY
+
+def test_nested_record_updates_object():
+    msg = DataMessage.from_message(json.loads(TEXT), PersonMessage)
+    obj = Obj(id="1", name="", address=None, homes=None, tag_ids=[])
+
+    msg.update_object(obj)
+
+    assert obj.name == "Ada" and obj.address.city == "Graz"
+    assert [home.city for home in obj.homes] == ["Wien", "Linz"]
+
+@pytest.mark.parametrize('body', ["null", b"null"], ids=repr)
+def test_empty_body(body):
+    assert DataMessage.from_message(body, PersonMessage) == None
+
+def test_body_without_data():
+    with pytest.raises(Exception, match="missing data"):
+        DataMessage.from_message({'meta': {}}, PersonMessage)
@@ -0,0 +1,177 @@
+"""
+Tests of include paths (see http://jsonapi.org/format/#fetching-includes): DataMessage.parse_include,
+DataMessage.include_paths and the include settings of JanusResponse and the jsonapi decorator.
+"""
+
+import pytest
+
+from janus.janus import Attribute, DataMessage, JanusResponse
+from janus.decorators import jsonapi
+from janus.exceptions import BadRequestException
+from janus.janus_logging import janus_logger
+
+READ = [] #relationships read from the backend objects using their mapping
+LOADED = [] #keys of every call of the person loader
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class Company(object):
+    def __init__(self, id):
+        self.id = id
+
+class Person(object):
+    def __init__(self, id):
+        self.id = id
+        self.name = "person " + id
+        self.company = Company("c-" + id)
+
+    @property
+    def employer(self):
+        READ.append("employer")
+        return self.company
+
+PEOPLE = {id: Person(id) for id in ["p0", "p1", "p2", "p3"]}
+
+def load_people(keys):
+    LOADED.append(sorted(keys))
+    return {key: PEOPLE.get(key) for key in keys}
+
+class Comment(object):
+    def __init__(self, id, author_id):
+        self.id = id
+        self.author_id = author_id
+
+class Article(object):
+    def __init__(self, id, author_id, comments):
+        self.id = id
+        self.author_id = author_id
+        self.__comments = comments
+
+    @property
+    def comments(self):
+        READ.append("comments")
+        return self.__comments
+
+class CompanyMessage(DataMessage):
+    type_name = "company"
+    id = Attribute(value_type=str, name='id', mapping='id')
+
+class PersonMessage(DataMessage):
+    type_name = "person"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+    employer = Attribute(value_type=CompanyMessage, name='employer', mapping='employer', key_mapping='company.id')
+
+class CommentMessage(DataMessage):
+    type_name = "comment"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    author = Attribute(value_type=PersonMessage, name='author', key_mapping='author_id', loader=load_people)
+
+class ArticleMessage(DataMessage):
+    type_name = "article"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    author = Attribute(value_type=PersonMessage, name='author', key_mapping='author_id', loader=load_people)
+    comments = Attribute(value_type=CommentMessage, name='comments', mapping='comments', key_mapping='comment_ids')
+
+@pytest.fixture(autouse=True)
+def quiet():
+    #invalid requests log their errors
+    janus_logger.disable()
+    yield
+    janus_logger.enable()
+
+def articles():
+    #article a0 is written by p0 and commented by p1 and p2, a1 is written by p0 and commented by p1.
+    return [
+        Article("a0", "p0", [Comment("c0", "p1"), Comment("c1", "p2")]),
+        Article("a1", "p0", [Comment("c2", "p1")]),
+    ]
+
+def respond(include=None, decorator_include=None, **options):
+    @jsonapi(include=decorator_include, **options)
+    def get():
+        return JanusResponse(data=articles(), message=ArticleMessage, include=include)
+
+    del READ[:]
+    del LOADED[:]
+    return get()
+
+def included(response):
+    return sorted((resource['type'], resource['id']) for resource in response.get('included', []))
+
+@pytest.mark.parametrize('include', [
+    "author,comments.author",
+    ["author", "comments.author"],
+    "comments.author,author,comments,,author",
+    {'author': {}, 'comments': {'author': {}}},
+], ids=repr)
+def test_parse_include(include):
+    assert DataMessage.parse_include(include, ArticleMessage) == {'author': {}, 'comments': {'author': {}}}
+
+def test_parse_deep_include():
+    assert DataMessage.parse_include("comments.author.employer") == {'comments': {'author': {'employer': {}}}}
+    assert DataMessage.parse_include("") == {}
+
+@pytest.mark.parametrize('include, detail', [
+    ("title", "Can't include title, it is no relationship of article."),
+    ("id", "Can't include id, it is no relationship of article."),
+    ("comments.writer", "Can't include comments.writer, it is no relationship of comment."),
+    ("comments.author.employer.owner", "Can't include comments.author.employer.owner, it is no relationship of company."),
+], ids=repr)
+def test_parse_invalid_include(include, detail):
+    with pytest.raises(BadRequestException) as raised:
+        DataMessage.parse_include(include, ArticleMessage)
+
+    assert raised.value.detail == detail
+
+def test_include_only_named_relationship():
+    response = respond("author")
+
+    assert included(response) == [("person", "p0")]
+    assert READ == [] #comments are never read
+    assert LOADED == [["p0"]]
+
+def test_include_nested_path():
+    response = respond("comments.author")
+
+    assert included(response) == [("comment", "c0"), ("comment", "c1"), ("comment", "c2"), ("person", "p1"), ("person", "p2")]
+    assert LOADED == [["p1", "p2"]] #the loader is called once per level, for all comments
+
+def test_include_to_named_depth():
+    response = respond("comments")
+
+    assert included(response) == [("comment", "c0"), ("comment", "c1"), ("comment", "c2")]
+    assert LOADED == [] #authors of comments are not loaded
+
+    response = respond("comments.author.employer")
+    assert ("company", "c-p1") in included(response) and ("company", "c-p0") not in included(response)
+
+def test_include_paths():
+    messages = [DataMessage.from_object(article, ArticleMessage) for article in articles()]
+    resources = {}
+
+    DataMessage.include_paths(messages, DataMessage.parse_include("author,comments.author"), resources)
+
+    assert sorted(resources) == [("comment", "c0"), ("comment", "c1"), ("comment", "c2"), ("person", "p0"), ("person", "p1"), ("person", "p2")]
+
+def test_empty_include_includes_nothing():
+    response = respond("", include_relationships=True)
+
+    assert included(response) == []
+    assert READ == [] and LOADED == []
+
+def test_include_overrules_include_relationships():
+    assert included(respond("author", include_relationships=False)) == [("person", "p0")]
+    assert ("comment", "c0") in included(respond(None, include_relationships=True))
+
+def test_include_of_response_overrules_decorator():
+    assert included(respond(decorator_include="author")) == [("person", "p0")]
+    assert included(respond("comments", decorator_include="author")) == [("comment", "c0"), ("comment", "c1"), ("comment", "c2")]
+
+def test_invalid_include_is_bad_request():
+    response = respond("comments.writer")
+
+    assert response['errors'][0]['status'] == 400
+    assert response['errors'][0]['detail'] == "Can't include comments.writer, it is no relationship of comment."
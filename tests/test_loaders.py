@@ -0,0 +1,91 @@
+"""
+Tests that relationship loaders (see janus.loaders) are called once per response with the keys of all
+objects, and that resources included with a loader are the same as included using the mapping.
+"""
+
+import asyncio
+
+import pytest
+
+from janus.janus import Attribute, DataMessage, JanusResponse
+from janus.decorators import jsonapi, async_jsonapi
+from janus.loaders import DictLoader
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+OWNERS = {"o%d" % i: Obj(id="o%d" % i, name="owner %d" % i) for i in range(3)}
+
+ROWS = [Obj(id="r%d" % i, owner_id="o%d" % (i % 3), owner=OWNERS["o%d" % (i % 3)]) for i in range(10)]
+
+class OwnerMessage(DataMessage):
+    type_name = "owner"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+
+class MappedRowMessage(DataMessage):
+    type_name = "row"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    owner = Attribute(value_type=OwnerMessage, name='owner', mapping='owner', key_mapping='owner_id')
+
+def message_class(loader):
+    class RowMessage(DataMessage):
+        type_name = "row"
+        id = Attribute(value_type=str, name='id', mapping='id')
+        owner = Attribute(value_type=OwnerMessage, name='owner', key_mapping='owner_id', loader=loader)
+
+    return RowMessage
+
+def mapped(**options):
+    @jsonapi(**options)
+    def get():
+        return JanusResponse(data=ROWS, message=MappedRowMessage)
+
+    return get()
+
+@pytest.mark.parametrize('options', [dict(include_relationships=True), dict(include="owner")], ids=repr)
+def test_loader_called_once_per_response(options):
+    loader = DictLoader(OWNERS)
+    msg_class = message_class(loader)
+
+    @jsonapi(**options)
+    def get():
+        return JanusResponse(data=ROWS, message=msg_class)
+
+    assert get() == mapped(**options)
+    assert loader.calls == [["o0", "o1", "o2"]]
+
+def test_async_loader_called_once_per_response():
+    loader = DictLoader(OWNERS)
+    msg_class = message_class(loader)
+
+    @async_jsonapi(include_relationships=True, yield_every=3)
+    async def get():
+        return JanusResponse(data=ROWS, message=msg_class)
+
+    assert asyncio.run(get()) == mapped(include_relationships=True)
+    assert loader.calls == [["o0", "o1", "o2"]]
+
+def test_loader_not_called_without_includes():
+    loader = DictLoader(OWNERS)
+    msg_class = message_class(loader)
+
+    @jsonapi(include_relationships=False)
+    def get():
+        return JanusResponse(data=ROWS, message=msg_class)
+
+    assert get() == mapped(include_relationships=False)
+    assert loader.calls == []
+
+def test_keys_not_loaded_are_not_included():
+    loader = DictLoader({"o0": OWNERS["o0"]})
+    msg_class = message_class(loader)
+
+    @jsonapi(include_relationships=True)
+    def get():
+        return JanusResponse(data=ROWS, message=msg_class)
+
+    response = get()
+    assert [resource['id'] for resource in response['included']] == ["o0"]
+    assert len(loader.calls) == 1
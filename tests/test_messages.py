@@ -0,0 +1,65 @@
+"""
+Tests of DataMessage objects themselves, independent of how they are mapped.
+"""
+
+import copy
+import pickle
+
+import pytest
+
+from janus.janus import Attribute, DataMessage
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class AuthorMessage(DataMessage):
+    type_name = "author"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name')
+
+class ArticleMessage(DataMessage):
+    type_name = "article"
+    id = Attribute(value_type=str, name='id', mapping='id')
+    title = Attribute(value_type=str, name='title', mapping='title')
+    tags = Attribute(value_type=list, name='tags', mapping='tags', item_type=str)
+    author = Attribute(value_type=AuthorMessage, name='author', mapping='author', key_mapping='author.id', nested=True, nested_type=Obj)
+
+def article():
+    obj = Obj(id="1", title="Janus", tags=["a", "b"], author=Obj(id="a1", name="Ada"))
+    return DataMessage.from_object(obj, ArticleMessage, do_nesting=True)
+
+def request():
+    return DataMessage.from_message({'data': {'id': "1", 'type': "article", 'attributes': {'title': "Janus"}}}, ArticleMessage)
+
+COPIES = [
+    lambda msg: pickle.loads(pickle.dumps(msg)),
+    copy.deepcopy,
+    copy.copy,
+]
+
+@pytest.mark.parametrize('copied', COPIES, ids=["pickle", "deepcopy", "copy"])
+def test_copied_message_keeps_values(copied):
+    msg = article()
+    other = copied(msg)
+
+    assert other.id == "1" and other.title == "Janus" and other.tags == ["a", "b"]
+    assert other.to_dict(do_nesting=True) == msg.to_dict(do_nesting=True)
+
+@pytest.mark.parametrize('copied', COPIES, ids=["pickle", "deepcopy", "copy"])
+def test_copied_request_keeps_updated_members(copied):
+    msg = request()
+    obj = Obj(id="1", title="old", tags=["x"])
+
+    copied(msg).update_object(obj)
+
+    assert obj.title == "Janus"
+    assert obj.tags == ["x"] #not part of the request
+
+@pytest.mark.parametrize('copied', [copy.deepcopy, copy.copy], ids=["deepcopy", "copy"])
+def test_copied_message_is_independent(copied):
+    msg = article()
+    other = copied(msg)
+    other.title = "Other"
+
+    assert msg.title == "Janus"
@@ -0,0 +1,159 @@
+"""
+Tests of the pages in janus.pagination and of paged responses of the jsonapi decorator.
+"""
+
+import collections
+
+import pytest
+
+from janus.janus import Attribute, DataMessage, JanusResponse
+from janus.decorators import jsonapi
+from janus.exceptions import BadRequestException
+from janus.pagination import Page, CursorPage
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class ArticleMessage(DataMessage):
+    type_name = "article"
+    id = Attribute(value_type=str, name='id', mapping='id')
+
+class Source(object):
+    #a source like a generator, that records how many objects were read from it.
+    def __init__(self, count):
+        self.objects = [Obj(id=str(i)) for i in range(count)]
+        self.read = 0
+
+    def __iter__(self):
+        for obj in self.objects:
+            self.read = self.read + 1
+            yield obj
+
+class Query(object):
+    #a source like a queryset of an ORM: sliceable and counted with count(), but expensive to read completely.
+    def __init__(self, count):
+        self.objects = [Obj(id=str(i)) for i in range(count)]
+        self.counted = 0
+
+    def __getitem__(self, index):
+        return self.objects[index]
+
+    def __len__(self):
+        raise AssertionError("the whole query would be read")
+
+    def count(self):
+        self.counted = self.counted + 1
+        return len(self.objects)
+
+URL = "http://example.com/articles"
+
+def link(**params):
+    return URL + "?" + "&".join(name + "=" + str(value) for name, value in params.items())
+
+def test_links_and_meta():
+    page = Page(list(range(45)), number="2", size="10", count=True, url=URL, params={'sort': "id", 'page[number]': "2"})
+
+    assert page.items == list(range(10, 20))
+    assert page.links() == {
+        'self': link(sort="id", **{'page[number]': 2, 'page[size]': 10}),
+        'first': link(sort="id", **{'page[number]': 1, 'page[size]': 10}),
+        'prev': link(sort="id", **{'page[number]': 1, 'page[size]': 10}),
+        'next': link(sort="id", **{'page[number]': 3, 'page[size]': 10}),
+        'last': link(sort="id", **{'page[number]': 5, 'page[size]': 10}),
+    }
+    assert page.meta() == {'page': {'number': 2, 'size': 10, 'total': 45, 'pages': 5}}
+
+def test_last_page_without_count():
+    page = Page(list(range(25)), number=3, size=10, url=URL)
+
+    assert page.items == list(range(20, 25))
+    assert sorted(page.links()) == ['first', 'prev', 'self']
+    assert page.meta() == {'page': {'number': 3, 'size': 10}}
+
+def test_reads_only_size_plus_one_objects():
+    source = Source(100)
+    page = Page(iter(source), number=2, size=10)
+
+    assert [obj.id for obj in page.items] == [str(i) for i in range(10, 20)]
+    assert page.has_next
+    assert source.read == 21
+
+def test_count_is_deferred():
+    counted = []
+    def count(source):
+        counted.append(source)
+        return 95
+
+    page = Page(list(range(95)), number=2, size=10, count=count)
+    assert counted == [] #nothing is counted before it is needed
+    assert page.meta()['page']['total'] == 95
+    page.links()
+    assert len(counted) == 1 #counted once
+
+    last = Page(list(range(95)), number=10, size=10, count=count)
+    assert last.meta()['page']['total'] == 95
+    assert len(counted) == 1 #the total of the last page is known without counting
+
+def test_count_of_query_uses_count_method():
+    query = Query(30)
+    page = Page(query, number=1, size=10, count=True)
+
+    assert page.total == 30
+    assert query.counted == 1
+
+@pytest.mark.parametrize('source', [range(50), collections.deque(range(50)), tuple(range(50)), list(range(50))], ids=lambda source: type(source).__name__)
+def test_sequences(source):
+    page = Page(source, number=2, size=10, count=True)
+
+    assert page.items == list(range(10, 20))
+    assert page.total == 50
+
+def test_iterator_is_not_counted():
+    page = Page(iter(range(50)), number=1, size=10, count=True)
+
+    assert page.total == None
+    assert 'last' not in page.links()
+
+@pytest.mark.parametrize('params', [dict(number=0), dict(number="x"), dict(size=-1), dict(size="ten")], ids=repr)
+def test_invalid_parameters(params):
+    with pytest.raises(BadRequestException):
+        Page(list(range(10)), **params)
+
+def test_size_limited_and_defaults():
+    assert Page([], size=500, max_size=100).size == 100
+    assert Page([], number=None, size="").number == 1
+    assert Page([], number=None, size="").size == 20
+
+def test_cursor_page_reads_after_cursor():
+    source = Source(30)
+    page = CursorPage(iter(source), after="9", size=10, url=URL)
+
+    assert [obj.id for obj in page.items] == [str(i) for i in range(10, 20)]
+    assert source.read == 21 #up to the cursor and one more than the page
+    assert page.links() == {
+        'self': link(**{'page[size]': 10, 'page[after]': 9}),
+        'first': link(**{'page[size]': 10}),
+        'next': link(**{'page[after]': 19, 'page[size]': 10}),
+    }
+    assert page.meta() == {'page': {'size': 10, 'after': "9"}}
+
+def test_cursor_page_with_seek():
+    objects = [Obj(id=str(i)) for i in range(30)]
+    page = CursorPage(objects, after="24", size=10, seek=lambda source, after: [o for o in source if int(o.id) > int(after)])
+
+    assert [obj.id for obj in page.items] == [str(i) for i in range(25, 30)]
+    assert page.has_next == False
+    assert 'next' not in page.links()
+
+def test_decorator_adds_links_and_meta():
+    @jsonapi(meta={'service': "test"})
+    def get():
+        page = Page([Obj(id=str(i)) for i in range(15)], number=2, size=10, count=True, url=URL)
+        return JanusResponse(data=page, message=ArticleMessage)
+
+    response = get()
+    assert [resource['id'] for resource in response['data']] == [str(i) for i in range(10, 15)]
+    assert response['meta'] == {'service': "test", 'page': {'number': 2, 'size': 10, 'total': 15, 'pages': 2}}
+    assert response['links']['prev'] == link(**{'page[number]': 1, 'page[size]': 10})
+    assert 'next' not in response['links']
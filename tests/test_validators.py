@@ -0,0 +1,130 @@
+"""
+Tests of the validation of incoming resources (see janus.validators and DataMessage.from_message),
+which has to accept exactly what map_message can convert and point at every invalid member.
+"""
+
+import pytest
+
+from janus.janus import Attribute, DataMessage
+from janus.exceptions import BadRequestException
+from janus.janus_logging import janus_logger
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class AddressMessage(DataMessage):
+    type_name = "address"
+    id = Attribute(value_type=int, name='id', mapping='id')
+    city = Attribute(value_type=str, name='city', mapping='city', required=True)
+    zip = Attribute(value_type=int, name='zip', mapping='zip')
+
+class TagMessage(DataMessage):
+    type_name = "tag"
+    id = Attribute(value_type=str, name='id', mapping='id')
+
+class PersonMessage(DataMessage):
+    type_name = "person"
+    id = Attribute(value_type=int, name='id', mapping='id')
+    name = Attribute(value_type=str, name='name', mapping='name', required=True)
+    age = Attribute(value_type=int, name='age', mapping='age')
+    score = Attribute(value_type=float, name='score', mapping='score')
+    active = Attribute(value_type=bool, name='active', mapping='active')
+    tags = Attribute(value_type=list, name='tags', mapping='tags', item_type=str)
+    extra = Attribute(value_type=dict, name='extra', mapping='extra', item_type=int)
+    labels = Attribute(value_type=TagMessage, name='labels', mapping='labels', key_mapping='label_ids')
+    address = Attribute(value_type=AddressMessage, name='address', mapping='address', key_mapping='address.id', nested=True, nested_type=Obj)
+
+@pytest.fixture(autouse=True)
+def quiet():
+    #invalid requests log their errors
+    janus_logger.disable()
+    yield
+    janus_logger.enable()
+
+def person(**attributes):
+    values = {'name': "Ada"}
+    values.update(attributes)
+    return {'id': 1, 'type': "person", 'attributes': values}
+
+def errors(data):
+    #the errors of the request with data, as list of (pointer, detail).
+    with pytest.raises(BadRequestException) as raised:
+        DataMessage.from_message({'data': data}, PersonMessage)
+
+    return [(error['source']['pointer'], error['detail']) for error in raised.value.meta['errors']]
+
+def test_null_values_accepted():
+    data = person(age=None, score=None, active=None, tags=None, extra=None)
+    data['id'] = None
+
+    msg = DataMessage.from_message({'data': data}, PersonMessage)
+    unvalidated = DataMessage.from_message({'data': data}, PersonMessage, validate=False)
+
+    assert msg.id == None and msg.age == None and msg.tags == None and msg.extra == None
+    assert msg.to_dict() == unvalidated.to_dict()
+
+def test_null_items_accepted():
+    msg = DataMessage.from_message({'data': person(tags=["a", None], extra={'a': None, 'b': "2"})}, PersonMessage)
+
+    assert msg.tags == ["a", None]
+    assert msg.extra == {'a': None, 'b': 2}
+
+@pytest.mark.parametrize('attributes, pointer', [
+    (dict(age="old"), "/data/attributes/age"),
+    (dict(age=[1]), "/data/attributes/age"),
+    (dict(score={}), "/data/attributes/score"),
+    (dict(tags="a"), "/data/attributes/tags"),
+    (dict(tags=["a", []]), "/data/attributes/tags"),
+    (dict(extra={'a': "x"}), "/data/attributes/extra"),
+    (dict(name=None, age="old"), "/data/attributes/age"),
+], ids=repr)
+def test_invalid_attribute_points_at_member(attributes, pointer):
+    assert [error[0] for error in errors(person(**attributes))] == [pointer]
+
+def test_invalid_id_and_missing_required_member():
+    data = person()
+    data['id'] = "one"
+    del data['attributes']['name']
+
+    assert errors(data) == [
+        ("/data/id", "Expected int got str for id."),
+        ("/data/attributes/name", "Missing required field name."),
+    ]
+
+def test_invalid_relationships():
+    data = person()
+    data['relationships'] = {'labels': {'data': [{'id': "t1"}, {'type': "tag"}]}}
+    assert errors(data) == [("/data/relationships/labels/data/1", "Expected a resource identifier with id.")]
+
+    data['relationships'] = {'labels': []}
+    assert errors(data) == [("/data/relationships/labels", "Expected a relationship object with data.")]
+
+def test_bulk_errors_point_at_resource():
+    data = [person(), person(), person(), person(age="old"), person(tags=1)]
+
+    assert [error[0] for error in errors(data)] == ["/data/3/attributes/age", "/data/4/attributes/tags"]
+
+def test_nested_record_errors_point_at_record():
+    data = person()
+    data['relationships'] = {'address': {'data': {'id': 7, 'attributes': {'zip': "none"}}}}
+
+    assert errors(data) == [
+        ("/data/relationships/address/data/attributes/city", "Missing required field city."),
+        ("/data/relationships/address/data/attributes/zip", "Expected int got str for zip."),
+    ]
+
+    data['relationships'] = {'address': {'data': [{'id': 7, 'attributes': {'city': "Graz"}}, {'id': "x"}]}}
+    assert errors(data) == [("/data/relationships/address/data/1/id", "Expected int got str for id.")]
+
+def test_bulk_nested_record_errors():
+    nested = person()
+    nested['relationships'] = {'address': {'data': {'id': 7, 'attributes': {'city': 1.5, 'zip': []}}}}
+
+    assert [error[0] for error in errors([person(), nested])] == ["/data/1/relationships/address/data/attributes/zip"]
+
+def test_single_error_is_the_detail():
+    with pytest.raises(BadRequestException) as raised:
+        DataMessage.from_message({'data': person(age="old")}, PersonMessage)
+
+    assert raised.value.detail == "Expected int got str for age."